@@ -0,0 +1,277 @@
+"""
+Ce fichier comprend la suite de benchmarks du projet. Chaque mesure donne le nombre de blocs
+(ou d'opérations) par seconde et le débit en Mo/s.
+
+Utilisation :
+    python benchmark.py run [--sizes 8 1024 1048576] [--max-size N] [--output resultats.json]
+    python benchmark.py compare baseline.json resultats.json [--tolerance 0.1]
+
+La commande compare retourne un code de sortie non nul si une mesure est plus lente que
+la référence au-delà de la tolérance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from random import getrandbits
+
+import engines
+import gost
+import gost_stream
+from gost_feistel_function import compile_sbox_tables
+from key_generator import gost_key_generator, gost_advanced_key_generator
+from utilities import bytearray_to_64bits_block, _64bits_block_to_bytearray, bytes_to_blocks, blocks_to_bytes
+
+"""
+Tailles d'entrée par défaut (en octets).
+"""
+DEFAULT_SIZES = [8, 1024, 64 * 1024, 1024 * 1024]
+
+"""
+Durée minimale d'une mesure : les appels rapides sont répétés jusqu'à l'atteindre.
+"""
+MIN_TIME = 0.05
+
+KEY = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+def measure(function, repeat=3, min_time=MIN_TIME):
+    """
+    Cette fonction mesure la durée d'un appel de function.
+    :param function: fonction sans argument à mesurer
+    :param repeat: nombre de séries de mesures (on garde la meilleure)
+    :param min_time: durée minimale d'une série
+    :return: la durée moyenne d'un appel (en secondes).
+    """
+    best = None
+    for _ in range(repeat):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        duration = elapsed / loops
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def _result(name, size, seconds, blocks=None, operations=None):
+    result = {"name": name, "size": size, "seconds": seconds}
+    if blocks is not None:
+        result["blocks_per_s"] = blocks / seconds
+    if operations is not None:
+        result["ops_per_s"] = operations / seconds
+    if size:
+        result["mb_per_s"] = size / seconds / 1e6
+    return result
+
+
+def _available_engines():
+    available = list()
+    for name in engines.engine_names():
+        try:
+            engines.get_engine(name)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def bench_blocks(key_array, repeat):
+    """
+    Mesure encrypt_block sur le chemin de référence et avec les tables précalculées.
+    """
+    tables = compile_sbox_tables()
+    block = getrandbits(64)
+    return [_result("encrypt_block/reference", 8, measure(lambda: gost.encrypt_block(block, key_array), repeat), 1),
+            _result("encrypt_block/table", 8,
+                    measure(lambda: gost.encrypt_block(block, key_array, tables), repeat), 1)]
+
+
+def bench_key_schedules(repeat):
+    """
+    Mesure les deux schémas de génération des clés de rounds.
+    """
+    return [_result("key_schedule/simple", 0, measure(lambda: gost_key_generator(KEY), repeat), operations=1),
+            _result("key_schedule/advanced", 0,
+                    measure(lambda: gost_advanced_key_generator(KEY & 2 ** 128 - 1), repeat), operations=1)]
+
+
+def bench_modes(key_array, sizes, repeat):
+    """
+    Mesure gost.encrypt et gost.decrypt pour chaque mode (chemin de référence et tables).
+    """
+    tables = compile_sbox_tables()
+    results = list()
+    for size in sizes:
+        blocks = [getrandbits(64) for _ in range(max(1, size // 8))]
+        for mode in ("ECB", "CBC", "CTR"):
+            for path, path_tables in (("reference", None), ("table", tables)):
+                cypher = gost.encrypt(blocks, key_array, mode, path_tables)
+                results.append(_result("encrypt/{}/{}".format(mode, path), size, measure(
+                    lambda: gost.encrypt(blocks, key_array, mode, path_tables), repeat), len(blocks)))
+                results.append(_result("decrypt/{}/{}".format(mode, path), size, measure(
+                    lambda: gost.decrypt(cypher, key_array, mode, path_tables), repeat), len(blocks)))
+    return results
+
+
+def bench_engines(key_array, sizes, repeat):
+    """
+    Mesure chaque moteur disponible (voir engines.py) en ECB et CTR.
+    """
+    results = list()
+    for name in _available_engines():
+        if name == "reference":
+            continue  # déjà mesuré par bench_modes
+        for size in sizes:
+            blocks = [getrandbits(64) for _ in range(max(1, size // 8))]
+            for mode in ("ECB", "CTR"):
+                results.append(_result("engine/{}/{}".format(name, mode), size, measure(
+                    lambda: engines.encrypt(blocks, key_array, mode, name), repeat), len(blocks)))
+    return results
+
+
+def bench_conversions(sizes, repeat):
+    """
+    Mesure les conversions octets <-> blocs de utilities.py.
+    """
+    results = list()
+    for size in sizes:
+        data = os.urandom(size - size % 8 or 8)
+        blocks = bytearray_to_64bits_block(data)
+        n_blocks = len(blocks)
+        results.append(_result("to_blocks/legacy", size, measure(lambda: bytearray_to_64bits_block(data), repeat),
+                               n_blocks))
+        results.append(_result("to_blocks/buffer", size, measure(lambda: bytes_to_blocks(data), repeat), n_blocks))
+        results.append(_result("to_bytes/legacy", size, measure(lambda: _64bits_block_to_bytearray(blocks), repeat),
+                               n_blocks))
+        results.append(_result("to_bytes/buffer", size, measure(lambda: blocks_to_bytes(blocks), repeat), n_blocks))
+    return results
+
+
+def bench_files(sizes, repeat):
+    """
+    Mesure encrypt_file et encrypt_file_stream de bout en bout.
+    """
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+        input_name = os.path.join(directory, "plain.txt")
+        output_name = os.path.join(directory, "cypher.bin")
+        for size in sizes:
+            with open(input_name, "w", encoding="UTF-8") as file:
+                file.write("a" * size)
+            for mode in ("ECB", "CBC", "CTR"):
+                results.append(_result("encrypt_file/{}".format(mode), size, measure(
+                    lambda: gost.encrypt_file(input_name, output_name, mode), repeat), size // 8))
+                results.append(_result("encrypt_file_stream/{}".format(mode), size, measure(
+                    lambda: gost_stream.encrypt_file_stream(input_name, output_name, mode), repeat), size // 8))
+    return results
+
+
+"""
+Groupes de benchmarks disponibles.
+"""
+GROUPS = ("blocks", "key_schedules", "modes", "engines", "conversions", "files")
+
+
+def run_benchmarks(sizes=None, groups=GROUPS, repeat=3):
+    """
+    Cette fonction exécute les benchmarks demandés.
+    :param sizes: tailles d'entrée en octets (DEFAULT_SIZES par défaut)
+    :param groups: groupes de benchmarks à exécuter (voir GROUPS)
+    :param repeat: nombre de séries par mesure
+    :return: dictionnaire {"meta": ..., "results": [...]} sérialisable en JSON.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    key_array = gost_key_generator(KEY)
+    results = list()
+    if "blocks" in groups:
+        results += bench_blocks(key_array, repeat)
+    if "key_schedules" in groups:
+        results += bench_key_schedules(repeat)
+    if "modes" in groups:
+        results += bench_modes(key_array, sizes, repeat)
+    if "engines" in groups:
+        results += bench_engines(key_array, sizes, repeat)
+    if "conversions" in groups:
+        results += bench_conversions(sizes, repeat)
+    if "files" in groups:
+        results += bench_files(sizes, repeat)
+    meta = {"python": platform.python_version(), "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "sizes": sizes}
+    return {"meta": meta, "results": results}
+
+
+def _rate(result):
+    return result.get("mb_per_s") or result.get("ops_per_s") or result.get("blocks_per_s")
+
+
+def compare_results(baseline, current, tolerance=0.1):
+    """
+    Cette fonction compare deux séries de résultats.
+    :param baseline: résultats de référence (retour de run_benchmarks)
+    :param current: nouveaux résultats
+    :param tolerance: baisse relative du débit tolérée (0.1 = 10 %)
+    :return: liste de dictionnaires (name, size, baseline, current, ratio, regression).
+    """
+    baseline_rates = {(result["name"], result["size"]): _rate(result) for result in baseline["results"]}
+    comparison = list()
+    for result in current["results"]:
+        key = (result["name"], result["size"])
+        if key not in baseline_rates:
+            continue
+        ratio = _rate(result) / baseline_rates[key]
+        comparison.append({"name": key[0], "size": key[1], "baseline": baseline_rates[key],
+                           "current": _rate(result), "ratio": ratio, "regression": ratio < 1 - tolerance})
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du chiffrement GOST")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="exécute les benchmarks et écrit les résultats en JSON")
+    run_parser.add_argument("--sizes", type=int, nargs="+", help="tailles d'entrée en octets")
+    run_parser.add_argument("--max-size", type=int, help="ignore les tailles supérieures")
+    run_parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", help="fichier JSON de sortie (sortie standard par défaut)")
+
+    compare_parser = subparsers.add_parser("compare", help="compare des résultats à une référence")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        sizes = args.sizes or DEFAULT_SIZES
+        if args.max_size:
+            sizes = [size for size in sizes if size <= args.max_size]
+        output = json.dumps(run_benchmarks(sizes, args.groups, args.repeat), indent=2)
+        if args.output:
+            with open(args.output, "w") as file:
+                file.write(output)
+        else:
+            print(output)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = 0
+    for entry in compare_results(baseline, current, args.tolerance):
+        flag = "REGRESSION" if entry["regression"] else "ok"
+        regressions += entry["regression"]
+        print("{:<40} {:>10} {:>8.2f}x {}".format(entry["name"], entry["size"], entry["ratio"], flag))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import unittest
+
+from benchmark import *
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks([8, 64], ("blocks", "key_schedules", "conversions"), repeat=1)
+        names = {result["name"] for result in results["results"]}
+        assert "encrypt_block/table" in names
+        assert "key_schedule/advanced" in names
+        assert all(result["seconds"] > 0 for result in results["results"])
+
+    def test_compare_results(self):
+        baseline = {"results": [{"name": "a", "size": 8, "mb_per_s": 10.0},
+                                {"name": "b", "size": 8, "mb_per_s": 10.0}]}
+        current = {"results": [{"name": "a", "size": 8, "mb_per_s": 5.0},
+                               {"name": "b", "size": 8, "mb_per_s": 9.5},
+                               {"name": "c", "size": 8, "mb_per_s": 1.0}]}
+        comparison = compare_results(baseline, current, 0.1)
+        assert [entry["regression"] for entry in comparison] == [True, False]
@@ -0,0 +1,102 @@
+"""
+Ce fichier comprend un lecteur à accès aléatoire pour les fichiers chiffrés en mode CTR
+(vecteur initial de 64 bits en tête, puis les blocs chiffrés). En CTR, chaque bloc ne dépend
+que du compteur iv ^ ct : une lecture ne génère le flux de clé que pour les blocs touchés,
+quelle que soit sa position dans le fichier.
+"""
+import io
+import os
+
+import engines
+from gost_feistel_function import S_BOX_RFC
+from utilities import bytes_to_blocks, blocks_to_bytes, PADDING_ZERO
+
+
+class CTRReader(io.RawIOBase):
+    """
+    Objet fichier en lecture seule (read, readinto, seek, tell) retournant le texte clair
+    d'un fichier chiffré en CTR par gost.encrypt_file ou gost_stream.encrypt_file_stream.
+    """
+
+    def __init__(self, file, key_array, engine="table", s_box=S_BOX_RFC, length=None):
+        """
+        :param file: nom du fichier chiffré ou objet fichier binaire permettant seek
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param engine: nom du moteur utilisé (voir engines.py)
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        :param length: taille du texte clair, si elle est inférieure à celle du texte chiffré (remplissage)
+        """
+        super().__init__()
+        self._own_file = isinstance(file, (str, bytes, os.PathLike))
+        self._file = open(file, "rb") if self._own_file else file
+        self.key_array = key_array
+        self.engine = engines.get_engine(engine)
+        self.s_box = s_box
+        try:
+            self._file.seek(0)
+            header = self._file.read(8)
+            if len(header) != 8:
+                raise ValueError("le fichier ne contient pas de vecteur initial")
+            self.iv = int.from_bytes(header, "big")
+            size = self._file.seek(0, io.SEEK_END) - 8
+        except BaseException:
+            if self._own_file:  # le fichier ouvert par le lecteur n'est pas laissé ouvert
+                self._file.close()
+            raise
+        self.size = size if length is None else min(length, size)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """
+        :param offset: position relative en octets dans le texte clair
+        :param whence: io.SEEK_SET, io.SEEK_CUR ou io.SEEK_END
+        :return: la nouvelle position.
+        """
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError("whence invalide : {}".format(whence))
+        if position < 0:
+            raise ValueError("position négative : {}".format(position))
+        self._position = position
+        return position
+
+    def readinto(self, buffer):
+        """
+        Cette fonction déchiffre uniquement les blocs couvrant [position, position + len(buffer)[.
+        :param buffer: buffer inscriptible
+        :return: le nombre d'octets lus (0 en fin de fichier).
+        """
+        if self.closed:
+            raise ValueError("lecture sur un fichier fermé")
+        n_bytes = min(len(buffer), self.size - self._position)
+        if n_bytes <= 0:
+            return 0
+        first_block = self._position // 8
+        last_block = (self._position + n_bytes - 1) // 8
+        self._file.seek(8 + 8 * first_block)
+        cypher = self._file.read(8 * (last_block - first_block + 1))
+        blocks = bytes_to_blocks(cypher, PADDING_ZERO)
+        plain = blocks_to_bytes(self.engine.ctr_blocks(blocks, self.iv, self.key_array, self.s_box, first_block))
+        start = self._position - 8 * first_block
+        memoryview(buffer).cast("B")[:n_bytes] = plain[start:start + n_bytes]
+        self._position += n_bytes
+        return n_bytes
+
+    def close(self):
+        if not self.closed and self._own_file:
+            self._file.close()
+        super().close()
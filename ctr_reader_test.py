@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+import unittest
+from random import randrange
+from unittest import mock
+
+import gost
+from ctr_reader import CTRReader
+from gost_stream import encrypt_file_stream
+
+
+class TestCTRReader(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = os.urandom(10003)
+        self.plain_name = os.path.join(self.directory.name, "plain.bin")
+        self.cypher_name = os.path.join(self.directory.name, "cypher.bin")
+        with open(self.plain_name, "wb") as file:
+            file.write(self.data)
+        self.keys = encrypt_file_stream(self.plain_name, self.cypher_name, "CTR", chunk_size=1024)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_all(self):
+        with CTRReader(self.cypher_name, self.keys) as reader:
+            assert reader.read() == self.data
+            assert reader.read(10) == b""
+
+    def test_random_access(self):
+        with CTRReader(self.cypher_name, self.keys) as reader:
+            for _ in range(50):
+                start = randrange(len(self.data))
+                size = randrange(1, 100)
+                reader.seek(start)
+                assert reader.read(size) == self.data[start:start + size]
+                assert reader.tell() == min(start + size, len(self.data))
+
+    def test_seek_whence(self):
+        with CTRReader(self.cypher_name, self.keys) as reader:
+            reader.seek(-5, io.SEEK_END)
+            assert reader.read() == self.data[-5:]
+            reader.seek(10)
+            reader.seek(3, io.SEEK_CUR)
+            assert reader.read(4) == self.data[13:17]
+
+    def test_buffered(self):
+        with open(self.cypher_name, "rb") as file:
+            reader = io.BufferedReader(CTRReader(file, self.keys))
+            reader.seek(4000)
+            assert reader.read(2000) == self.data[4000:6000]
+
+    def test_legacy_encrypt_file(self):
+        text_name = os.path.join(self.directory.name, "plain.txt")
+        with open(text_name, "w", encoding="UTF-8") as file:
+            file.write("Bonjour le monde !")
+        keys = gost.encrypt_file(text_name, self.cypher_name, "CTR")
+        with CTRReader(self.cypher_name, keys, length=18) as reader:
+            reader.seek(8)
+            assert reader.read() == b"le monde !"
+
+    def test_missing_iv(self):
+        with open(self.cypher_name, "wb") as file:
+            file.write(b"abc")
+        opened = list()
+
+        def tracking_open(*args):
+            opened.append(open(*args))
+            return opened[-1]
+
+        with mock.patch("ctr_reader.open", tracking_open, create=True):
+            try:
+                CTRReader(self.cypher_name, self.keys)
+            except ValueError:
+                assert opened[0].closed  # fermé par le constructeur, pas par le ramasse-miettes
+            else:
+                self.fail("ValueError attendue")
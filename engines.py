@@ -0,0 +1,206 @@
+"""
+Ce fichier comprend le registre des moteurs de chiffrement par lots et les modes d'opération
+construits au-dessus de ces moteurs.
+
+Un moteur fournit trois fonctions :
+- encrypt_blocks(blocks, key_array, s_box) : chiffrement indépendant de chaque bloc
+- decrypt_blocks(blocks, key_array, s_box) : déchiffrement indépendant de chaque bloc
+- ctr_blocks(blocks, iv, key_array, s_box, start) : XOR avec le flux de clé CTR (iv ^ ct)
+
+Les moteurs lourds (NumPy, bitslice, ...) ne sont importés que lorsqu'ils sont demandés.
+"""
+from collections import namedtuple
+
+from gost import encrypt_block, decrypt_block, apply_rounds, ofb_keystream
+from gost_feistel_function import S_BOX_RFC, compile_sbox_tables
+from key_generator import rdm_IV_generator
+
+class Engine(namedtuple("Engine", ["name", "encrypt_blocks", "decrypt_blocks", "ctr_blocks"])):
+    """
+    Moteur de chiffrement par lots. Il est sérialisé par son nom, ce qui permet de l'envoyer
+    à un autre processus.
+    """
+    __slots__ = ()
+
+    def __reduce__(self):
+        return get_engine, (self.name,)
+
+
+def _check_reference_sbox(s_box):
+    if s_box != S_BOX_RFC:  # comparaison par valeur : la s_box peut avoir été copiée ou sérialisée
+        raise ValueError("le moteur de référence n'utilise que S_BOX_RFC")
+
+
+def _reference_encrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    _check_reference_sbox(s_box)
+    return [encrypt_block(block, key_array) for block in blocks]
+
+
+def _reference_decrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    _check_reference_sbox(s_box)
+    return [decrypt_block(block, key_array) for block in blocks]
+
+
+def _table_encrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    tables = compile_sbox_tables(s_box)
+    return [apply_rounds(block, key_array, tables) for block in blocks]
+
+
+def _table_decrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    tables = compile_sbox_tables(s_box)
+    decrypt_keys = key_array[::-1]
+    return [apply_rounds(block, decrypt_keys, tables) for block in blocks]
+
+
+def make_ctr_blocks(encrypt_blocks):
+    """
+    Cette fonction construit une fonction ctr_blocks à partir d'une fonction encrypt_blocks.
+    :param encrypt_blocks: fonction de chiffrement par lots d'un moteur
+    :return: la fonction ctr_blocks correspondante.
+    """
+
+    def ctr_blocks(blocks, iv, key_array, s_box=S_BOX_RFC, start=0):
+        counters = [iv ^ ct for ct in range(start, start + len(blocks))]  # on xor le vecteur et le compteur
+        keystream = encrypt_blocks(counters, key_array, s_box)
+        return [block ^ stream for block, stream in zip(blocks, keystream)]
+
+    return ctr_blocks
+
+
+def _load_reference():
+    return Engine("reference", _reference_encrypt_blocks, _reference_decrypt_blocks,
+                  make_ctr_blocks(_reference_encrypt_blocks))
+
+
+def _load_table():
+    return Engine("table", _table_encrypt_blocks, _table_decrypt_blocks, make_ctr_blocks(_table_encrypt_blocks))
+
+
+def _load_numpy():
+    import gost_numpy
+    return Engine("numpy", gost_numpy.encrypt_blocks, gost_numpy.decrypt_blocks, gost_numpy.ctr_blocks)
+
+
+def _load_bitslice():
+    import gost_bitslice
+    return Engine("bitslice", gost_bitslice.encrypt_blocks, gost_bitslice.decrypt_blocks,
+                  make_ctr_blocks(gost_bitslice.encrypt_blocks))
+
+
+def _load_unrolled():
+    import gost_codegen
+    return Engine("unrolled", gost_codegen.encrypt_blocks, gost_codegen.decrypt_blocks,
+                  make_ctr_blocks(gost_codegen.encrypt_blocks))
+
+
+"""
+Registre des moteurs : nom -> fonction de chargement (appelée une seule fois).
+"""
+_ENGINE_LOADERS = {
+    "reference": _load_reference,
+    "table": _load_table,
+    "numpy": _load_numpy,
+    "bitslice": _load_bitslice,
+    "unrolled": _load_unrolled,
+}
+_ENGINES = {}
+
+
+def register_engine(name, loader):
+    """
+    Cette fonction ajoute un moteur au registre.
+    :param name: nom du moteur
+    :param loader: fonction sans argument retournant un Engine
+    """
+    _ENGINE_LOADERS[name] = loader
+    _ENGINES.pop(name, None)
+
+
+def engine_names():
+    """
+    :return: la liste des noms de moteurs enregistrés.
+    """
+    return list(_ENGINE_LOADERS)
+
+
+def get_engine(name="table"):
+    """
+    Cette fonction retourne le moteur demandé en le chargeant si nécessaire.
+    :param name: nom du moteur (ou un Engine, retourné tel quel)
+    :return: l'Engine correspondant.
+    """
+    if isinstance(name, Engine):
+        return name
+    engine = _ENGINES.get(name)
+    if engine is None:
+        if name not in _ENGINE_LOADERS:
+            raise ValueError("moteur inconnu : {} (disponibles : {})".format(name, ", ".join(_ENGINE_LOADERS)))
+        engine = _ENGINE_LOADERS[name]()
+        _ENGINES[name] = engine
+    return engine
+
+
+def encrypt(blocks, key_array, operation_mode="ECB", engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction chiffre une liste de blocs de 64 bits avec le moteur demandé.
+    Le résultat est identique à celui de gost.encrypt (vecteur initial en première position hors ECB).
+    Les chiffrements CBC, CFB et OFB n'étant pas parallélisables, ils sont toujours effectués bloc par bloc.
+    :param blocks: Liste de blocs à chiffrer.
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: la liste de blocs chiffrés.
+    """
+    if operation_mode == "ECB":
+        return get_engine(engine).encrypt_blocks(blocks, key_array, s_box)
+    elif operation_mode == "CBC":
+        tables = compile_sbox_tables(s_box)
+        iv = rdm_IV_generator()
+        encrypted_blocks = [iv]
+        for block in blocks:
+            encrypted_blocks.append(apply_rounds(encrypted_blocks[-1] ^ block, key_array, tables))
+        return encrypted_blocks
+    elif operation_mode == "CTR":
+        iv = rdm_IV_generator()
+        return [iv] + list(get_engine(engine).ctr_blocks(blocks, iv, key_array, s_box))
+    elif operation_mode == "CFB":
+        tables = compile_sbox_tables(s_box)
+        encrypted_blocks = [rdm_IV_generator()]
+        for block in blocks:
+            encrypted_blocks.append(block ^ apply_rounds(encrypted_blocks[-1], key_array, tables))
+        return encrypted_blocks
+    elif operation_mode == "OFB":
+        iv = rdm_IV_generator()
+        keystream = ofb_keystream(iv, key_array, len(blocks), compile_sbox_tables(s_box))
+        return [iv] + [block ^ gamma for block, gamma in zip(blocks, keystream)]
+    raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
+
+
+def decrypt(blocks, key_array, operation_mode="ECB", engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction dé-chiffre une liste de blocs de 64 bits avec le moteur demandé.
+    Les déchiffrements CBC et CFB sont effectués en une seule passe par lots, suivie d'un XOR avec les blocs chiffrés.
+    :param blocks: Liste de blocs à déchiffrer (vecteur initial en première position hors ECB).
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round.
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: la liste de blocs déchiffrés.
+    """
+    if operation_mode == "ECB":
+        return get_engine(engine).decrypt_blocks(blocks, key_array, s_box)
+    elif operation_mode == "CBC":
+        decrypted_blocks = get_engine(engine).decrypt_blocks(blocks[1:], key_array, s_box)
+        return [block ^ previous for block, previous in zip(decrypted_blocks, blocks)]
+    elif operation_mode == "CTR":
+        return list(get_engine(engine).ctr_blocks(blocks[1:], blocks[0], key_array, s_box))
+    elif operation_mode == "CFB":
+        gamma = get_engine(engine).encrypt_blocks(blocks[:-1], key_array, s_box)
+        return [block ^ previous for block, previous in zip(blocks[1:], gamma)]
+    elif operation_mode == "OFB":
+        if not blocks:
+            return []
+        keystream = ofb_keystream(blocks[0], key_array, len(blocks) - 1, compile_sbox_tables(s_box))
+        return [block ^ gamma for block, gamma in zip(blocks[1:], keystream)]
+    raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
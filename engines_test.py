@@ -0,0 +1,51 @@
+import pickle
+import unittest
+from random import getrandbits
+
+import engines
+from gost import encrypt, decrypt
+from gost_feistel_function import S_BOX_BANK, S_BOX_RFC
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestEngines(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.blocks = [getrandbits(64) for _ in range(20)]
+
+    def test_ecb_matches_gost(self):
+        expected = encrypt(self.blocks, self.keys)
+        for name in ("reference", "table"):
+            assert engines.encrypt(self.blocks, self.keys, engine=name) == expected
+            assert engines.decrypt(expected, self.keys, engine=name) == self.blocks
+
+    def test_modes_round_trip(self):
+        for mode in ("CBC", "CTR"):
+            cypher = engines.encrypt(self.blocks, self.keys, mode)
+            assert decrypt(cypher, self.keys, mode) == self.blocks
+            cypher = encrypt(self.blocks, self.keys, mode)
+            assert engines.decrypt(cypher, self.keys, mode) == self.blocks
+
+    def test_reference_sbox(self):
+        with self.assertRaises(ValueError):
+            engines.encrypt(self.blocks, self.keys, engine="reference", s_box=S_BOX_BANK)
+        s_box = pickle.loads(pickle.dumps(S_BOX_RFC))  # copie reçue par un autre processus
+        assert engines.encrypt(self.blocks, self.keys, engine="reference", s_box=s_box) == encrypt(self.blocks,
+                                                                                                   self.keys)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            engines.get_engine("inconnu")
+        with self.assertRaises(ValueError):
+            engines.encrypt(self.blocks, self.keys, "XYZ")
+
+    def test_cfb_ofb(self):
+        blocks = [getrandbits(64) for _ in range(50)]
+        for name in engines.engine_names():
+            for mode in ("CFB", "OFB"):
+                cypher = engines.encrypt(blocks, self.keys, mode, name)
+                assert decrypt(cypher, self.keys, mode) == blocks
+                assert list(engines.decrypt(cypher, self.keys, mode, name)) == blocks
@@ -2,28 +2,33 @@
 Ce fichier reprend les fonctions permettant un chiffrement
 et un déchiffrement GOST suivant différents modes d'opération
 """
-import threading
+from array import array
 
-from gost_feistel_function import gost_feistel_function
+from gost_feistel_function import gost_feistel_function, gost_feistel_function_table
+from gost_mac import GostMAC, MAC_SIZE
+from instrumentation import NULL_METRICS, count_blocks
 from key_generator import *
 from utilities import *
-from utilities import _64bits_block_to_bytearray
 
 
-def feistel(block, key, swap=True):
+def feistel(block, key, swap=True, tables=None):
     """
     Cette fonction applique l'ensemble des transformations effectuées à chaque round.
 
     :param block: Le block de 64 bits à transformer
     :param key: La clé de 32 bits locale au round
     :param swap: Booléen permettant de spécifier si un swap final entre les parties L et R est requis.
+    :param tables: tables précalculées (compile_sbox_tables). Si None, on utilise la fonction de référence.
     :return: Le bloc de 64 bits transformé.
     """
     right_part = block & 2 ** 32 - 1  # on prend la partie droit du block
     left_part = block >> 32  # on prend la partie gauche du block
 
-    right = gost_feistel_function(key,
-                                  right_part)  # on applique la fonction (gost_feistel_function) sur la partie droit
+    if tables is None:
+        right = gost_feistel_function(key,
+                                      right_part)  # on applique la fonction (gost_feistel_function) sur la partie droit
+    else:
+        right = gost_feistel_function_table(key, right_part, tables)
     left_xor = left_part ^ right
 
     if swap:
@@ -32,13 +37,37 @@ def feistel(block, key, swap=True):
         return (left_xor << 32) | right_part
 
 
-def encrypt_block(block, key_array):
+def apply_rounds(block, round_keys, tables):
+    """
+    Cette fonction applique les 32 rounds du GOST sur un bloc de 64 bits en utilisant les tables
+    précalculées. Les rounds sont déroulés en ligne (sans appel à feistel) pour limiter le coût
+    des appels de fonction.
+    :param block: bloc de 64 bits à transformer
+    :param round_keys: liste des 32 clés locales dans l'ordre d'application des rounds
+    :param tables: tables précalculées (compile_sbox_tables)
+    :return: Le bloc de 64 bits transformé.
+    """
+    t0, t1, t2, t3 = tables
+    right = block & 0xFFFFFFFF
+    left = block >> 32
+    for i in range(31):
+        x = (right + round_keys[i]) & 0xFFFFFFFF
+        left, right = right, left ^ (t0[x & 0xFF] | t1[x >> 8 & 0xFF] | t2[x >> 16 & 0xFF] | t3[x >> 24])
+    x = (right + round_keys[31]) & 0xFFFFFFFF  # le dernier round se fait sans swap
+    return (left ^ (t0[x & 0xFF] | t1[x >> 8 & 0xFF] | t2[x >> 16 & 0xFF] | t3[x >> 24])) << 32 | right
+
+
+def encrypt_block(block, key_array, tables=None):
     """
     Cette fonction permet de chiffrer un bloc de 64 bits suivant la méthode GOST.
     :param block: bloc de 64 bits à chiffrer
     :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables). Si None, on utilise le chemin de référence.
     :return: Le bloc de 64 bits chiffré.
     """
+    if tables is not None:
+        return apply_rounds(block, key_array, tables)
+
     block_encrypted = feistel(block, key_array[0], swap=True)
     for i in range(1, 31):
         block_encrypted = feistel(block_encrypted, key_array[i], swap=True)
@@ -46,91 +75,263 @@ def encrypt_block(block, key_array):
     return block_encrypted
 
 
-def encryptECB(blocks, key_array):
+def _allocate_blocks(blocks, size):
     """
-    Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits suivant le mode d'opération ECB.
-    :param blocks: Liste de blocs à chiffrer.
+    Cette fonction alloue le conteneur de sortie d'un mode d'opération : une liste si les blocs
+    d'entrée sont une liste, un array('Q') compact (8 octets par bloc) sinon.
+    """
+    if isinstance(blocks, list):
+        return [0] * size
+    return array("Q", bytes(8 * size))
+
+
+def _check_output_size(dst, size):
+    if len(dst) < size:
+        raise ValueError("le buffer de sortie doit contenir au moins {} blocs".format(size))
+
+
+def encryptECB_into(src, dst, key_array, tables=None):
+    """
+    Cette fonction chiffre les blocs de src en mode ECB et écrit le résultat dans dst.
+    :param src: blocs à chiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) blocs
     :param key_array: liste ordonnée des 32 clés locales pour chaque round
-    :return: la liste de blocs chiffrés.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: le nombre de blocs écrits.
     """
-    encrypted_blocks = list()
+    _check_output_size(dst, len(src))
+    for i in range(len(src)):
+        dst[i] = encrypt_block(src[i], key_array, tables)
+    return len(src)
 
-    for block in blocks:  # on encrypt block par block
-        encrypted_blocks.append(encrypt_block(block, key_array))
 
-    return encrypted_blocks
+def encryptCBC_into(src, dst, key_array, tables=None, iv=None):
+    """
+    Cette fonction chiffre les blocs de src en mode CBC et écrit dans dst le vecteur initial
+    puis les blocs chiffrés.
+    :param src: blocs à chiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) + 1 blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :param iv: vecteur initial de 64 bits (aléatoire si None)
+    :return: le nombre de blocs écrits.
+    """
+    _check_output_size(dst, len(src) + 1)
+    previous = rdm_IV_generator() if iv is None else iv  # On génère un vecteur initial
+    dst[0] = previous
+    for i in range(len(src)):
+        previous = encrypt_block(previous ^ src[i], key_array, tables)
+        dst[i + 1] = previous
+    return len(src) + 1
 
 
-def encryptCBC(blocks, key_array):
+def encryptCTR_into(src, dst, key_array, tables=None, iv=None):
     """
-    Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits suivant le mode d'opération CBC.
-    :param blocks: Liste de blocs à chiffrer.
+    Cette fonction chiffre les blocs de src en mode CTR et écrit dans dst le vecteur initial
+    puis les blocs chiffrés.
+    :param src: blocs à chiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) + 1 blocs
     :param key_array: liste ordonnée des 32 clés locales pour chaque round
-    :return: la liste de blocs chiffrés avec le vecteur initial utilisé en première position.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :param iv: vecteur initial de 64 bits (aléatoire si None)
+    :return: le nombre de blocs écrits.
+    """
+    _check_output_size(dst, len(src) + 1)
+    iv = rdm_IV_generator() if iv is None else iv  # on génére le vecteur d'initialisation
+    dst[0] = iv
+    for ct in range(len(src)):
+        dst[ct + 1] = src[ct] ^ encrypt_block(iv ^ ct, key_array, tables)  # on xor le vecteur et le compteur
+    return len(src) + 1
+
+
+def encryptCFB_into(src, dst, key_array, tables=None, iv=None):
+    """
+    Cette fonction chiffre les blocs de src en mode CFB (gamma avec rétroaction) et écrit dans dst
+    le vecteur initial puis les blocs chiffrés : C_i = P_i ^ E(C_i-1), avec C_0 le vecteur initial.
+    :param src: blocs à chiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) + 1 blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :param iv: vecteur initial de 64 bits (aléatoire si None)
+    :return: le nombre de blocs écrits.
+    """
+    _check_output_size(dst, len(src) + 1)
+    previous = rdm_IV_generator() if iv is None else iv
+    dst[0] = previous
+    for i in range(len(src)):
+        previous = src[i] ^ encrypt_block(previous, key_array, tables)
+        dst[i + 1] = previous
+    return len(src) + 1
+
+
+def encryptOFB_into(src, dst, key_array, tables=None, iv=None):
+    """
+    Cette fonction chiffre les blocs de src en mode OFB et écrit dans dst le vecteur initial puis
+    les blocs chiffrés : le flux de clé (G_i = E(G_i-1), G_0 le vecteur initial) ne dépend pas des
+    données, le chiffrement et le déchiffrement sont donc identiques.
+    :param src: blocs à chiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) + 1 blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :param iv: vecteur initial de 64 bits (aléatoire si None)
+    :return: le nombre de blocs écrits.
+    """
+    _check_output_size(dst, len(src) + 1)
+    gamma = rdm_IV_generator() if iv is None else iv
+    dst[0] = gamma
+    for i in range(len(src)):
+        gamma = encrypt_block(gamma, key_array, tables)
+        dst[i + 1] = src[i] ^ gamma
+    return len(src) + 1
+
+
+def ofb_keystream(iv, key_array, count, tables=None):
+    """
+    Cette fonction calcule les count premiers blocs du flux de clé OFB.
+    :param iv: vecteur initial de 64 bits
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param count: nombre de blocs de flux de clé
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: array('Q') des blocs de flux de clé.
     """
-    encrypted_blocks = list()
-    iv = rdm_IV_generator()  # On génère un vecteur initial
-    encrypted_blocks.append(iv)
-    # On parcourt la liste de blocs à chiffrer en se basant sur sa taille
-    for i in range(len(blocks)):
-        operation_xor = encrypted_blocks[i] ^ blocks[i]
-        encrypted_block = encrypt_block(operation_xor, key_array)
-        encrypted_blocks.append(encrypted_block)
+    keystream = array("Q", bytes(8 * count))
+    gamma = iv
+    for i in range(count):
+        gamma = keystream[i] = encrypt_block(gamma, key_array, tables)
+    return keystream
+
+
+def encrypt_into(src, dst, key_array, operation_mode="ECB", tables=None, iv=None):
+    """
+    Cette fonction chiffre les blocs de src directement dans le buffer dst fourni par l'appelant,
+    sans liste ni copie intermédiaire. Hors ECB, le vecteur initial est écrit en dst[0].
+    :param src: blocs à chiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible (array('Q') ou memoryview de format 'Q')
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :param iv: vecteur initial de 64 bits hors ECB (aléatoire si None)
+    :return: le nombre de blocs écrits.
+    """
+    if operation_mode == "ECB":
+        return encryptECB_into(src, dst, key_array, tables)
+    elif operation_mode == "CBC":
+        return encryptCBC_into(src, dst, key_array, tables, iv)
+    elif operation_mode == "CTR":
+        return encryptCTR_into(src, dst, key_array, tables, iv)
+    elif operation_mode == "CFB":
+        return encryptCFB_into(src, dst, key_array, tables, iv)
+    elif operation_mode == "OFB":
+        return encryptOFB_into(src, dst, key_array, tables, iv)
+    raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
 
+
+def encryptECB(blocks, key_array, tables=None):
+    """
+    Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits suivant le mode d'opération ECB.
+    :param blocks: Liste de blocs à chiffrer (ou array('Q') / memoryview de format 'Q').
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs chiffrés (un array('Q') si blocks n'est pas une liste).
+    """
+    encrypted_blocks = _allocate_blocks(blocks, len(blocks))
+    encryptECB_into(blocks, encrypted_blocks, key_array, tables)
     return encrypted_blocks
 
 
-def CTR_thread(iv, ct, block, key_array, encrypted_blocks):
-    ct_xor_iv = iv ^ ct  # on xor le vecteur d'initialisation et le compteur
-    encrypted_counter = encrypt_block(ct_xor_iv, key_array)
-    operation_xor = block ^ encrypted_counter
-    encrypted_blocks.append(operation_xor)
+def encryptCBC(blocks, key_array, tables=None):
+    """
+    Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits suivant le mode d'opération CBC.
+    :param blocks: Liste de blocs à chiffrer (ou array('Q') / memoryview de format 'Q').
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs chiffrés avec le vecteur initial utilisé en première position
+        (un array('Q') si blocks n'est pas une liste).
+    """
+    encrypted_blocks = _allocate_blocks(blocks, len(blocks) + 1)
+    encryptCBC_into(blocks, encrypted_blocks, key_array, tables)
+    return encrypted_blocks
 
 
-def encryptCTR(blocks, key_array):
+def encryptCTR(blocks, key_array, tables=None):
     """
     Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits
     suivant le mode d'opération CTR.
-    :param blocks: Liste de blocs à chiffrer.
+    Pour un chiffrement parallèle sur plusieurs processus, voir gost_parallel.ParallelEngine.
+    :param blocks: Liste de blocs à chiffrer (ou array('Q') / memoryview de format 'Q').
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs chiffrés (un array('Q') si blocks n'est pas une liste).
+    """
+    encrypted_blocks = _allocate_blocks(blocks, len(blocks) + 1)
+    encryptCTR_into(blocks, encrypted_blocks, key_array, tables)
+    return encrypted_blocks
+
+
+def encryptCFB(blocks, key_array, tables=None):
+    """
+    Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits
+    suivant le mode d'opération CFB.
+    :param blocks: Liste de blocs à chiffrer (ou array('Q') / memoryview de format 'Q').
     :param key_array: liste ordonnée des 32 clés locales pour chaque round
-    :return: la liste de blocs chiffrés.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs chiffrés avec le vecteur initial utilisé en première position
+        (un array('Q') si blocks n'est pas une liste).
     """
-    encrypted_blocks = list()
-    iv = rdm_IV_generator()  # on génére le vecteur d'initialisation
-    encrypted_blocks.append(iv)
-    ct = 0  # le compteur
-    for block in blocks:  # pour chaque block on crée un thread
-        thread = threading.Thread(target=CTR_thread, args=(iv, ct, block, key_array, encrypted_blocks,))
-        thread.start()
-        ct += 1
+    encrypted_blocks = _allocate_blocks(blocks, len(blocks) + 1)
+    encryptCFB_into(blocks, encrypted_blocks, key_array, tables)
+    return encrypted_blocks
+
 
+def encryptOFB(blocks, key_array, tables=None):
+    """
+    Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits
+    suivant le mode d'opération OFB.
+    :param blocks: Liste de blocs à chiffrer (ou array('Q') / memoryview de format 'Q').
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs chiffrés avec le vecteur initial utilisé en première position
+        (un array('Q') si blocks n'est pas une liste).
+    """
+    encrypted_blocks = _allocate_blocks(blocks, len(blocks) + 1)
+    encryptOFB_into(blocks, encrypted_blocks, key_array, tables)
     return encrypted_blocks
 
 
-def encrypt(blocks, key_array, operation_mode="ECB"):
+def encrypt(blocks, key_array, operation_mode="ECB", tables=None):
     """
     Cette fonction applique le chiffrement GOST à une liste de blocs de 64 bits.
     :param blocks: Liste de blocs à chiffrer.
     :param key_array: liste ordonnée des 32 clés locales pour chaque round
-    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC" ou "CTR")
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
     :return: la liste de blocs chiffrés avec le vecteur initial utilisé en première position.
     """
     if operation_mode == "ECB":
-        return encryptECB(blocks, key_array)
+        return encryptECB(blocks, key_array, tables)
     elif operation_mode == "CBC":
-        return encryptCBC(blocks, key_array)
+        return encryptCBC(blocks, key_array, tables)
     elif operation_mode == "CTR":
-        return encryptCTR(blocks, key_array)
+        return encryptCTR(blocks, key_array, tables)
+    elif operation_mode == "CFB":
+        return encryptCFB(blocks, key_array, tables)
+    elif operation_mode == "OFB":
+        return encryptOFB(blocks, key_array, tables)
+    raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
 
 
-def decrypt_block(block, key_array):
+def decrypt_block(block, key_array, tables=None):
     """
     Cette fonction permet de déchiffrer un bloc de 64 bits qui a été chiffré préalablement
      suivant la méthode GOST.
     :param block: bloc de 64 bits à chiffrer
     :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables). Si None, on utilise le chemin de référence.
     :return: Le bloc de 64 bits déchiffré.
     """
+    if tables is not None:
+        return apply_rounds(block, key_array[::-1], tables)  # on inverse l'ordre des rounds
+
     block_decrypted = feistel(block, key_array[31], swap=True)
     for i in range(30, 0, -1):  # on inverse l'ordre des rounds
         block_decrypted = feistel(block_decrypted, key_array[i], swap=True)
@@ -139,91 +340,232 @@ def decrypt_block(block, key_array):
     return block_decrypted
 
 
-def decryptECB(blocks, key_array):
+def decryptECB_into(src, dst, key_array, tables=None):
+    """
+    Cette fonction déchiffre les blocs de src en mode ECB et écrit le résultat dans dst.
+    :param src: blocs à déchiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: le nombre de blocs écrits.
+    """
+    _check_output_size(dst, len(src))
+    if tables is not None:  # on inverse l'ordre des rounds une seule fois
+        decrypt_keys = key_array[::-1]
+        for i in range(len(src)):
+            dst[i] = apply_rounds(src[i], decrypt_keys, tables)
+    else:
+        for i in range(len(src)):
+            dst[i] = decrypt_block(src[i], key_array)
+    return len(src)
+
+
+def decryptCBC_into(src, dst, key_array, tables=None):
+    """
+    Cette fonction déchiffre en mode CBC les blocs de src (vecteur initial en src[0]) et écrit
+    les blocs déchiffrés dans dst, sans copier src.
+    :param src: blocs à déchiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) - 1 blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: le nombre de blocs écrits.
+    """
+    n_blocks = max(0, len(src) - 1)
+    _check_output_size(dst, n_blocks)
+    if tables is not None:  # on inverse l'ordre des rounds une seule fois
+        decrypt_keys = key_array[::-1]
+        for i in range(n_blocks):
+            dst[i] = apply_rounds(src[i + 1], decrypt_keys, tables) ^ src[i]
+    else:
+        for i in range(n_blocks):
+            dst[i] = decrypt_block(src[i + 1], key_array) ^ src[i]
+    return n_blocks
+
+
+def decryptCTR_into(src, dst, key_array, tables=None):
+    """
+    Cette fonction déchiffre en mode CTR les blocs de src (vecteur initial en src[0]) et écrit
+    les blocs déchiffrés dans dst, sans copier src.
+    :param src: blocs à déchiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) - 1 blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: le nombre de blocs écrits.
+    """
+    n_blocks = max(0, len(src) - 1)
+    _check_output_size(dst, n_blocks)
+    if n_blocks:
+        iv = src[0]
+    for ct in range(n_blocks):
+        dst[ct] = src[ct + 1] ^ encrypt_block(iv ^ ct, key_array, tables)  # on xor le vecteur et le compteur
+    return n_blocks
+
+
+def decryptCFB_into(src, dst, key_array, tables=None):
+    """
+    Cette fonction déchiffre en mode CFB les blocs de src (vecteur initial en src[0]) et écrit
+    les blocs déchiffrés dans dst. Chaque bloc ne dépend que du bloc chiffré précédent : le
+    déchiffrement est parallélisable (voir engines.decrypt et gost_parallel).
+    :param src: blocs à déchiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) - 1 blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: le nombre de blocs écrits.
+    """
+    n_blocks = max(0, len(src) - 1)
+    _check_output_size(dst, n_blocks)
+    for i in range(n_blocks):
+        dst[i] = src[i + 1] ^ encrypt_block(src[i], key_array, tables)
+    return n_blocks
+
+
+def decryptOFB_into(src, dst, key_array, tables=None):
+    """
+    Cette fonction déchiffre en mode OFB les blocs de src (vecteur initial en src[0]) et écrit
+    les blocs déchiffrés dans dst.
+    :param src: blocs à déchiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible d'au moins len(src) - 1 blocs
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: le nombre de blocs écrits.
+    """
+    n_blocks = max(0, len(src) - 1)
+    _check_output_size(dst, n_blocks)
+    if n_blocks:
+        keystream = ofb_keystream(src[0], key_array, n_blocks, tables)
+        for i in range(n_blocks):
+            dst[i] = src[i + 1] ^ keystream[i]
+    return n_blocks
+
+
+def decrypt_into(src, dst, key_array, operation_mode="ECB", tables=None):
+    """
+    Cette fonction déchiffre les blocs de src directement dans le buffer dst fourni par l'appelant,
+    sans liste ni copie intermédiaire. Hors ECB, src[0] est le vecteur initial.
+    :param src: blocs à déchiffrer (liste, array('Q') ou memoryview de format 'Q')
+    :param dst: buffer de sortie inscriptible (array('Q') ou memoryview de format 'Q')
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: le nombre de blocs écrits.
+    """
+    if operation_mode == "ECB":
+        return decryptECB_into(src, dst, key_array, tables)
+    elif operation_mode == "CBC":
+        return decryptCBC_into(src, dst, key_array, tables)
+    elif operation_mode == "CTR":
+        return decryptCTR_into(src, dst, key_array, tables)
+    elif operation_mode == "CFB":
+        return decryptCFB_into(src, dst, key_array, tables)
+    elif operation_mode == "OFB":
+        return decryptOFB_into(src, dst, key_array, tables)
+    raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
+
+
+def decryptECB(blocks, key_array, tables=None):
     """
     Cette fonction dé-chiffre une liste de blocs de 64 bits qui a été préalablement chiffrée
     avec la méthode GOST suivant le mode d'opération ECB.
-    :param blocks: Liste de blocs à déchiffrer.
+    :param blocks: Liste de blocs à déchiffrer (ou array('Q') / memoryview de format 'Q').
     :param key_array: liste ordonnée des 32 clés locales pour chaque round.
     Identique à celle utilisée pour le chiffrement.
-    :return: la liste de blocs déchiffrés.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs déchiffrés (un array('Q') si blocks n'est pas une liste).
     """
-    decrypted_blocks = list()
+    decrypted_blocks = _allocate_blocks(blocks, len(blocks))
+    decryptECB_into(blocks, decrypted_blocks, key_array, tables)
+    return decrypted_blocks
 
-    for block in blocks:
-        decrypted_blocks.append(decrypt_block(block, key_array))
 
+def decryptCBC(blocks, key_array, tables=None):
+    """
+    Cette fonction dé-chiffre une liste de blocs de 64 bits qui a été préalablement chiffrée
+    avec la méthode GOST suivant le mode d'opération CBC.
+    :param blocks: Liste de blocs à déchiffrer (ou array('Q') / memoryview de format 'Q').
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round.
+    Identique à celle utilisée pour le chiffrement.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs déchiffrés (un array('Q') si blocks n'est pas une liste).
+    """
+    decrypted_blocks = _allocate_blocks(blocks, max(0, len(blocks) - 1))
+    decryptCBC_into(blocks, decrypted_blocks, key_array, tables)
     return decrypted_blocks
 
 
-def decryptCBC(blocks, key_array):
+def decryptCTR(blocks, key_array, tables=None):
     """
     Cette fonction dé-chiffre une liste de blocs de 64 bits qui a été préalablement chiffrée
-    avec la méthode GOST suivant le mode d'opération CBC.
-    :param blocks: Liste de blocs à déchiffrer.
+    avec la méthode GOST suivant le mode d'opération CTR.
+    :param blocks: Liste de blocs à déchiffrer (ou array('Q') / memoryview de format 'Q').
     :param key_array: liste ordonnée des 32 clés locales pour chaque round.
     Identique à celle utilisée pour le chiffrement.
-    :return: la liste de blocs déchiffrés.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs déchiffrés (un array('Q') si blocks n'est pas une liste).
     """
-    decrypted_blocks = list()
-    blocks_mod = blocks[1:]  # liste des blocks sans le vecteur d'initialisation
-    for i in range(len(blocks_mod)):
-        decrypted_block = decrypt_block(blocks_mod[i], key_array)
-        operation_xor = decrypted_block ^ blocks[i]
-        decrypted_blocks.append(operation_xor)
+    decrypted_blocks = _allocate_blocks(blocks, max(0, len(blocks) - 1))
+    decryptCTR_into(blocks, decrypted_blocks, key_array, tables)
+    return decrypted_blocks
+
 
+def decryptCFB(blocks, key_array, tables=None):
+    """
+    Cette fonction dé-chiffre une liste de blocs de 64 bits qui a été préalablement chiffrée
+    avec la méthode GOST suivant le mode d'opération CFB.
+    :param blocks: Liste de blocs à déchiffrer (ou array('Q') / memoryview de format 'Q').
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round.
+    Identique à celle utilisée pour le chiffrement.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs déchiffrés (un array('Q') si blocks n'est pas une liste).
+    """
+    decrypted_blocks = _allocate_blocks(blocks, max(0, len(blocks) - 1))
+    decryptCFB_into(blocks, decrypted_blocks, key_array, tables)
     return decrypted_blocks
 
 
-def decryptCTR(blocks, key_array):
+def decryptOFB(blocks, key_array, tables=None):
     """
     Cette fonction dé-chiffre une liste de blocs de 64 bits qui a été préalablement chiffrée
-    avec la méthode GOST suivant le mode d'opération CTR.
-    :param blocks: Liste de blocs à déchiffrer.
+    avec la méthode GOST suivant le mode d'opération OFB.
+    :param blocks: Liste de blocs à déchiffrer (ou array('Q') / memoryview de format 'Q').
     :param key_array: liste ordonnée des 32 clés locales pour chaque round.
     Identique à celle utilisée pour le chiffrement.
-    :return: la liste de blocs déchiffrés.
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
+    :return: la liste de blocs déchiffrés (un array('Q') si blocks n'est pas une liste).
     """
-    decrypted_blocks = list()
-    iv = blocks[0]
-    blocks_mod = blocks[1:]  # liste des blocks sans le vecteur d'initialisation
-    ct = 0
-    for i in range(len(blocks_mod)):
-        ct_xor_iv = iv ^ ct  # on xor le vecteur d'initialisation et le compteur
-        decrypted_counter = encrypt_block(ct_xor_iv, key_array)
-        operation_xor = blocks_mod[i] ^ decrypted_counter
-        decrypted_blocks.append(operation_xor)
-        ct += 1
+    decrypted_blocks = _allocate_blocks(blocks, max(0, len(blocks) - 1))
+    decryptOFB_into(blocks, decrypted_blocks, key_array, tables)
     return decrypted_blocks
 
 
-def decrypt(blocks, key_array, operation_mode="ECB"):
+def decrypt(blocks, key_array, operation_mode="ECB", tables=None):
     """
     Cette fonction dé-chiffre une liste de blocs de 64 bits qui a été préalablement chiffrée
     avec la méthode GOST suivant le mode d'opération CBC ou ECB.
     :param blocks: Liste de blocs à déchiffrer.
     :param key_array: liste ordonnée des 32 clés locales pour chaque round.
     Identique à celle utilisée pour le chiffrement.
-    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC" ou "CTR")
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param tables: tables précalculées (compile_sbox_tables) ou None pour le chemin de référence.
     :return: la liste de blocs déchiffrés.
     """
     if operation_mode == "ECB":
-        return decryptECB(blocks, key_array)
+        return decryptECB(blocks, key_array, tables)
     elif operation_mode == "CBC":
-        return decryptCBC(blocks, key_array)
+        return decryptCBC(blocks, key_array, tables)
     elif operation_mode == "CTR":
-        return decryptCTR(blocks, key_array)
+        return decryptCTR(blocks, key_array, tables)
+    elif operation_mode == "CFB":
+        return decryptCFB(blocks, key_array, tables)
+    elif operation_mode == "OFB":
+        return decryptOFB(blocks, key_array, tables)
+    raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
 
 
-def encrypt_file(input_filename, output_filename, operation_mode="ECB", simple_key=True):
+def generate_key_array(simple_key=True):
     """
-    Cette fonction chiffre un fichier avec la méthode GOST suivant le mode d'opération CBC ou ECB.
-    Les fonctions de lecture du fichier fournies dans utilities.py peuvent être utiles
-    :param input_filename: Nom du fichier à chiffrer
-    :param output_filename: Nom du fichier chiffré
-    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC" ou "CTR")
+    Cette fonction génère une clé aléatoire et retourne la liste des clés de rounds correspondante.
     :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé(voir énoncé)
-    :return: La clé utilisée pour le chiffrement.
+    :return: Liste ordonnée de 32 clés locales utilisées pour chacun des rounds.
     """
     key_256 = rdm_key_generator()  # on génère une clé aléatoire
     mask = 2 ** 128 - 1
@@ -233,18 +575,49 @@ def encrypt_file(input_filename, output_filename, operation_mode="ECB", simple_k
     else:
         key_array = gost_advanced_key_generator(key_128)  # clé avancé
 
-    txt = load_txt_file(input_filename)  # on lit le fichier
-    blocks = bytearray_to_64bits_block(txt.encode())  # on convertit le fichier en liste de blocs de 64 bits
+    return key_array
 
-    encrypted_blocks = encrypt(blocks, key_array, operation_mode)  # on chiffre le fichier
-    encrypted_bin = _64bits_block_to_bytearray(encrypted_blocks)  # on convertit la liste de blocs en bytes
 
-    save_to_bin(output_filename, encrypted_bin)  # on écrit le fichier chiffré
+def encrypt_file(input_filename, output_filename, operation_mode="ECB", simple_key=True, metrics=None, mac=False):
+    """
+    Cette fonction chiffre un fichier avec la méthode GOST suivant le mode d'opération CBC ou ECB.
+    Les fonctions de lecture du fichier fournies dans utilities.py peuvent être utiles
+    :param input_filename: Nom du fichier à chiffrer
+    :param output_filename: Nom du fichier chiffré
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé(voir énoncé)
+    :param metrics: instrumentation.Metrics recevant les mesures de chaque étape (désactivé si None)
+    :param mac: ajoute en fin de fichier le code d'authentification (gost_mac) du texte clair
+    :return: La clé utilisée pour le chiffrement.
+    """
+    metrics = metrics or NULL_METRICS
+    key_array = generate_key_array(simple_key)
+
+    with metrics.stage("load") as stage:
+        txt = load_txt_file(input_filename)  # on lit le fichier
+        data = txt.encode()
+        stage.bytes = len(data)
+    with metrics.stage("to_blocks", len(data)):
+        blocks = bytes_to_blocks(data, PADDING_ZERO)  # on convertit le fichier en blocs de 64 bits
+
+    with metrics.stage("cipher", 8 * len(blocks)):
+        encrypted_blocks = encrypt(blocks, key_array, operation_mode)  # on chiffre le fichier
+        if mac:
+            authenticator = GostMAC(key_array)
+            authenticator.update_blocks(blocks)  # calculé sur les blocs déjà en mémoire
+    count_blocks(metrics, len(blocks))  # blocs de données, sans le vecteur initial
+    with metrics.stage("to_bytes", 8 * len(encrypted_blocks)):
+        encrypted_bin = blocks_to_bytes(encrypted_blocks)  # on convertit la liste de blocs en bytes
+        if mac:
+            encrypted_bin += authenticator.digest()
+
+    with metrics.stage("save", len(encrypted_bin)):
+        save_to_bin(output_filename, encrypted_bin)  # on écrit le fichier chiffré
 
     return key_array  # on retourne la clé utilisée pour le chiffrement
 
 
-def decrypt_file(input_filename, output_filename, key, operation_mode="ECB"):
+def decrypt_file(input_filename, output_filename, key, operation_mode="ECB", metrics=None, mac=False):
     """
     Cette fonction dé-chiffre un fichier qui a été préalablement chiffré
     avec la méthode GOST suivant le mode d'opération CBC ou ECB.
@@ -253,12 +626,38 @@ def decrypt_file(input_filename, output_filename, key, operation_mode="ECB"):
     :param input_filename: le nom du fichier chiffré.
     :param output_filename: le nom du fichier déchiffré
     :param key: La clé de 64 bits utilisée pour chiffrer le fichier.
-    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC" ou "CTR")
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param metrics: instrumentation.Metrics recevant les mesures de chaque étape (désactivé si None)
+    :param mac: vérifie le code d'authentification écrit par encrypt_file(..., mac=True). Une ValueError est
+        levée, sans écrire le fichier déchiffré, si les données ont été modifiées.
     """
-    binary = load_from_bin(input_filename)  # on charge le fichier
-    blocks = bytearray_to_64bits_block(binary)  # on convertit le fichier en liste de blocs de 64 bits
-
-    decrypted_blocks = decrypt(blocks, key, operation_mode)  # on déchiffre le fichier
-    decrypted_bin = _64bits_block_to_bytearray(decrypted_blocks)  # on convertit la liste de blocs en bytes
-
-    save_txt_file(output_filename, decrypted_bin.decode())  # on écrit le fichier déchiffré
+    metrics = metrics or NULL_METRICS
+
+    with metrics.stage("load") as stage:
+        binary = load_from_bin(input_filename)  # on charge le fichier
+        stage.bytes = len(binary)
+    if mac:
+        binary, tag = binary[:-MAC_SIZE], binary[-MAC_SIZE:]
+    with metrics.stage("to_blocks", len(binary)):
+        blocks = bytes_to_blocks(binary)  # on convertit le fichier en blocs de 64 bits
+
+    with metrics.stage("cipher", 8 * len(blocks)):
+        decrypted_blocks = decrypt(blocks, key, operation_mode)  # on déchiffre le fichier
+        if mac:
+            authenticator = GostMAC(key)
+            authenticator.update_blocks(decrypted_blocks)
+            if len(tag) != MAC_SIZE or not authenticator.verify(tag):
+                raise ValueError("code d'authentification invalide : le fichier a été modifié")
+    count_blocks(metrics, len(decrypted_blocks))
+    with metrics.stage("to_bytes", 8 * len(decrypted_blocks)):
+        decrypted_bin = blocks_to_bytes(decrypted_blocks)  # on convertit la liste de blocs en bytes
+
+    with metrics.stage("save", len(decrypted_bin)):
+        save_txt_file(output_filename, decrypted_bin.decode())  # on écrit le fichier déchiffré
+
+
+if __name__ == "__main__":
+    import sys
+
+    import gost_cli
+    sys.exit(gost_cli.main())
@@ -0,0 +1,180 @@
+"""
+Ce fichier comprend une API asyncio pour le chiffrement GOST. Le travail de chiffrement est
+exécuté dans un exécuteur configurable (pool de threads par défaut, ou pool de processus)
+et les lectures/écritures de fichiers se font par morceaux dans des threads, sans bloquer la
+boucle d'événements. Un sémaphore limite le nombre de requêtes traitées simultanément : des
+centaines de requêtes concurrentes se partagent ainsi un pool de taille fixe.
+
+Les fichiers sont traités comme des octets bruts au format de gost_stream.
+"""
+import asyncio
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import engines
+from gost import generate_key_array
+from gost_stream import DEFAULT_CHUNK_SIZE, StreamEncryptor, StreamDecryptor
+
+"""
+Nombre maximal de requêtes traitées simultanément par défaut.
+"""
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+def _update(cipher, data):
+    """
+    Cette fonction est exécutée dans l'exécuteur. Le chiffreur est retourné avec le résultat
+    pour que son état soit conservé même lorsqu'il a été envoyé à un autre processus.
+    """
+    return cipher, cipher.update(data)
+
+
+def _finalize(cipher):
+    return cipher, cipher.finalize()
+
+
+class AsyncGost:
+    """
+    Point d'entrée asyncio : encrypt, decrypt, encrypt_file et decrypt_file sont des coroutines.
+    """
+
+    def __init__(self, executor=None, max_concurrency=DEFAULT_MAX_CONCURRENCY, chunk_size=DEFAULT_CHUNK_SIZE,
+                 engine="table"):
+        """
+        :param executor: exécuteur du travail de chiffrement (ThreadPoolExecutor partagé si None)
+        :param max_concurrency: nombre maximal de requêtes traitées simultanément
+        :param chunk_size: taille des morceaux lus dans les fichiers (multiple de 8)
+        :param engine: nom du moteur utilisé (voir engines.py)
+        """
+        if chunk_size <= 0 or chunk_size % 8 != 0:
+            raise ValueError("chunk_size doit être un multiple positif de 8")
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4))
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self._semaphores = weakref.WeakKeyDictionary()  # un sémaphore par boucle d'événements
+
+    def close(self):
+        """
+        Cette fonction arrête l'exécuteur s'il a été créé par cet objet.
+        """
+        if self._own_executor:
+            self.executor.shutdown()
+
+    @property
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def encrypt(self, blocks, key_array, operation_mode="ECB"):
+        """
+        :param blocks: Liste de blocs à chiffrer.
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :return: la liste de blocs chiffrés (voir gost.encrypt).
+        """
+        async with self._semaphore:
+            return await self._run(engines.encrypt, blocks, key_array, operation_mode, self.engine)
+
+    async def decrypt(self, blocks, key_array, operation_mode="ECB"):
+        """
+        :param blocks: Liste de blocs à déchiffrer.
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :return: la liste de blocs déchiffrés (voir gost.decrypt).
+        """
+        async with self._semaphore:
+            return await self._run(engines.decrypt, blocks, key_array, operation_mode, self.engine)
+
+    async def _process_file(self, input_filename, output_filename, cipher):
+        loop = asyncio.get_running_loop()
+        source = await loop.run_in_executor(None, open, input_filename, "rb")
+        try:
+            destination = await loop.run_in_executor(None, open, output_filename, "wb")
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(None, source.read, self.chunk_size)
+                    if not chunk:
+                        break
+                    cipher, output = await self._run(_update, cipher, chunk)
+                    await loop.run_in_executor(None, destination.write, output)
+                cipher, output = await self._run(_finalize, cipher)
+                await loop.run_in_executor(None, destination.write, output)
+            finally:
+                await loop.run_in_executor(None, destination.close)
+        finally:
+            await loop.run_in_executor(None, source.close)
+
+    async def encrypt_file(self, input_filename, output_filename, operation_mode="ECB", simple_key=True,
+                           key_array=None):
+        """
+        :param input_filename: Nom du fichier à chiffrer
+        :param output_filename: Nom du fichier chiffré
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+        :param key_array: liste des 32 clés de rounds à utiliser (générée aléatoirement si None)
+        :return: La clé utilisée pour le chiffrement.
+        """
+        if key_array is None:
+            key_array = generate_key_array(simple_key)
+        async with self._semaphore:
+            await self._process_file(input_filename, output_filename,
+                                     StreamEncryptor(key_array, operation_mode, self.engine))
+        return key_array
+
+    async def decrypt_file(self, input_filename, output_filename, key, operation_mode="ECB"):
+        """
+        :param input_filename: le nom du fichier chiffré.
+        :param output_filename: le nom du fichier déchiffré
+        :param key: La liste des 32 clés de rounds utilisée pour chiffrer le fichier.
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        """
+        async with self._semaphore:
+            await self._process_file(input_filename, output_filename,
+                                     StreamDecryptor(key, operation_mode, self.engine))
+
+
+_default = None
+
+
+def _get_default():
+    global _default
+    if _default is None:
+        _default = AsyncGost()
+    return _default
+
+
+async def encrypt(blocks, key_array, operation_mode="ECB"):
+    """
+    Équivalent asynchrone de gost.encrypt (instance AsyncGost partagée).
+    """
+    return await _get_default().encrypt(blocks, key_array, operation_mode)
+
+
+async def decrypt(blocks, key_array, operation_mode="ECB"):
+    """
+    Équivalent asynchrone de gost.decrypt (instance AsyncGost partagée).
+    """
+    return await _get_default().decrypt(blocks, key_array, operation_mode)
+
+
+async def encrypt_file(input_filename, output_filename, operation_mode="ECB", simple_key=True, key_array=None):
+    """
+    Équivalent asynchrone de gost_stream.encrypt_file_stream (instance AsyncGost partagée).
+    """
+    return await _get_default().encrypt_file(input_filename, output_filename, operation_mode, simple_key, key_array)
+
+
+async def decrypt_file(input_filename, output_filename, key, operation_mode="ECB"):
+    """
+    Équivalent asynchrone de gost_stream.decrypt_file_stream (instance AsyncGost partagée).
+    """
+    await _get_default().decrypt_file(input_filename, output_filename, key, operation_mode)
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import gost_async
+from gost import decrypt
+from gost_async import AsyncGost
+from gost_stream import decrypt_file_stream
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = os.urandom(3000)
+        self.plain_name = os.path.join(self.directory.name, "plain.bin")
+        with open(self.plain_name, "wb") as file:
+            file.write(self.data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _read(self, name):
+        with open(name, "rb") as file:
+            return file.read()
+
+    def test_encrypt_decrypt(self):
+        async def scenario():
+            blocks = [1, 2, 3]
+            cypher = await gost_async.encrypt(blocks, self.keys, "CBC")
+            assert decrypt(cypher, self.keys, "CBC") == blocks
+            return await gost_async.decrypt(cypher, self.keys, "CBC")
+
+        assert asyncio.run(scenario()) == [1, 2, 3]
+
+    def test_concurrent_files(self):
+        async def scenario(client):
+            names = [os.path.join(self.directory.name, "cypher{}.bin".format(i)) for i in range(10)]
+            keys = await asyncio.gather(*(client.encrypt_file(self.plain_name, name, "CTR") for name in names))
+            results = [name + ".out" for name in names]
+            await asyncio.gather(*(client.decrypt_file(name, result, key_array, "CTR")
+                                   for name, result, key_array in zip(names, results, keys)))
+            return results
+
+        client = AsyncGost(max_concurrency=3, chunk_size=256)
+        try:
+            for result in asyncio.run(scenario(client)):
+                assert self._read(result) == self.data
+        finally:
+            client.close()
+
+    def test_process_executor(self):
+        cypher_name = os.path.join(self.directory.name, "cypher.bin")
+        result_name = os.path.join(self.directory.name, "result.bin")
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            client = AsyncGost(executor, chunk_size=512)
+            for mode in ("CBC", "OFB"):
+                keys = asyncio.run(client.encrypt_file(self.plain_name, cypher_name, mode))
+                decrypt_file_stream(cypher_name, result_name, keys, mode)
+                assert self._read(result_name) == self.data
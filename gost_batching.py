@@ -0,0 +1,325 @@
+"""
+Ce fichier comprend le chiffrement par micro-lots de nombreux petits messages (quelques dizaines
+d'octets). Les messages sont regroupés par clé : les blocs de tous les messages d'un groupe qui
+peuvent être traités indépendamment (ECB, compteurs CTR, déchiffrements CBC et CFB) sont chiffrés en
+une seule passe du moteur, puis redécoupés message par message. Les modes chaînés (chiffrements CBC
+et CFB, OFB) avancent en parallèle sur tous les messages : une passe du moteur par rang de bloc.
+
+Chaque message chiffré a le format de gost_stream : vecteur initial propre au message (hors ECB),
+remplissage PKCS7 en ECB et CBC, dernier bloc tronqué en CTR, CFB et OFB.
+
+BatchQueue regroupe automatiquement les messages soumis par plusieurs threads et traite le lot
+lorsqu'il atteint une taille donnée ou lorsque le plus ancien message a attendu max_delay secondes.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+import engines
+from gost_feistel_function import S_BOX_RFC
+from gost_stream import STREAM_MODES, KEYSTREAM_MODES
+from key_generator import rdm_IV_generator
+from utilities import bytes_to_blocks, blocks_to_bytes, PADDING_NONE, PADDING_PKCS7, PADDING_ZERO
+
+DEFAULT_MAX_ITEMS = 256
+DEFAULT_MAX_BYTES = 1 << 16
+DEFAULT_MAX_DELAY = 0.002
+
+
+class _Message:
+    """
+    Message en cours de traitement : mode, vecteur initial, blocs d'entrée et blocs de sortie.
+    """
+    __slots__ = ("mode", "iv", "blocks", "length", "output")
+
+    def __init__(self, mode, iv, blocks, length):
+        self.mode = mode
+        self.iv = iv
+        self.blocks = blocks
+        self.length = length
+        self.output = None
+
+
+def _parse(operation_mode, payload, encrypting):
+    if operation_mode not in STREAM_MODES:
+        raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
+    if encrypting:
+        padding = PADDING_ZERO if operation_mode in KEYSTREAM_MODES else PADDING_PKCS7
+        iv = None if operation_mode == "ECB" else rdm_IV_generator()
+        return _Message(operation_mode, iv, list(bytes_to_blocks(payload, padding)), len(payload))
+    iv = None
+    if operation_mode != "ECB":
+        if len(payload) < 8:
+            raise ValueError("message chiffré tronqué (vecteur initial incomplet)")
+        iv = int.from_bytes(payload[:8], "big")
+        payload = payload[8:]
+    if operation_mode not in KEYSTREAM_MODES and (not payload or len(payload) % 8):
+        raise ValueError("la taille d'un message chiffré en {} doit être un multiple non nul de 8".format(
+            operation_mode))
+    return _Message(operation_mode, iv, list(bytes_to_blocks(payload, PADDING_ZERO)), len(payload))
+
+
+def _serialize(message, encrypting):
+    if message.mode in KEYSTREAM_MODES:
+        data = blocks_to_bytes(message.output)[:message.length]
+    else:
+        data = blocks_to_bytes(message.output, PADDING_NONE if encrypting else PADDING_PKCS7)
+    if encrypting and message.iv is not None:
+        return message.iv.to_bytes(8, "big") + bytes(data)
+    return bytes(data)
+
+
+def _process_group(messages, key_array, engine, s_box, encrypting):
+    """
+    Cette fonction chiffre ou déchiffre les messages d'une même clé et remplit message.output.
+    """
+    forward, backward, single, chained = list(), list(), list(), list()
+    for message in messages:
+        mode, blocks = message.mode, message.blocks
+        if mode == "ECB":
+            target = forward if encrypting else backward
+            single.append((message, target, len(target)))
+            target.extend(blocks)
+        elif mode == "CTR":
+            single.append((message, forward, len(forward)))
+            forward.extend(message.iv ^ ct for ct in range(len(blocks)))
+        elif mode == "CBC" and not encrypting:
+            single.append((message, backward, len(backward)))
+            backward.extend(blocks)
+        elif mode == "CFB" and not encrypting and blocks:
+            single.append((message, forward, len(forward)))
+            forward.append(message.iv)
+            forward.extend(blocks[:-1])
+        else:
+            chained.append(message)
+
+    # une seule passe du moteur pour tous les blocs indépendants
+    results = {id(forward): engine.encrypt_blocks(forward, key_array, s_box) if forward else [],
+               id(backward): engine.decrypt_blocks(backward, key_array, s_box) if backward else []}
+    for message, target, offset in single:
+        processed = results[id(target)][offset:offset + len(message.blocks)]
+        if message.mode == "ECB":
+            message.output = list(processed)
+        elif message.mode == "CBC":
+            previous = [message.iv] + message.blocks[:-1]
+            message.output = [block ^ prev for block, prev in zip(processed, previous)]
+        else:  # CTR, ou déchiffrement CFB
+            message.output = [block ^ gamma for block, gamma in zip(message.blocks, processed)]
+
+    # modes chaînés : une passe du moteur par rang de bloc, sur tous les messages encore actifs
+    states = [message.iv for message in chained]
+    for message in chained:
+        message.output = list()
+    rank = 0
+    while True:
+        active = [index for index, message in enumerate(chained) if rank < len(message.blocks)]
+        if not active:
+            break
+        inputs = list()
+        for index in active:
+            message = chained[index]
+            state = states[index]
+            inputs.append(state ^ message.blocks[rank] if message.mode == "CBC" else state)
+        gammas = engine.encrypt_blocks(inputs, key_array, s_box)
+        for index, gamma in zip(active, gammas):
+            message = chained[index]
+            if message.mode == "CBC":
+                message.output.append(gamma)
+                states[index] = gamma
+            else:
+                block = message.blocks[rank] ^ gamma
+                message.output.append(block)
+                # CFB (chiffrement) chaîne sur le bloc chiffré, OFB sur le flux de clé
+                states[index] = block if message.mode == "CFB" else gamma
+        rank += 1
+
+
+def process_many(items, encrypting=True, engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction chiffre ou déchiffre une liste de messages en regroupant les passes du moteur.
+    Un message invalide n'empêche pas le traitement des autres : l'exception est rendue à sa place.
+    :param items: liste de tuples (key_array, mode d'opération, message en bytes)
+    :param encrypting: chiffre si True, déchiffre sinon
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: la liste des résultats (bytes ou ValueError), dans l'ordre des messages.
+    """
+    batch_engine = engines.get_engine(engine)
+    results = [None] * len(items)
+    groups = dict()
+    for index, (key_array, operation_mode, payload) in enumerate(items):
+        try:
+            message = _parse(operation_mode, payload, encrypting)
+        except ValueError as error:
+            results[index] = error
+            continue
+        group = groups.setdefault(tuple(key_array), (key_array, list()))
+        group[1].append((index, message))
+    for key_array, entries in groups.values():
+        _process_group([message for _, message in entries], key_array, batch_engine, s_box, encrypting)
+        for index, message in entries:
+            try:
+                results[index] = _serialize(message, encrypting)
+            except ValueError as error:  # remplissage invalide
+                results[index] = error
+    return results
+
+
+def _raise_errors(results):
+    for result in results:
+        if isinstance(result, ValueError):
+            raise result
+    return results
+
+
+def encrypt_many(items, engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction chiffre une liste de petits messages avec un vecteur initial propre à chacun.
+    :param items: liste de tuples (key_array, mode d'opération, message en bytes)
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: la liste des messages chiffrés (bytes), dans l'ordre des messages.
+    """
+    return _raise_errors(process_many(items, True, engine, s_box))
+
+
+def decrypt_many(items, engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction déchiffre une liste de messages produits par encrypt_many.
+    Une ValueError est levée si l'un des messages est invalide.
+    :param items: liste de tuples (key_array, mode d'opération, message chiffré en bytes)
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: la liste des messages déchiffrés (bytes), dans l'ordre des messages.
+    """
+    return _raise_errors(process_many(items, False, engine, s_box))
+
+
+class BatchQueue:
+    """
+    File de regroupement automatique. encrypt et decrypt rendent un concurrent.futures.Future ; un
+    thread traite les messages en attente dès que max_items messages ou max_bytes octets sont en
+    attente, ou que le plus ancien a attendu max_delay secondes.
+    """
+
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS, max_bytes=DEFAULT_MAX_BYTES, max_delay=DEFAULT_MAX_DELAY,
+                 engine="table", s_box=S_BOX_RFC):
+        """
+        :param max_items: nombre de messages déclenchant le traitement du lot
+        :param max_bytes: nombre d'octets en attente déclenchant le traitement du lot
+        :param max_delay: attente maximale (secondes) d'un message avant traitement
+        :param engine: nom du moteur utilisé
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        """
+        if max_items < 1:
+            raise ValueError("max_items doit être supérieur ou égal à 1")
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.engine = engine
+        self.s_box = s_box
+        self.batches = 0  # nombre de lots traités
+        self.messages = 0  # nombre de messages traités
+        self._pending = list()
+        self._pending_bytes = 0
+        self._deadline = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, name="gost-batch-queue", daemon=True)
+        self._thread.start()
+
+    def _submit(self, key_array, operation_mode, payload, encrypting):
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("la file de regroupement est fermée")
+            if not self._pending:
+                self._deadline = time.monotonic() + self.max_delay
+            self._pending.append((future, encrypting, (key_array, operation_mode, payload)))
+            self._pending_bytes += len(payload)
+            if len(self._pending) >= self.max_items or self._pending_bytes >= self.max_bytes:
+                self._deadline = 0  # traitement immédiat
+            self._condition.notify()
+        return future
+
+    def encrypt(self, key_array, operation_mode, payload):
+        """
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param payload: message à chiffrer (bytes)
+        :return: Future rendant le message chiffré.
+        """
+        return self._submit(key_array, operation_mode, payload, True)
+
+    def decrypt(self, key_array, operation_mode, payload):
+        """
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param payload: message chiffré (bytes)
+        :return: Future rendant le message déchiffré (ou levant ValueError s'il est invalide).
+        """
+        return self._submit(key_array, operation_mode, payload, False)
+
+    def flush(self):
+        """
+        Cette fonction demande le traitement immédiat des messages en attente.
+        """
+        with self._condition:
+            if self._pending:
+                self._deadline = 0
+                self._condition.notify()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pending)
+
+    def _take(self):
+        with self._condition:
+            while True:
+                if self._pending:
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        break
+                    self._condition.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+            pending, self._pending, self._pending_bytes = self._pending, list(), 0
+            return pending
+
+    def _worker(self):
+        while True:
+            pending = self._take()
+            if pending is None:
+                return
+            for encrypting in (True, False):
+                batch = [entry for entry in pending if entry[1] is encrypting]
+                if not batch:
+                    continue
+                try:
+                    results = process_many([item for _, _, item in batch], encrypting, self.engine, self.s_box)
+                except Exception as error:  # erreur inattendue : transmise à tous les messages du lot
+                    results = [error] * len(batch)
+                for (future, _, _), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            self.batches += 1
+            self.messages += len(pending)
+
+    def close(self):
+        """
+        Cette fonction traite les messages en attente puis arrête le thread de la file.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
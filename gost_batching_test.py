@@ -0,0 +1,73 @@
+import io
+import os
+import threading
+import unittest
+
+from gost_batching import *
+from gost_stream import decrypt_stream
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostBatching(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = [gost_key_generator(key), gost_key_generator(key ^ 1)]
+        self.items = [(self.keys[i % 2], mode, os.urandom(size))
+                      for i, (mode, size) in enumerate((mode, size) for mode in STREAM_MODES
+                                                       for size in (0, 1, 8, 16, 37, 200))]
+
+    def test_round_trip(self):
+        encrypted = encrypt_many(self.items)
+        decrypted = decrypt_many([(keys, mode, data) for (keys, mode, _), data in zip(self.items, encrypted)])
+        assert decrypted == [payload for _, _, payload in self.items]
+
+    def test_stream_format(self):
+        # chaque message chiffré se déchiffre avec gost_stream
+        for (keys, mode, payload), data in zip(self.items, encrypt_many(self.items)):
+            output = io.BytesIO()
+            decrypt_stream(io.BytesIO(data), output, keys, mode)
+            assert output.getvalue() == payload
+
+    def test_distinct_ivs(self):
+        encrypted = encrypt_many([(self.keys[0], "CTR", b"message")] * 2)
+        assert encrypted[0][:8] != encrypted[1][:8]
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            decrypt_many([(self.keys[0], "CBC", bytes(12))])
+        with self.assertRaises(ValueError):
+            encrypt_many([(self.keys[0], "XTS", b"data")])
+        results = process_many([(self.keys[0], "CBC", bytes(12)), (self.keys[0], "CTR", bytes(12))], False)
+        assert isinstance(results[0], ValueError) and len(results[1]) == 4
+
+    def test_queue(self):
+        encrypted = encrypt_many(self.items)
+        with BatchQueue(max_items=8, max_delay=0.05) as queue:
+            futures = list()
+
+            def submit(items):
+                for payload, keys, mode, data in items:
+                    futures.append((payload, queue.decrypt(keys, mode, data)))
+
+            messages = [(payload, keys, mode, data) for (keys, mode, payload), data in zip(self.items, encrypted)]
+            threads = [threading.Thread(target=submit, args=(messages[i::3],)) for i in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for payload, future in futures:
+                assert future.result(timeout=5) == payload
+        assert queue.messages == len(self.items)
+        assert queue.batches < len(self.items)
+
+    def test_queue_deadline(self):
+        with BatchQueue(max_items=1000, max_delay=0.01) as queue:
+            future = queue.encrypt(self.keys[0], "OFB", b"tiny")
+            assert len(future.result(timeout=5)) == 12
+            bad = queue.decrypt(self.keys[0], "ECB", bytes(3))
+            with self.assertRaises(ValueError):
+                bad.result(timeout=5)
+        with self.assertRaises(RuntimeError):
+            queue.encrypt(self.keys[0], "OFB", b"tiny")
@@ -0,0 +1,165 @@
+"""
+Ce fichier comprend un moteur GOST « bitslicé » en Python pur. Un lot de blocs est transposé
+pour que chaque position de bit devienne un entier Python (un plan de bits, un bit par bloc) :
+- les S-box sont évaluées comme des circuits booléens (forme normale algébrique calculée
+  à partir de la table de chaque S-box),
+- l'addition modulo 2^32 est une addition à propagation de retenue sur les plans,
+- la rotation de 11 bits n'est qu'une renumérotation des plans.
+Chaque opération Python traite ainsi tout le lot en une fois, sans NumPy.
+"""
+from gost_feistel_function import S_BOX_RFC
+
+"""
+Nombre de blocs traités par passe (largeur des plans de bits).
+"""
+DEFAULT_LANES = 4096
+
+_CIRCUITS_CACHE = {}
+
+
+def _anf(s_box_row, output_bit):
+    """
+    Cette fonction calcule la forme normale algébrique d'un bit de sortie d'une S-box de 4 bits
+    (transformée de Möbius).
+    :param s_box_row: table de la S-box (16 valeurs)
+    :param output_bit: indice du bit de sortie (0 = poids faible)
+    :return: liste des monômes (masques de 4 bits des entrées multipliées) dont le coefficient vaut 1.
+    """
+    coefficients = [(value >> output_bit) & 1 for value in s_box_row]
+    for i in range(4):
+        for x in range(16):
+            if x & (1 << i):
+                coefficients[x] ^= coefficients[x ^ (1 << i)]
+    return [monomial for monomial in range(16) if coefficients[monomial]]
+
+
+def compile_sbox_circuits(s_box=S_BOX_RFC):
+    """
+    Cette fonction construit les circuits booléens des 8 S-box (mis en cache par jeu de S-box).
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: liste de 8 listes (une par S-box) de 4 listes de monômes (une par bit de sortie).
+    """
+    cache_key = tuple(tuple(row) for row in s_box)
+    circuits = _CIRCUITS_CACHE.get(cache_key)
+    if circuits is None:
+        circuits = [[_anf(row, output_bit) for output_bit in range(4)] for row in s_box]
+        _CIRCUITS_CACHE[cache_key] = circuits
+    return circuits
+
+
+def transpose_in(blocks):
+    """
+    Cette fonction transpose une liste de blocs de 64 bits en 64 plans de bits.
+    :param blocks: liste de blocs de 64 bits
+    :return: liste de 64 entiers : le bit l du plan j est le bit j du bloc l.
+    """
+    rows = [format(block, "064b") for block in reversed(blocks)]  # le dernier bloc en poids fort
+    columns = list(zip(*rows))  # colonne 0 = bit 63 de chaque bloc
+    return [int("".join(columns[63 - j]), 2) for j in range(64)]
+
+
+def transpose_out(planes, n_blocks):
+    """
+    Cette fonction est l'inverse de transpose_in.
+    :param planes: liste de 64 plans de bits
+    :param n_blocks: nombre de blocs du lot
+    :return: liste de n_blocks blocs de 64 bits.
+    """
+    width = "0{}b".format(n_blocks)
+    rows = [format(planes[j], width) for j in range(63, -1, -1)]  # bit 63 en premier
+    blocks = [int("".join(column), 2) for column in zip(*rows)]  # dernier bloc en premier
+    blocks.reverse()
+    return blocks
+
+
+def _add_key(planes, key, ones):
+    """
+    Addition modulo 2^32 d'une clé de round (identique pour tous les blocs) à 32 plans de bits.
+    """
+    result = list()
+    carry = 0
+    for i in range(32):
+        x = planes[i]
+        if (key >> i) & 1:
+            result.append(x ^ carry ^ ones)
+            carry = x | carry
+        else:
+            result.append(x ^ carry)
+            carry = x & carry
+    return result
+
+
+def _feistel_function(planes, key, circuits, ones):
+    """
+    Fonction de Feistel du GOST sur 32 plans de bits : addition, S-box puis rotation de 11 bits.
+    :return: les 32 plans de bits du résultat.
+    """
+    added = _add_key(planes, key, ones)
+    output = [0] * 32
+    for s in range(8):
+        low = 28 - 4 * s  # la première S-box traite les 4 bits de poids fort
+        x0, x1, x2, x3 = added[low], added[low + 1], added[low + 2], added[low + 3]
+        x01 = x0 & x1
+        x23 = x2 & x3
+        monomials = (ones, x0, x1, x01, x2, x0 & x2, x1 & x2, x01 & x2,
+                     x3, x0 & x3, x1 & x3, x01 & x3, x23, x0 & x23, x1 & x23, x01 & x23)
+        for output_bit, anf in enumerate(circuits[s]):
+            value = 0
+            for monomial in anf:
+                value ^= monomials[monomial]
+            output[(low + output_bit + 11) % 32] = value  # rotation de 11 bits vers la gauche
+    return output
+
+
+def apply_rounds_bitsliced(planes, round_keys, circuits, n_blocks):
+    """
+    Cette fonction applique les 32 rounds du GOST sur 64 plans de bits.
+    :param planes: 64 plans de bits (transpose_in)
+    :param round_keys: liste des 32 clés locales dans l'ordre d'application des rounds
+    :param circuits: circuits des S-box (compile_sbox_circuits)
+    :param n_blocks: nombre de blocs du lot
+    :return: les 64 plans de bits transformés.
+    """
+    ones = (1 << n_blocks) - 1
+    right = planes[:32]
+    left = planes[32:]
+    for i in range(31):
+        f = _feistel_function(right, round_keys[i], circuits, ones)
+        left, right = right, [a ^ b for a, b in zip(left, f)]
+    f = _feistel_function(right, round_keys[31], circuits, ones)  # le dernier round se fait sans swap
+    return right + [a ^ b for a, b in zip(left, f)]
+
+
+def _process(blocks, round_keys, s_box, lanes):
+    circuits = compile_sbox_circuits(s_box)
+    blocks = list(blocks)
+    result = list()
+    for start in range(0, len(blocks), lanes):
+        batch = blocks[start:start + lanes]
+        planes = apply_rounds_bitsliced(transpose_in(batch), round_keys, circuits, len(batch))
+        result += transpose_out(planes, len(batch))
+    return result
+
+
+def encrypt_blocks(blocks, key_array, s_box=S_BOX_RFC, lanes=DEFAULT_LANES):
+    """
+    Cette fonction chiffre indépendamment chaque bloc (équivalent de gost.encryptECB).
+    :param blocks: liste de blocs à chiffrer
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :param lanes: nombre de blocs traités par passe
+    :return: la liste de blocs chiffrés.
+    """
+    return _process(blocks, key_array, s_box, lanes)
+
+
+def decrypt_blocks(blocks, key_array, s_box=S_BOX_RFC, lanes=DEFAULT_LANES):
+    """
+    Cette fonction déchiffre indépendamment chaque bloc (équivalent de gost.decryptECB).
+    :param blocks: liste de blocs à déchiffrer
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :param lanes: nombre de blocs traités par passe
+    :return: la liste de blocs déchiffrés.
+    """
+    return _process(blocks, key_array[::-1], s_box, lanes)
@@ -0,0 +1,52 @@
+import unittest
+from random import getrandbits
+
+import engines
+from gost import encrypt, decrypt, encrypt_block
+from gost_bitslice import *
+from gost_feistel_function import S_BOX_BANK, compile_sbox_tables
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestBitslice(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.blocks = [getrandbits(64) for _ in range(100)] + [0, 2 ** 64 - 1]
+
+    def test_transpose(self):
+        planes = transpose_in(self.blocks)
+        assert len(planes) == 64
+        assert (planes[0] >> 5) & 1 == self.blocks[5] & 1
+        assert transpose_out(planes, len(self.blocks)) == self.blocks
+
+    def test_anf(self):
+        circuits = compile_sbox_circuits(S_BOX_BANK)
+        for s, row in enumerate(S_BOX_BANK):
+            for x in range(16):
+                value = 0
+                for output_bit, anf in enumerate(circuits[s]):
+                    bit = 0
+                    for monomial in anf:
+                        bit ^= (x & monomial) == monomial
+                    value |= bit << output_bit
+                assert value == row[x]
+
+    def test_ecb(self):
+        assert encrypt_blocks(self.blocks, self.keys) == encrypt(self.blocks, self.keys)
+        assert decrypt_blocks(encrypt(self.blocks, self.keys), self.keys) == self.blocks
+
+    def test_lanes(self):
+        assert encrypt_blocks(self.blocks, self.keys, lanes=7) == encrypt(self.blocks, self.keys)
+
+    def test_sbox_bank(self):
+        tables = compile_sbox_tables(S_BOX_BANK)
+        expected = [encrypt_block(block, self.keys, tables) for block in self.blocks]
+        assert encrypt_blocks(self.blocks, self.keys, S_BOX_BANK) == expected
+
+    def test_engine_modes(self):
+        for mode in ("ECB", "CBC", "CTR"):
+            cypher = encrypt(self.blocks, self.keys, mode)
+            assert engines.decrypt(cypher, self.keys, mode, "bitslice") == self.blocks
@@ -0,0 +1,291 @@
+"""
+Ce fichier comprend le chiffrement en masse d'une arborescence de fichiers :
+
+- les fichiers sont répartis sur un pool de processus, les petits fichiers étant regroupés en lots
+  pour amortir le coût d'envoi des tâches ;
+- les gros fichiers sont chiffrés un par un au format gost_container, leurs morceaux étant répartis
+  sur les processus ;
+- un manifeste (chemin, taille, date de modification, empreinte SHA-256, fichier produit, identifiant
+  de clé, mode) permet d'ignorer, à l'exécution suivante, les fichiers qui n'ont pas changé. Il est
+  réécrit après chaque lot : une exécution interrompue reprend là où elle s'était arrêtée.
+
+Chaque fichier chiffré est un conteneur gost_container : il peut être déchiffré seul avec
+gost_container.decrypt_file_container, ou avec toute l'arborescence par decrypt_tree.
+"""
+import hashlib
+import json
+import os
+import stat
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gost_container import DEFAULT_CHUNK_SIZE, encrypt_file_container, decrypt_file_container
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+OUTPUT_SUFFIX = ".gost"
+
+"""
+Taille à partir de laquelle un fichier est découpé en morceaux traités en parallèle.
+"""
+DEFAULT_LARGE_FILE_SIZE = 16 << 20
+
+"""
+Taille et nombre maximal de fichiers d'un lot de petits fichiers.
+"""
+DEFAULT_BATCH_BYTES = 8 << 20
+DEFAULT_BATCH_FILES = 256
+
+_HASH_READ_SIZE = 1 << 20
+
+
+def key_fingerprint(key_array):
+    """
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :return: identifiant de clé (16 caractères hexadécimaux) enregistré dans le manifeste.
+    """
+    return hashlib.sha256(array("I", key_array).tobytes()).hexdigest()[:16]
+
+
+def file_hash(filename):
+    """
+    :return: l'empreinte SHA-256 (hexadécimale) du contenu du fichier.
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(_HASH_READ_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(filename):
+    """
+    :param filename: nom du manifeste
+    :return: dictionnaire {chemin relatif: entrée} (vide si le manifeste n'existe pas).
+    """
+    if not os.path.exists(filename):
+        return dict()
+    with open(filename, encoding="UTF-8") as file:
+        manifest = json.load(file)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError("version de manifeste non supportée : {}".format(manifest.get("version")))
+    return manifest["files"]
+
+
+def save_manifest(filename, files):
+    """
+    Cette fonction écrit le manifeste de manière atomique (fichier temporaire puis renommage).
+    """
+    temporary = filename + ".tmp"
+    with open(temporary, "w", encoding="UTF-8") as file:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, file, indent=1, sort_keys=True)
+    os.replace(temporary, filename)
+
+
+def _safe_join(directory, relative):
+    """
+    Cette fonction joint un chemin relatif lu dans le manifeste (non authentifié) au répertoire, en refusant
+    les chemins absolus et ceux qui sortent du répertoire.
+    :return: le chemin complet.
+    """
+    parts = relative.replace(os.sep, "/").split("/")
+    if not relative or os.path.isabs(relative) or ".." in parts:
+        raise ValueError("chemin invalide dans le manifeste : {}".format(relative))
+    path = os.path.join(directory, relative)
+    base = os.path.realpath(directory)
+    if os.path.commonpath([base, os.path.realpath(path)]) != base:
+        raise ValueError("chemin hors de l'arborescence dans le manifeste : {}".format(relative))
+    return path
+
+
+def _scan(directory, excluded_directory):
+    """
+    Les entrées qui ne sont pas des fichiers réguliers (liens symboliques, y compris cassés, tubes, ...)
+    sont ignorées.
+    :param excluded_directory: répertoire ignoré (répertoire de sortie placé dans l'arborescence)
+    :return: liste triée de (chemin relatif avec des "/", chemin complet, taille, date de modification en ns).
+    """
+    excluded_directory = os.path.realpath(excluded_directory)
+    files = list()
+    for root, directories, names in os.walk(directory):
+        directories[:] = sorted(name for name in directories
+                                if os.path.realpath(os.path.join(root, name)) != excluded_directory)
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            try:
+                status = os.lstat(path)
+            except FileNotFoundError:  # fichier supprimé pendant le parcours
+                continue
+            if not stat.S_ISREG(status.st_mode):
+                continue
+            files.append((os.path.relpath(path, directory).replace(os.sep, "/"), path, status.st_size,
+                          status.st_mtime_ns))
+    return files
+
+
+def _batches(tasks, batch_bytes, batch_files):
+    """
+    Cette fonction regroupe les tâches (dont le dernier élément est la taille du fichier) en lots.
+    """
+    batch, size = list(), 0
+    for task in tasks:
+        if batch and (size + task[-1] > batch_bytes or len(batch) >= batch_files):
+            yield batch
+            batch, size = list(), 0
+        batch.append(task)
+        size += task[-1]
+    if batch:
+        yield batch
+
+
+def _encrypt_one(relative, path, output_path, previous_hash, key_array, operation_mode, chunk_size, workers):
+    """
+    :return: (chemin relatif, empreinte, True si le fichier a été chiffré, False si son contenu est inchangé).
+    """
+    digest = file_hash(path)
+    if digest == previous_hash and os.path.exists(output_path):
+        return relative, digest, False  # fichier touché mais contenu identique
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    encrypt_file_container(path, output_path, operation_mode, key_array=key_array, chunk_size=chunk_size,
+                           workers=workers)
+    return relative, digest, True
+
+
+def _encrypt_batch(batch, key_array, operation_mode, chunk_size):
+    return [_encrypt_one(relative, path, output_path, previous_hash, key_array, operation_mode, chunk_size, None)
+            for relative, path, output_path, previous_hash, size in batch]
+
+
+def _decrypt_batch(batch, key_array):
+    for input_path, output_path, size in batch:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        decrypt_file_container(input_path, output_path, key_array)
+    return batch
+
+
+def _run_batches(executor, function, batches, args, on_result):
+    """
+    Cette fonction exécute function(lot, *args) sur chaque lot, dans le pool si executor n'est pas None,
+    et appelle on_result sur le résultat de chaque lot dès qu'il est disponible.
+    """
+    if executor is None:
+        for batch in batches:
+            on_result(function(batch, *args))
+        return
+    futures = [executor.submit(function, batch, *args) for batch in batches]
+    for future in as_completed(futures):
+        on_result(future.result())
+
+
+def encrypt_tree(source_directory, output_directory, key_array, operation_mode="CTR", manifest_filename=None,
+                 key_id=None, workers=None, large_file_size=DEFAULT_LARGE_FILE_SIZE, batch_bytes=DEFAULT_BATCH_BYTES,
+                 batch_files=DEFAULT_BATCH_FILES, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Cette fonction chiffre les fichiers nouveaux ou modifiés d'une arborescence.
+    Un fichier est ignoré si sa taille, sa date de modification, la clé et le mode sont ceux du manifeste ;
+    si seule sa date a changé, son empreinte est recalculée et il n'est rechiffré que si elle diffère.
+    :param source_directory: répertoire à chiffrer
+    :param output_directory: répertoire des fichiers chiffrés (même arborescence, suffixe .gost)
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param operation_mode: string spécifiant le mode d'opération des conteneurs ("ECB", "CBC" ou "CTR")
+    :param manifest_filename: nom du manifeste (output_directory/manifest.json par défaut)
+    :param key_id: identifiant de la clé enregistré dans le manifeste (empreinte de la clé par défaut)
+    :param workers: nombre de processus (par défaut, le nombre de cœurs ; 1 : processus courant uniquement)
+    :param large_file_size: taille à partir de laquelle un fichier est découpé en morceaux parallèles
+    :param batch_bytes: taille maximale d'un lot de petits fichiers
+    :param batch_files: nombre maximal de fichiers d'un lot
+    :param chunk_size: taille des morceaux des conteneurs
+    :return: dictionnaire {"encrypted", "unchanged", "skipped", "removed"} du nombre de fichiers de chaque cas
+    (les fichiers chiffrés des fichiers supprimés de la source sont supprimés).
+    """
+    workers = workers or os.cpu_count() or 1
+    manifest_filename = manifest_filename or os.path.join(output_directory, MANIFEST_NAME)
+    key_id = key_id or key_fingerprint(key_array)
+    previous_files = load_manifest(manifest_filename)
+    files = dict()  # manifeste en cours de construction
+    pending = dict()  # entrées des fichiers à traiter, complétées par leur empreinte
+    summary = {"encrypted": 0, "unchanged": 0, "skipped": 0, "removed": 0}
+    small_tasks, large_tasks = list(), list()
+
+    scanned = _scan(source_directory, output_directory)
+    for relative, path, size, mtime_ns in scanned:
+        output = relative + OUTPUT_SUFFIX
+        output_path = os.path.join(output_directory, output)
+        previous = previous_files.get(relative)
+        same_key = previous is not None and previous["key_id"] == key_id and previous["mode"] == operation_mode
+        if same_key and previous["size"] == size and previous["mtime_ns"] == mtime_ns \
+                and os.path.exists(output_path):
+            files[relative] = previous
+            summary["skipped"] += 1
+            continue
+        if previous is not None:
+            files[relative] = previous  # conservé jusqu'au traitement, pour une reprise après interruption
+        pending[relative] = {"size": size, "mtime_ns": mtime_ns, "output": output, "key_id": key_id,
+                             "mode": operation_mode}
+        task = (relative, path, output_path, previous["sha256"] if same_key else None, size)
+        (large_tasks if size >= large_file_size else small_tasks).append(task)
+    removed = set(previous_files) - {relative for relative, _, _, _ in scanned}
+    for relative in removed:  # le fichier chiffré d'un fichier supprimé est supprimé aussi
+        output_path = _safe_join(output_directory, previous_files[relative]["output"])
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    summary["removed"] = len(removed)
+
+    def on_result(results):
+        for relative, digest, encrypted in results:
+            files[relative] = dict(pending[relative], sha256=digest)
+            summary["encrypted" if encrypted else "unchanged"] += 1
+        save_manifest(manifest_filename, files)
+
+    os.makedirs(output_directory, exist_ok=True)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and small_tasks else None
+    try:
+        _run_batches(executor, _encrypt_batch, _batches(small_tasks, batch_bytes, batch_files),
+                     (key_array, operation_mode, chunk_size), on_result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    for relative, path, output_path, previous_hash, size in large_tasks:
+        on_result([_encrypt_one(relative, path, output_path, previous_hash, key_array, operation_mode, chunk_size,
+                                workers)])
+    save_manifest(manifest_filename, files)
+    return summary
+
+
+def decrypt_tree(encrypted_directory, output_directory, key_array, manifest_filename=None, workers=None,
+                 large_file_size=DEFAULT_LARGE_FILE_SIZE, batch_bytes=DEFAULT_BATCH_BYTES,
+                 batch_files=DEFAULT_BATCH_FILES):
+    """
+    Cette fonction déchiffre tous les fichiers listés dans le manifeste d'une arborescence chiffrée.
+    Une ValueError est levée, avant tout déchiffrement, si un chemin du manifeste sort de l'arborescence.
+    :param encrypted_directory: répertoire produit par encrypt_tree
+    :param output_directory: répertoire des fichiers déchiffrés
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param manifest_filename: nom du manifeste (encrypted_directory/manifest.json par défaut)
+    :param workers: nombre de processus (par défaut, le nombre de cœurs)
+    :param large_file_size: taille à partir de laquelle un fichier est déchiffré par morceaux parallèles
+    :param batch_bytes: taille maximale d'un lot de petits fichiers
+    :param batch_files: nombre maximal de fichiers d'un lot
+    :return: le nombre de fichiers déchiffrés.
+    """
+    workers = workers or os.cpu_count() or 1
+    files = load_manifest(manifest_filename or os.path.join(encrypted_directory, MANIFEST_NAME))
+    small_tasks, large_tasks = list(), list()
+    for relative, entry in sorted(files.items()):
+        task = (_safe_join(encrypted_directory, entry["output"]), _safe_join(output_directory, relative),
+                entry["size"])
+        (large_tasks if entry["size"] >= large_file_size else small_tasks).append(task)
+
+    count = list()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and small_tasks else None
+    try:
+        _run_batches(executor, _decrypt_batch, _batches(small_tasks, batch_bytes, batch_files), (key_array,),
+                     count.extend)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    for input_path, output_path, size in large_tasks:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        decrypt_file_container(input_path, output_path, key_array, workers=workers)
+        count.append(output_path)
+    return len(count)
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from gost_bulk import *
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "source")
+        self.encrypted = os.path.join(self.directory.name, "encrypted")
+        self.result = os.path.join(self.directory.name, "result")
+        self.contents = dict()
+        for i in range(12):
+            self._write("dir{}/file{}.bin".format(i % 3, i), os.urandom(100 * i))
+        self._write("large.bin", os.urandom(10000))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, relative, data):
+        path = os.path.join(self.source, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+        self.contents[relative] = data
+
+    def _encrypt(self, keys=None, workers=2):
+        return encrypt_tree(self.source, self.encrypted, keys or self.keys, workers=workers, large_file_size=4096,
+                            batch_files=4, chunk_size=1024)
+
+    def _check_round_trip(self):
+        assert decrypt_tree(self.encrypted, self.result, self.keys, workers=2, large_file_size=4096) == \
+            len(self.contents)
+        for relative, data in self.contents.items():
+            with open(os.path.join(self.result, relative), "rb") as file:
+                assert file.read() == data
+
+    def test_round_trip(self):
+        assert self._encrypt() == {"encrypted": 13, "unchanged": 0, "skipped": 0, "removed": 0}
+        manifest = load_manifest(os.path.join(self.encrypted, MANIFEST_NAME))
+        assert manifest["large.bin"]["size"] == 10000
+        assert manifest["dir1/file4.bin"]["output"] == "dir1/file4.bin.gost"
+        assert manifest["dir1/file4.bin"]["key_id"] == key_fingerprint(self.keys)
+        self._check_round_trip()
+
+    def test_incremental(self):
+        self._encrypt(workers=1)
+        assert self._encrypt()["skipped"] == 13
+
+        os.utime(os.path.join(self.source, "dir0/file3.bin"), ns=(0, 10 ** 9))
+        self._write("dir1/file1.bin", b"nouveau contenu")
+        os.remove(os.path.join(self.source, "dir2/file2.bin"))
+        del self.contents["dir2/file2.bin"]
+        assert self._encrypt() == {"encrypted": 1, "unchanged": 1, "skipped": 10, "removed": 1}
+        assert not os.path.exists(os.path.join(self.encrypted, "dir2/file2.bin.gost"))
+        self._check_round_trip()
+
+    def test_key_change(self):
+        self._encrypt()
+        assert self._encrypt(gost_key_generator(key + 1))["encrypted"] == 13
+
+    def test_special_files(self):
+        os.symlink(os.path.join(self.source, "absent"), os.path.join(self.source, "broken"))
+        assert self._encrypt()["encrypted"] == 13
+
+    def test_manifest_traversal(self):
+        self._encrypt()
+        manifest_filename = os.path.join(self.encrypted, MANIFEST_NAME)
+        files = load_manifest(manifest_filename)
+        for relative, output in (("../escape.bin", "large.bin.gost"), ("large.bin", "../../escape.gost"),
+                                 ("/tmp/escape.bin", "large.bin.gost")):
+            save_manifest(manifest_filename, {relative: dict(files["large.bin"], output=output)})
+            with self.assertRaises(ValueError):
+                decrypt_tree(self.encrypted, self.result, self.keys, workers=1)
+        assert not os.path.exists(os.path.join(self.directory.name, "escape.bin"))
@@ -0,0 +1,153 @@
+"""
+Ce fichier comprend un objet de chiffrement GOST réutilisable (GostCipher) qui précalcule
+une seule fois les clés de rounds et les tables de S-box associées à une clé, ainsi
+qu'un cache LRU borné de ces objets.
+"""
+import threading
+from collections import OrderedDict
+
+from gost import apply_rounds, encrypt, decrypt
+from gost_feistel_function import S_BOX_RFC, compile_sbox_tables
+from key_generator import gost_key_generator, gost_advanced_key_generator
+
+
+class GostCipher:
+    """
+    Contexte de chiffrement GOST associé à une clé. Les clés de rounds (dans l'ordre de chiffrement
+    et de déchiffrement) ainsi que les tables de S-box sont calculées à la construction.
+    """
+
+    def __init__(self, key, simple_key=True, s_box=S_BOX_RFC):
+        """
+        :param key: Clé globale de 256 bits (schéma simple) ou de 128 bits (schéma avancé)
+        :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        """
+        self.key = key
+        self.simple_key = simple_key
+        self.s_box = s_box
+        if simple_key:
+            self.key_array = gost_key_generator(key)
+        else:
+            self.key_array = gost_advanced_key_generator(key & 2 ** 128 - 1)
+        self.decrypt_key_array = self.key_array[::-1]  # ordre des rounds pour le déchiffrement
+        self.tables = compile_sbox_tables(s_box)
+
+    def encrypt_block(self, block):
+        """
+        :param block: bloc de 64 bits à chiffrer
+        :return: Le bloc de 64 bits chiffré.
+        """
+        return apply_rounds(block, self.key_array, self.tables)
+
+    def decrypt_block(self, block):
+        """
+        :param block: bloc de 64 bits à déchiffrer
+        :return: Le bloc de 64 bits déchiffré.
+        """
+        return apply_rounds(block, self.decrypt_key_array, self.tables)
+
+    def encrypt(self, blocks, operation_mode="ECB"):
+        """
+        :param blocks: Liste de blocs à chiffrer.
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC" ou "CTR")
+        :return: la liste de blocs chiffrés (voir gost.encrypt).
+        """
+        return encrypt(blocks, self.key_array, operation_mode, self.tables)
+
+    def decrypt(self, blocks, operation_mode="ECB"):
+        """
+        :param blocks: Liste de blocs à déchiffrer.
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC" ou "CTR")
+        :return: la liste de blocs déchiffrés (voir gost.decrypt).
+        """
+        if operation_mode == "ECB":  # le déchiffrement ECB est un chiffrement avec les clés inversées
+            return [apply_rounds(block, self.decrypt_key_array, self.tables) for block in blocks]
+        return decrypt(blocks, self.key_array, operation_mode, self.tables)
+
+
+class CipherCache:
+    """
+    Cache LRU borné de GostCipher, indexé par la clé, le schéma de clé et le jeu de S-box.
+    Les compteurs hits, misses et evictions permettent de suivre son efficacité.
+    """
+
+    def __init__(self, maxsize=256):
+        """
+        :param maxsize: nombre maximal de contextes conservés
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize doit être supérieur ou égal à 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._ciphers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, simple_key=True, s_box=S_BOX_RFC):
+        """
+        Cette fonction retourne le GostCipher correspondant, en le construisant si nécessaire.
+        :param key: Clé globale de 256 bits (schéma simple) ou de 128 bits (schéma avancé)
+        :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        :return: le GostCipher associé à la clé.
+        """
+        if not simple_key:
+            key &= 2 ** 128 - 1  # le schéma avancé n'utilise que 128 bits : même contexte pour ces clés
+        cache_key = (key, simple_key, tuple(tuple(row) for row in s_box))
+        with self._lock:
+            cipher = self._ciphers.get(cache_key)
+            if cipher is not None:
+                self._ciphers.move_to_end(cache_key)
+                self.hits += 1
+                return cipher
+            self.misses += 1
+
+        cipher = GostCipher(key, simple_key, s_box)  # construit hors du verrou
+
+        with self._lock:
+            self._ciphers[cache_key] = cipher
+            self._ciphers.move_to_end(cache_key)
+            while len(self._ciphers) > self.maxsize:
+                self._ciphers.popitem(last=False)
+                self.evictions += 1
+        return cipher
+
+    def clear(self):
+        """
+        Cette fonction vide le cache et remet les compteurs à zéro.
+        """
+        with self._lock:
+            self._ciphers.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        :return: dictionnaire contenant hits, misses, evictions, size et maxsize.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._ciphers), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._ciphers)
+
+
+"""
+Cache partagé utilisé par get_cipher.
+"""
+DEFAULT_CIPHER_CACHE = CipherCache()
+
+
+def get_cipher(key, simple_key=True, s_box=S_BOX_RFC):
+    """
+    Cette fonction retourne le GostCipher associé à la clé depuis le cache partagé.
+    :param key: Clé globale de 256 bits (schéma simple) ou de 128 bits (schéma avancé)
+    :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: le GostCipher associé à la clé.
+    """
+    return DEFAULT_CIPHER_CACHE.get(key, simple_key, s_box)
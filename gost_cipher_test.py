@@ -0,0 +1,48 @@
+import unittest
+
+from gost import encrypt, decrypt
+from gost_cipher import *
+from gost_feistel_function import S_BOX_BANK
+from key_generator import gost_key_generator, gost_advanced_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostCipher(unittest.TestCase):
+
+    def test_encrypt_block(self):
+        cipher = GostCipher(key)
+        assert cipher.encrypt_block(0xe18624e8f674b145) == 5391480007939838273
+        assert cipher.decrypt_block(5391480007939838273) == 0xe18624e8f674b145
+
+    def test_modes_match_reference(self):
+        cipher = GostCipher(key)
+        blocks = [0x123456ABCD132536, 0xe18624e8f674b145, 0]
+        assert cipher.encrypt(blocks) == encrypt(blocks, gost_key_generator(key))
+        for mode in ("ECB", "CBC", "CTR"):
+            assert cipher.decrypt(cipher.encrypt(blocks, mode), mode) == blocks
+
+    def test_advanced_key(self):
+        cipher = GostCipher(key, simple_key=False)
+        assert cipher.key_array == gost_advanced_key_generator(key & 2 ** 128 - 1)
+        cypher = cipher.encrypt([0x123456ABCD132536])
+        assert decrypt(cypher, cipher.key_array) == [0x123456ABCD132536]
+
+    def test_cache_counters(self):
+        cache = CipherCache(maxsize=2)
+        first = cache.get(1)
+        assert cache.get(1) is first
+        cache.get(2)
+        cache.get(3)  # la clé 1 est la moins récemment utilisée
+        assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "size": 2, "maxsize": 2}
+        assert cache.get(1) is not first
+
+    def test_cache_sbox(self):
+        cache = CipherCache()
+        assert cache.get(key) is not cache.get(key, s_box=S_BOX_BANK)
+        assert cache.get(key, False) is not cache.get(key)
+
+    def test_cache_advanced_key(self):
+        cache = CipherCache()
+        assert cache.get(key, False) is cache.get(key & 2 ** 128 - 1, False)
+        assert len(cache) == 1
@@ -0,0 +1,190 @@
+"""
+Ce fichier comprend l'interface en ligne de commande (python -m gost) :
+
+    python -m gost keygen cles.bin [--advanced] [--count N]
+    python -m gost encrypt --key cles.bin [--mode CTR] [--engine table] [entrée] [sortie]
+    python -m gost decrypt --key cles.bin [--mode CTR] [--engine table] [entrée] [sortie]
+    python -m gost bulk-encrypt --key cles.bin source/ chiffré/ [--workers N]
+    python -m gost bulk-decrypt --key cles.bin chiffré/ destination/ [--workers N]
+    python -m gost daemon (--socket chemin | --port N) [--workers N] [--engine table]
+
+L'entrée et la sortie sont l'entrée et la sortie standard par défaut (ou "-") : les données sont
+traitées en flux par grands morceaux, la commande peut donc être utilisée dans un pipeline shell
+(tar c . | python -m gost encrypt --key cles.bin | ssh ...). Le format est celui de gost_stream et
+les fichiers de clés sont ceux de key_provisioning.
+
+Les moteurs lourds (NumPy, pool de processus) ne sont chargés que s'ils sont demandés.
+"""
+import argparse
+import os
+import sys
+import time
+
+import engines
+from gost_stream import DEFAULT_CHUNK_SIZE, STREAM_MODES, encrypt_stream, decrypt_stream
+from instrumentation import Metrics, NULL_METRICS
+from key_provisioning import KeyScheduleBatch, generate_key_schedules
+
+DEFAULT_MODE = "CTR"
+
+
+def _open(name, mode, standard):
+    if name == "-":
+        return standard.buffer
+    return open(name, mode)
+
+
+def _print_stats(metrics, seconds):
+    bytes_in = metrics.stages.get("read", {}).get("bytes", 0)
+    bytes_out = metrics.stages.get("write", {}).get("bytes", 0)
+    throughput = bytes_in / seconds / 1e6 if seconds > 0 else 0.0
+    print("bytes_in={} bytes_out={} blocks={} elapsed={:.3f}s throughput={:.2f} MB/s".format(
+        bytes_in, bytes_out, metrics.counters.get("blocks", 0), seconds, throughput), file=sys.stderr)
+
+
+def _make_pipeline(args):
+    if not args.pipeline and args.workers <= 1:
+        return None, None
+    from gost_pipeline import Pipeline
+    executor = None
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+    return Pipeline(executor=executor), executor
+
+
+def _load_key(args):
+    try:
+        return KeyScheduleBatch.load(args.key)[args.key_index]
+    except (ValueError, IndexError, OSError) as error:
+        print("erreur : fichier de clés {} : {}".format(args.key, error), file=sys.stderr)
+        return None
+
+
+def _cipher(args, function):
+    key_array = _load_key(args)
+    if key_array is None:
+        return 1
+    metrics = Metrics() if args.stats else NULL_METRICS
+    pipeline, executor = _make_pipeline(args)
+    source = _open(args.input, "rb", sys.stdin)
+    destination = _open(args.output, "wb", sys.stdout)
+    start = time.perf_counter()
+    try:
+        function(source, destination, key_array, args.mode, args.chunk_size, args.engine, metrics, args.mac,
+                 pipeline)
+        destination.flush()
+    except ValueError as error:
+        print("erreur : {}".format(error), file=sys.stderr)
+        if args.output != "-":
+            destination.close()
+            os.remove(args.output)
+        return 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        for file, name in ((source, args.input), (destination, args.output)):
+            if name != "-":
+                file.close()
+    if args.stats:
+        _print_stats(metrics, time.perf_counter() - start)
+    return 0
+
+
+def _keygen(args):
+    batch = generate_key_schedules(args.count, not args.advanced)
+    batch.save(args.key_file)
+    return 0
+
+
+def _bulk(args):
+    import gost_bulk
+    key_array = _load_key(args)
+    if key_array is None:
+        return 1
+    try:
+        if args.command == "bulk-encrypt":
+            summary = gost_bulk.encrypt_tree(args.source, args.destination, key_array, args.mode, args.manifest,
+                                             workers=args.workers)
+            print(" ".join("{}={}".format(name, count) for name, count in summary.items()), file=sys.stderr)
+        else:
+            count = gost_bulk.decrypt_tree(args.source, args.destination, key_array, args.manifest, args.workers)
+            print("decrypted={}".format(count), file=sys.stderr)
+    except (ValueError, OSError) as error:  # manifeste invalide, conteneur corrompu, ...
+        print("erreur : {}".format(error), file=sys.stderr)
+        return 1
+    return 0
+
+
+def _daemon(args):
+    import gost_daemon
+    address = args.socket if args.socket else ("127.0.0.1", args.port)
+    with gost_daemon.GostDaemon(address, args.workers, args.engine) as daemon:
+        print("gost daemon : {}".format(daemon.address), file=sys.stderr)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m gost", description="Chiffrement GOST en flux")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    keygen_parser = subparsers.add_parser("keygen", help="génère un fichier de clés")
+    keygen_parser.add_argument("key_file")
+    keygen_parser.add_argument("--count", type=int, default=1, help="nombre de clés du fichier")
+    keygen_parser.add_argument("--advanced", action="store_true", help="utilise le schéma de clé avancé")
+
+    for command in ("bulk-encrypt", "bulk-decrypt"):
+        bulk_parser = subparsers.add_parser(command, help="{} une arborescence (gost_bulk)".format(
+            "chiffre" if command == "bulk-encrypt" else "déchiffre"))
+        bulk_parser.add_argument("source")
+        bulk_parser.add_argument("destination")
+        bulk_parser.add_argument("--key", required=True, help="fichier de clés (voir keygen)")
+        bulk_parser.add_argument("--key-index", type=int, default=0, help="indice de la clé dans le fichier")
+        bulk_parser.add_argument("--mode", choices=("ECB", "CBC", "CTR"), default=DEFAULT_MODE)
+        bulk_parser.add_argument("--manifest", help="manifeste (manifest.json du répertoire chiffré par défaut)")
+        bulk_parser.add_argument("--workers", type=int, help="nombre de processus (nombre de cœurs par défaut)")
+
+    daemon_parser = subparsers.add_parser("daemon", help="service local de chiffrement (gost_daemon)")
+    address_group = daemon_parser.add_mutually_exclusive_group(required=True)
+    address_group.add_argument("--socket", help="chemin de la socket Unix")
+    address_group.add_argument("--port", type=int, help="port TCP sur localhost")
+    daemon_parser.add_argument("--workers", type=int, help="nombre de processus (nombre de cœurs par défaut)")
+    daemon_parser.add_argument("--engine", choices=engines.engine_names(), default="table")
+
+    for command in ("encrypt", "decrypt"):
+        cipher_parser = subparsers.add_parser(command, help="{} l'entrée vers la sortie".format(
+            "chiffre" if command == "encrypt" else "déchiffre"))
+        cipher_parser.add_argument("input", nargs="?", default="-", help="fichier d'entrée (- : entrée standard)")
+        cipher_parser.add_argument("output", nargs="?", default="-", help="fichier de sortie (- : sortie standard)")
+        cipher_parser.add_argument("--key", required=True, help="fichier de clés (voir keygen)")
+        cipher_parser.add_argument("--key-index", type=int, default=0, help="indice de la clé dans le fichier")
+        cipher_parser.add_argument("--mode", choices=STREAM_MODES, default=DEFAULT_MODE)
+        cipher_parser.add_argument("--engine", choices=engines.engine_names(), default="table")
+        cipher_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="taille des lectures")
+        cipher_parser.add_argument("--mac", action="store_true", help="code d'authentification en fin de flux")
+        cipher_parser.add_argument("--pipeline", action="store_true",
+                                   help="recouvre lectures, chiffrement et écritures (gost_pipeline)")
+        cipher_parser.add_argument("--workers", type=int, default=1,
+                                   help="chiffrement dans un pool de processus (active --pipeline)")
+        cipher_parser.add_argument("--stats", action="store_true",
+                                   help="affiche octets, blocs, durée et débit sur la sortie d'erreur")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "keygen":
+        return _keygen(args)
+    if args.command.startswith("bulk-"):
+        return _bulk(args)
+    if args.command == "daemon":
+        return _daemon(args)
+    return _cipher(args, encrypt_stream if args.command == "encrypt" else decrypt_stream)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
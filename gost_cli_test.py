@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from gost_cli import main, build_parser
+from key_provisioning import KeyScheduleBatch
+
+
+class TestGostCli(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.key_name = self._path("keys.bin")
+        self.plain_name = self._path("plain.bin")
+        self.data = os.urandom(5000)
+        with open(self.plain_name, "wb") as file:
+            file.write(self.data)
+        assert main(["keygen", self.key_name, "--count", "2"]) == 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def _read(self, name):
+        with open(name, "rb") as file:
+            return file.read()
+
+    def test_keygen(self):
+        batch = KeyScheduleBatch.load(self.key_name)
+        assert len(batch) == 2
+        assert batch.simple_key
+
+    def test_files(self):
+        cypher_name = self._path("cypher.bin")
+        result_name = self._path("result.bin")
+        for options in ([], ["--mode", "CBC", "--mac"], ["--mode", "OFB", "--pipeline", "--key-index", "1"]):
+            assert main(["encrypt", "--key", self.key_name, self.plain_name, cypher_name] + options) == 0
+            assert main(["decrypt", "--key", self.key_name, cypher_name, result_name] + options) == 0
+            assert self._read(result_name) == self.data
+
+    def test_stats(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            main(["encrypt", "--key", self.key_name, "--stats", self.plain_name, self._path("cypher.bin")])
+        assert "bytes_in=5000 bytes_out=5008 blocks=625" in stderr.getvalue()
+        assert "MB/s" in stderr.getvalue()
+
+    def test_bad_mac(self):
+        cypher_name = self._path("cypher.bin")
+        result_name = self._path("result.bin")
+        main(["encrypt", "--key", self.key_name, "--mac", self.plain_name, cypher_name])
+        with contextlib.redirect_stderr(io.StringIO()):
+            assert main(["decrypt", "--key", self.key_name, "--mac", "--key-index", "1", cypher_name,
+                         result_name]) == 1
+        assert not os.path.exists(result_name)
+
+    def test_standard_streams(self):
+        command = [sys.executable, "-m", "gost"]
+        cypher = subprocess.run(command + ["encrypt", "--key", self.key_name], input=self.data,
+                                stdout=subprocess.PIPE, check=True).stdout
+        assert len(cypher) == len(self.data) + 8
+        plain = subprocess.run(command + ["decrypt", "--key", self.key_name, "-", "-"], input=cypher,
+                               stdout=subprocess.PIPE, check=True).stdout
+        assert plain == self.data
+
+    def test_lazy_imports(self):
+        code = "import sys, gost_cli; print(sorted({'numpy', 'concurrent.futures.process'} & set(sys.modules)))"
+        output = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, check=True, text=True)
+        assert output.stdout.strip() == "[]"
+
+    def test_bulk(self):
+        encrypted = self._path("encrypted")
+        result = self._path("result")
+        with contextlib.redirect_stderr(io.StringIO()):
+            assert main(["bulk-encrypt", "--key", self.key_name, "--workers", "1", self.directory.name,
+                         encrypted]) == 0
+            assert main(["bulk-decrypt", "--key", self.key_name, "--workers", "1", encrypted, result]) == 0
+        assert self._read(os.path.join(result, "plain.bin")) == self.data
+
+    def test_daemon_arguments(self):
+        args = build_parser().parse_args(["daemon", "--port", "7000", "--workers", "2"])
+        assert (args.socket, args.port, args.workers) == (None, 7000, 2)
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            build_parser().parse_args(["daemon", "--port", "7000", "--socket", "gost.sock"])
+
+    def test_bad_key_file(self):
+        output = self._path("cypher.bin")
+        for options in (["--key", self.key_name, "--key-index", "5"], ["--key", self._path("absent.bin")],
+                        ["--key", self.plain_name]):
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                assert main(["encrypt", self.plain_name, output] + options) == 1
+                assert main(["bulk-decrypt", self.directory.name, self._path("out")] + options) == 1
+            assert "erreur" in stderr.getvalue()
+            assert not os.path.exists(output)
@@ -0,0 +1,117 @@
+"""
+Ce fichier comprend un compilateur de fonctions de chiffrement spécialisées par clé : les 32 rounds
+sont déroulés dans le code généré, les clés de rounds y sont écrites comme constantes et les
+tables de S-box (compile_sbox_tables) sont liées comme variables locales. Il n'y a plus aucun
+appel de fonction interne par round.
+
+Chaque fonction générée est vérifiée contre le chemin de référence (gost.encrypt_block /
+gost.decrypt_block) au moment de sa construction, puis mise en cache.
+"""
+from collections import OrderedDict
+
+from gost import encrypt_block, decrypt_block
+from gost_feistel_function import S_BOX_RFC, compile_sbox_tables
+
+"""
+Blocs utilisés pour vérifier les fonctions générées.
+"""
+CHECK_BLOCKS = (0, 2 ** 64 - 1, 0x0123456789ABCDEF, 0xe18624e8f674b145)
+
+"""
+Nombre maximal de paires de fonctions conservées en cache.
+"""
+MAX_CACHED_FUNCTIONS = 256
+
+_COMPILED_CACHE = OrderedDict()
+
+
+def generate_source(round_keys, name="gost_block"):
+    """
+    Cette fonction génère le code source d'une fonction appliquant les 32 rounds.
+    Le code généré attend une table t3 de 512 entrées (voir _build).
+    :param round_keys: liste des 32 clés locales dans l'ordre d'application des rounds
+    :param name: nom de la fonction générée
+    :return: le code source (string).
+    """
+    if len(round_keys) != 32:
+        raise ValueError("32 clés de rounds sont attendues, {} reçues".format(len(round_keys)))
+    lines = ["def {}(block, t0=t0, t1=t1, t2=t2, t3=t3):".format(name),
+             "    r = block & 0xFFFFFFFF",
+             "    l = block >> 32"]
+    left, right = "l", "r"
+    for i, round_key in enumerate(round_keys):
+        # clé convertie en entier de 32 bits : seul un entier est écrit dans le code, et la retenue
+        # de l'addition reste sur un seul bit (table t3 de 512 entrées)
+        lines.append("    x = {} + {}".format(right, int(round_key) & 0xFFFFFFFF))
+        lines.append("    {0} ^= t0[x & 0xFF] | t1[x >> 8 & 0xFF] | t2[x >> 16 & 0xFF] | t3[x >> 24]".format(left))
+        if i < 31:
+            left, right = right, left  # le swap se fait en échangeant les noms des variables
+    lines.append("    return {} << 32 | {}".format(left, right))
+    return "\n".join(lines) + "\n"
+
+
+def _build(round_keys, tables, name):
+    # la retenue de l'addition (bit 32) est absorbée par une table t3 de 512 entrées,
+    # ce qui évite le masque modulo 2^32 à chaque round
+    namespace = {"t0": tables[0], "t1": tables[1], "t2": tables[2], "t3": tables[3] * 2}
+    exec(compile(generate_source(round_keys, name), "<gost_codegen {}>".format(name), "exec"), namespace)
+    return namespace[name]
+
+
+def compile_key(key_array, s_box=S_BOX_RFC, verify=True):
+    """
+    Cette fonction génère (ou retrouve dans le cache) les fonctions de chiffrement et de
+    déchiffrement d'un bloc pour une liste de clés de rounds.
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :param verify: vérifie les fonctions générées contre le chemin de référence
+    :return: tuple (encrypt_block(block), decrypt_block(block)).
+    """
+    sbox_key = tuple(tuple(row) for row in s_box)
+    cache_key = (tuple(key_array), sbox_key)
+    functions = _COMPILED_CACHE.get(cache_key)
+    if functions is not None:
+        _COMPILED_CACHE.move_to_end(cache_key)
+        return functions
+
+    tables = compile_sbox_tables(s_box)
+    encrypt_function = _build(key_array, tables, "gost_encrypt_block")
+    decrypt_function = _build(key_array[::-1], tables, "gost_decrypt_block")
+
+    if verify:
+        reference_tables = None if s_box == S_BOX_RFC else tables  # la référence n'utilise que S_BOX_RFC
+        for block in CHECK_BLOCKS:
+            expected = encrypt_block(block, key_array, reference_tables)
+            if encrypt_function(block) != expected or decrypt_function(expected) != \
+                    decrypt_block(expected, key_array, reference_tables):
+                raise RuntimeError("la fonction générée ne correspond pas au chemin de référence")
+
+    functions = (encrypt_function, decrypt_function)
+    _COMPILED_CACHE[cache_key] = functions
+    while len(_COMPILED_CACHE) > MAX_CACHED_FUNCTIONS:
+        _COMPILED_CACHE.popitem(last=False)
+    return functions
+
+
+def encrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    """
+    Cette fonction chiffre indépendamment chaque bloc avec la fonction générée pour la clé.
+    :param blocks: liste de blocs à chiffrer
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: la liste de blocs chiffrés.
+    """
+    encrypt_function = compile_key(key_array, s_box)[0]
+    return [encrypt_function(block) for block in blocks]
+
+
+def decrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    """
+    Cette fonction déchiffre indépendamment chaque bloc avec la fonction générée pour la clé.
+    :param blocks: liste de blocs à déchiffrer
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: la liste de blocs déchiffrés.
+    """
+    decrypt_function = compile_key(key_array, s_box)[1]
+    return [decrypt_function(block) for block in blocks]
@@ -0,0 +1,52 @@
+import unittest
+from random import getrandbits
+
+import engines
+from gost import encrypt, decrypt, encrypt_block
+from gost_codegen import *
+from gost_feistel_function import S_BOX_BANK, compile_sbox_tables
+from key_generator import gost_key_generator, gost_advanced_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestCodegen(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.blocks = [getrandbits(64) for _ in range(50)]
+
+    def test_known_block(self):
+        encrypt_function, decrypt_function = compile_key(self.keys)
+        assert encrypt_function(0xe18624e8f674b145) == 5391480007939838273
+        assert decrypt_function(5391480007939838273) == 0xe18624e8f674b145
+
+    def test_cache(self):
+        assert compile_key(self.keys) is compile_key(list(self.keys))
+
+    def test_advanced_key(self):
+        keys = gost_advanced_key_generator(key & 2 ** 128 - 1)
+        assert encrypt_blocks(self.blocks, keys) == encrypt(self.blocks, keys)
+        assert decrypt_blocks(encrypt(self.blocks, keys), keys) == self.blocks
+
+    def test_sbox_bank(self):
+        tables = compile_sbox_tables(S_BOX_BANK)
+        expected = [encrypt_block(block, self.keys, tables) for block in self.blocks]
+        assert encrypt_blocks(self.blocks, self.keys, S_BOX_BANK) == expected
+
+    def test_source_has_no_calls(self):
+        source = generate_source(self.keys)
+        assert source.count("\n") == 3 + 2 * 32 + 1
+        assert "(" not in source.split("\n", 1)[1]
+
+    def test_invalid_schedule(self):
+        with self.assertRaises(ValueError):
+            generate_source(self.keys[:31])
+        with self.assertRaises(ValueError):
+            generate_source(self.keys[:31] + ["__import__('os')"])  # seul un entier peut être écrit dans le code
+        assert "+ 5\n" in generate_source([5 + 2 ** 32] * 32)
+
+    def test_engine_modes(self):
+        for mode in ("ECB", "CBC", "CTR"):
+            cypher = encrypt(self.blocks, self.keys, mode)
+            assert engines.decrypt(cypher, self.keys, mode, "unrolled") == self.blocks
@@ -0,0 +1,349 @@
+"""
+Ce fichier comprend un format de conteneur chiffré versionné et auto-descriptif :
+
+    en-tête | morceau 0 | morceau 1 | ... | index | fin
+
+- l'en-tête décrit le mode d'opération, le jeu de S-box, le schéma de clé, le remplissage,
+  la taille des morceaux et le vecteur initial de base ;
+- chaque morceau contient chunk_size octets de texte clair chiffrés indépendamment des autres
+  (seul le dernier peut être plus court) ;
+- l'index donne la position et la taille de chaque morceau chiffré ;
+- la fin (taille fixe) donne la position de l'index, le nombre de morceaux et la taille du texte clair.
+
+Les vecteurs des morceaux sont dérivés du vecteur de base : en CTR, le morceau i utilise la plage
+de compteurs qui commence à i * chunk_size / 8 ; en CBC, son vecteur initial est E_K(iv ^ i).
+Les morceaux pouvant être traités séparément, le chiffrement et le déchiffrement sont répartis
+sur plusieurs processus et un lecteur peut accéder directement à n'importe quel morceau.
+"""
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import engines
+from gost import apply_rounds, generate_key_array
+from gost_feistel_function import S_BOX_RFC, S_BOX_BANK, compile_sbox_tables
+from key_generator import rdm_IV_generator
+from utilities import bytes_to_blocks, blocks_to_bytes, PADDING_NONE, PADDING_ZERO, PADDING_PKCS7
+
+FORMAT_MAGIC = b"GOSTC"
+FORMAT_VERSION = 1
+TRAILER_MAGIC = b"GOSTIDX1"
+
+"""
+En-tête : signature, version, mode, S-box, schéma de clé, remplissage, options, taille des morceaux, vecteur.
+"""
+_HEADER = struct.Struct(">5sBBBBBBIQ")
+_INDEX_ENTRY = struct.Struct(">QI")
+_TRAILER = struct.Struct(">QQQ8s")
+
+MODE_CODES = {"ECB": 0, "CBC": 1, "CTR": 2}
+SBOX_CODES = {0: S_BOX_RFC, 1: S_BOX_BANK}
+PADDING_CODES = {PADDING_NONE: 0, PADDING_PKCS7: 1}
+
+"""
+Options reconnues dans l'octet flags de l'en-tête (aucune pour la version 1).
+"""
+SUPPORTED_FLAGS = 0
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class ContainerHeader:
+    """
+    Paramètres décrits par l'en-tête et la fin d'un conteneur.
+    """
+
+    def __init__(self, operation_mode, s_box=S_BOX_RFC, simple_key=True, chunk_size=DEFAULT_CHUNK_SIZE, iv=0,
+                 flags=0, chunk_count=0, plaintext_length=0):
+        if operation_mode not in MODE_CODES:
+            raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
+        if chunk_size <= 0 or chunk_size % 8 != 0:
+            raise ValueError("chunk_size doit être un multiple positif de 8")
+        self.operation_mode = operation_mode
+        self.s_box = s_box
+        self.simple_key = simple_key
+        self.chunk_size = chunk_size
+        self.iv = iv
+        self.flags = flags
+        self.chunk_count = chunk_count
+        self.plaintext_length = plaintext_length
+
+    @property
+    def padding(self):
+        return PADDING_NONE if self.operation_mode == "CTR" else PADDING_PKCS7
+
+    def pack(self):
+        """
+        :return: l'en-tête sous forme d'octets.
+        """
+        sbox_codes = [code for code, s_box in SBOX_CODES.items() if s_box == self.s_box]
+        if not sbox_codes:
+            raise ValueError("le conteneur n'accepte que S_BOX_RFC ou S_BOX_BANK")
+        return _HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, MODE_CODES[self.operation_mode], sbox_codes[0],
+                            int(not self.simple_key), PADDING_CODES[self.padding], self.flags, self.chunk_size,
+                            self.iv)
+
+    @classmethod
+    def unpack(cls, data):
+        """
+        :param data: les _HEADER.size premiers octets du conteneur
+        :return: le ContainerHeader correspondant (chunk_count et plaintext_length restent à lire dans la fin).
+        """
+        if len(data) != _HEADER.size:
+            raise ValueError("conteneur GOST tronqué (en-tête incomplet)")
+        magic, version, mode, sbox_code, schedule, padding, flags, chunk_size, iv = _HEADER.unpack(data)
+        if magic != FORMAT_MAGIC:
+            raise ValueError("le fichier n'est pas un conteneur GOST")
+        if version != FORMAT_VERSION:
+            raise ValueError("version de conteneur non supportée : {}".format(version))
+        modes = {code: name for name, code in MODE_CODES.items()}
+        if mode not in modes or sbox_code not in SBOX_CODES or schedule > 1:
+            raise ValueError("en-tête de conteneur invalide")
+        if flags & ~SUPPORTED_FLAGS:
+            raise ValueError("options de conteneur non supportées : {:#x}".format(flags))
+        header = cls(modes[mode], SBOX_CODES[sbox_code], schedule == 0, chunk_size, iv, flags)
+        if padding != PADDING_CODES[header.padding]:
+            raise ValueError("remplissage incompatible avec le mode {}".format(header.operation_mode))
+        return header
+
+
+def chunk_iv(header, key_array, index):
+    """
+    :return: le vecteur initial du morceau index (CBC) : E_K(iv ^ index).
+    """
+    return apply_rounds(header.iv ^ index, key_array, compile_sbox_tables(header.s_box))
+
+
+def encrypt_chunk(data, index, is_last, header, key_array, engine="table"):
+    """
+    Cette fonction chiffre un morceau indépendamment des autres.
+    :param data: texte clair du morceau (chunk_size octets, sauf pour le dernier)
+    :param index: numéro du morceau
+    :param is_last: True pour le dernier morceau (remplissage en ECB et CBC)
+    :param header: ContainerHeader du conteneur
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param engine: nom du moteur utilisé
+    :return: le morceau chiffré (bytes).
+    """
+    engine = engines.get_engine(engine)
+    if header.operation_mode == "CTR":
+        blocks = bytes_to_blocks(data, PADDING_ZERO)
+        start = index * (header.chunk_size // 8)
+        result = engine.ctr_blocks(blocks, header.iv, key_array, header.s_box, start)
+        return bytes(blocks_to_bytes(result)[:len(data)])
+    blocks = bytes_to_blocks(data, PADDING_PKCS7 if is_last else PADDING_NONE)
+    if header.operation_mode == "ECB":
+        return bytes(blocks_to_bytes(engine.encrypt_blocks(blocks, key_array, header.s_box)))
+    tables = compile_sbox_tables(header.s_box)
+    previous = chunk_iv(header, key_array, index)
+    for i in range(len(blocks)):
+        previous = blocks[i] = apply_rounds(previous ^ blocks[i], key_array, tables)
+    return bytes(blocks_to_bytes(blocks))
+
+
+def decrypt_chunk(data, index, is_last, header, key_array, engine="table"):
+    """
+    Cette fonction déchiffre un morceau indépendamment des autres.
+    :param data: morceau chiffré
+    :param index: numéro du morceau
+    :param is_last: True pour le dernier morceau (remplissage en ECB et CBC)
+    :param header: ContainerHeader du conteneur
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param engine: nom du moteur utilisé
+    :return: le texte clair du morceau (bytes).
+    """
+    engine = engines.get_engine(engine)
+    if header.operation_mode == "CTR":
+        return encrypt_chunk(data, index, is_last, header, key_array, engine)
+    blocks = bytes_to_blocks(data)
+    decrypted_blocks = list(engine.decrypt_blocks(blocks, key_array, header.s_box))
+    if header.operation_mode == "CBC":
+        previous = chunk_iv(header, key_array, index)
+        for i in range(len(decrypted_blocks)):
+            decrypted_blocks[i] ^= previous
+            previous = blocks[i]
+    return bytes(blocks_to_bytes(decrypted_blocks, PADDING_PKCS7 if is_last else PADDING_NONE))
+
+
+def _encrypt_file_chunk(filename, index, is_last, header, key_array, engine):
+    with open(filename, "rb") as file:
+        file.seek(index * header.chunk_size)
+        data = file.read(header.chunk_size)
+    return encrypt_chunk(data, index, is_last, header, key_array, engine)
+
+
+def _decrypt_file_chunk(filename, offset, length, index, is_last, header, key_array, engine):
+    with open(filename, "rb") as file:
+        file.seek(offset)
+        data = file.read(length)
+    return decrypt_chunk(data, index, is_last, header, key_array, engine)
+
+
+def _ordered_results(jobs, workers):
+    """
+    Cette fonction exécute les tâches (fonction, arguments) et retourne leurs résultats dans l'ordre.
+    Avec plusieurs processus, au plus 2 * workers tâches sont en cours pour borner la mémoire.
+    """
+    if not workers or workers <= 1:
+        for function, args in jobs:
+            yield function(*args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for function, args in jobs:
+            pending.append(executor.submit(function, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def read_index(file):
+    """
+    Cette fonction lit l'en-tête, la fin et l'index d'un conteneur.
+    :param file: objet fichier binaire permettant seek
+    :return: tuple (ContainerHeader, liste de (position, taille) des morceaux).
+    """
+    file_size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    header = ContainerHeader.unpack(file.read(_HEADER.size))
+    if file_size < _HEADER.size + _TRAILER.size:
+        raise ValueError("conteneur GOST tronqué (fin absente)")
+    file.seek(-_TRAILER.size, os.SEEK_END)
+    index_offset, chunk_count, plaintext_length, magic = _TRAILER.unpack(file.read(_TRAILER.size))
+    if magic != TRAILER_MAGIC:
+        raise ValueError("conteneur GOST tronqué (fin absente)")
+    if not _HEADER.size <= index_offset <= file_size - _TRAILER.size:
+        raise ValueError("conteneur GOST invalide (position de l'index)")
+    header.chunk_count = chunk_count
+    header.plaintext_length = plaintext_length
+    file.seek(index_offset)
+    raw_index = file.read(chunk_count * _INDEX_ENTRY.size)
+    if len(raw_index) != chunk_count * _INDEX_ENTRY.size:
+        raise ValueError("conteneur GOST tronqué (index incomplet)")
+    return header, [_INDEX_ENTRY.unpack_from(raw_index, i * _INDEX_ENTRY.size) for i in range(chunk_count)]
+
+
+def encrypt_file_container(input_filename, output_filename, operation_mode="CTR", simple_key=True, key_array=None,
+                           chunk_size=DEFAULT_CHUNK_SIZE, s_box=S_BOX_RFC, engine="table", workers=None):
+    """
+    Cette fonction chiffre un fichier au format conteneur.
+    :param input_filename: Nom du fichier à chiffrer
+    :param output_filename: Nom du conteneur chiffré
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC" ou "CTR")
+    :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+    :param key_array: liste des 32 clés de rounds à utiliser (générée aléatoirement si None)
+    :param chunk_size: taille des morceaux de texte clair (multiple de 8)
+    :param s_box: S_BOX_RFC ou S_BOX_BANK
+    :param engine: nom du moteur utilisé
+    :param workers: nombre de processus (traitement dans le processus courant si None ou 1)
+    :return: La clé utilisée pour le chiffrement.
+    """
+    if key_array is None:
+        key_array = generate_key_array(simple_key)
+    header = ContainerHeader(operation_mode, s_box, simple_key, chunk_size, rdm_IV_generator())
+    plaintext_length = os.path.getsize(input_filename)
+    chunk_count = max(1, -(-plaintext_length // chunk_size))  # un fichier vide donne un morceau vide
+
+    jobs = ((_encrypt_file_chunk, (input_filename, index, index == chunk_count - 1, header, key_array, engine))
+            for index in range(chunk_count))
+    index_entries = list()
+    with open(output_filename, "wb") as output:
+        output.write(header.pack())
+        offset = _HEADER.size
+        for encrypted_chunk in _ordered_results(jobs, workers):
+            output.write(encrypted_chunk)
+            index_entries.append(_INDEX_ENTRY.pack(offset, len(encrypted_chunk)))
+            offset += len(encrypted_chunk)
+        output.write(b"".join(index_entries))
+        output.write(_TRAILER.pack(offset, chunk_count, plaintext_length, TRAILER_MAGIC))
+    return key_array
+
+
+def decrypt_file_container(input_filename, output_filename, key_array, engine="table", workers=None):
+    """
+    Cette fonction déchiffre un conteneur. Les paramètres (mode, S-box, ...) sont lus dans l'en-tête.
+    En cas d'erreur (remplissage invalide, mauvaise clé, taille du texte déchiffré différente de celle
+    enregistrée, ...), le fichier déchiffré est supprimé et l'exception est propagée.
+    :param input_filename: Nom du conteneur chiffré
+    :param output_filename: Nom du fichier déchiffré
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param engine: nom du moteur utilisé
+    :param workers: nombre de processus (traitement dans le processus courant si None ou 1)
+    """
+    with open(input_filename, "rb") as file:
+        header, index = read_index(file)
+    jobs = ((_decrypt_file_chunk, (input_filename, offset, length, i, i == len(index) - 1, header, key_array, engine))
+            for i, (offset, length) in enumerate(index))
+    written = 0
+    try:
+        with open(output_filename, "wb") as output:
+            for chunk in _ordered_results(jobs, workers):
+                output.write(chunk)
+                written += len(chunk)
+        if written != header.plaintext_length:
+            raise ValueError("conteneur GOST invalide : {} octets déchiffrés au lieu de {}".format(
+                written, header.plaintext_length))
+    except BaseException:  # aucun texte clair partiel n'est laissé sur le disque
+        os.remove(output_filename)
+        raise
+
+
+class ContainerReader:
+    """
+    Accès direct aux morceaux d'un conteneur et à des plages arbitraires de texte clair.
+    """
+
+    def __init__(self, filename, key_array, engine="table"):
+        """
+        :param filename: Nom du conteneur chiffré
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param engine: nom du moteur utilisé
+        """
+        self._file = open(filename, "rb")
+        try:
+            self.header, self.index = read_index(self._file)
+        except BaseException:
+            self._file.close()
+            raise
+        self.key_array = key_array
+        self.engine = engine
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self):
+        return self.header.plaintext_length
+
+    def read_chunk(self, index):
+        """
+        :param index: numéro du morceau
+        :return: le texte clair du morceau.
+        """
+        offset, length = self.index[index]
+        self._file.seek(offset)
+        return decrypt_chunk(self._file.read(length), index, index == len(self.index) - 1, self.header,
+                             self.key_array, self.engine)
+
+    def read_range(self, offset, size):
+        """
+        Cette fonction ne déchiffre que les morceaux couvrant [offset, offset + size[.
+        :param offset: position dans le texte clair
+        :param size: nombre d'octets à lire
+        :return: le texte clair demandé (plus court en fin de fichier).
+        """
+        end = min(offset + size, self.header.plaintext_length)
+        if offset >= end:
+            return b""
+        chunk_size = self.header.chunk_size
+        first, last = offset // chunk_size, (end - 1) // chunk_size
+        data = b"".join(self.read_chunk(i) for i in range(first, last + 1))
+        start = offset - first * chunk_size
+        return data[start:start + end - offset]
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from gost_container import *
+from gost_feistel_function import S_BOX_BANK
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = os.urandom(5000)
+        self.plain_name = self._path("plain.bin")
+        self.cypher_name = self._path("cypher.gost")
+        self.result_name = self._path("result.bin")
+        with open(self.plain_name, "wb") as file:
+            file.write(self.data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def _result(self):
+        with open(self.result_name, "rb") as file:
+            return file.read()
+
+    def test_round_trip(self):
+        for mode in MODE_CODES:
+            keys = encrypt_file_container(self.plain_name, self.cypher_name, mode, chunk_size=512)
+            decrypt_file_container(self.cypher_name, self.result_name, keys)
+            assert self._result() == self.data
+
+    def test_header(self):
+        encrypt_file_container(self.plain_name, self.cypher_name, "CBC", key_array=self.keys, chunk_size=1024,
+                               s_box=S_BOX_BANK)
+        with open(self.cypher_name, "rb") as file:
+            header, index = read_index(file)
+        assert header.operation_mode == "CBC"
+        assert header.s_box == S_BOX_BANK
+        assert header.chunk_count == 5
+        assert header.plaintext_length == 5000
+        assert [length for offset, length in index] == [1024] * 4 + [912]
+
+    def test_parallel(self):
+        for mode in ("CBC", "CTR"):
+            keys = encrypt_file_container(self.plain_name, self.cypher_name, mode, chunk_size=256, workers=2)
+            decrypt_file_container(self.cypher_name, self.result_name, keys, workers=2)
+            assert self._result() == self.data
+
+    def test_reader(self):
+        encrypt_file_container(self.plain_name, self.cypher_name, "CBC", key_array=self.keys, chunk_size=256)
+        with ContainerReader(self.cypher_name, self.keys) as reader:
+            assert len(reader) == 5000
+            assert reader.read_chunk(3) == self.data[768:1024]
+            assert reader.read_range(1000, 700) == self.data[1000:1700]
+            assert reader.read_range(4990, 100) == self.data[4990:]
+
+    def test_empty_file(self):
+        with open(self.plain_name, "wb"):
+            pass
+        keys = encrypt_file_container(self.plain_name, self.cypher_name, "ECB")
+        decrypt_file_container(self.cypher_name, self.result_name, keys)
+        assert self._result() == b""
+
+    def test_not_a_container(self):
+        with open(self.cypher_name, "wb") as file:
+            file.write(b"x" * 100)
+        with self.assertRaises(ValueError):
+            decrypt_file_container(self.cypher_name, self.result_name, self.keys)
+
+    def test_truncated(self):
+        encrypt_file_container(self.plain_name, self.cypher_name, "CBC", key_array=self.keys, chunk_size=512)
+        with open(self.cypher_name, "rb") as file:
+            data = file.read()
+        for size in (0, 10, 23, 30, 200):
+            with open(self.cypher_name, "wb") as file:
+                file.write(data[:size])
+            with self.assertRaises(ValueError):
+                decrypt_file_container(self.cypher_name, self.result_name, self.keys)
+
+    def test_padding_field(self):
+        encrypt_file_container(self.plain_name, self.cypher_name, "CTR", key_array=self.keys)
+        with open(self.cypher_name, "r+b") as file:
+            file.seek(9)  # octet de remplissage
+            file.write(bytes([PADDING_CODES[PADDING_PKCS7]]))
+        with self.assertRaises(ValueError):
+            decrypt_file_container(self.cypher_name, self.result_name, self.keys)
+
+    def test_plaintext_length(self):
+        encrypt_file_container(self.plain_name, self.cypher_name, "CTR", key_array=self.keys, chunk_size=512)
+        with open(self.cypher_name, "r+b") as file:
+            file.seek(-16, os.SEEK_END)  # taille du texte clair dans la fin
+            file.write((4000).to_bytes(8, "big"))
+        with self.assertRaises(ValueError):
+            decrypt_file_container(self.cypher_name, self.result_name, self.keys)
+        assert not os.path.exists(self.result_name)
+
+    def test_wrong_key(self):
+        encrypt_file_container(self.plain_name, self.cypher_name, "CBC", key_array=self.keys, chunk_size=512)
+        with self.assertRaises(ValueError):  # remplissage invalide dans le dernier morceau
+            decrypt_file_container(self.cypher_name, self.result_name, gost_key_generator(key + 1))
+        assert not os.path.exists(self.result_name)
+
+    def test_reader_invalid(self):
+        with open(self.cypher_name, "wb") as file:
+            file.write(b"x" * 10)
+        with self.assertRaises(ValueError):
+            ContainerReader(self.cypher_name, self.keys)
@@ -0,0 +1,407 @@
+"""
+Ce fichier comprend un service local de chiffrement (socket Unix ou TCP sur localhost) et son client.
+Le service garde en mémoire les contextes de clés (gost_cipher.CipherCache), un pool de processus
+déjà démarrés pour les gros messages et une gost_batching.BatchQueue qui regroupe les petits messages
+reçus en même temps, sur une ou plusieurs connexions, en une seule passe du moteur.
+
+Protocole : les connexions sont persistantes et le client peut envoyer plusieurs requêtes sans attendre
+les réponses ; chaque trame commence par un en-tête de taille fixe suivi des données.
+
+    requête : identifiant (I), opération (B), mode (B), schéma de clé (B), clé de 256 bits (32s), taille (I)
+    réponse : identifiant (I), statut (B), taille (I)
+
+Les réponses peuvent arriver dans un ordre différent des requêtes : l'identifiant permet de les associer.
+Les messages chiffrés ont le format de gost_batching (vecteur initial propre à chaque message).
+"""
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+
+import engines
+from gost_batching import BatchQueue, process_many, DEFAULT_MAX_ITEMS, DEFAULT_MAX_DELAY
+from gost_cipher import CipherCache
+from gost_stream import STREAM_MODES
+
+OP_ENCRYPT = 1
+OP_DECRYPT = 2
+OP_STATS = 3
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_REQUEST = struct.Struct(">IBBB32sI")
+_RESPONSE = struct.Struct(">IBI")
+
+MAX_PAYLOAD_SIZE = 1 << 24
+
+"""
+Limites par connexion des requêtes reçues dont la réponse n'est pas encore envoyée : au-delà, la lecture
+de la connexion est suspendue (le client pipeline trop de requêtes pour que le service les garde en mémoire).
+"""
+DEFAULT_MAX_PENDING_REQUESTS = 1024
+DEFAULT_MAX_PENDING_BYTES = 1 << 25
+DEFAULT_LARGE_PAYLOAD_SIZE = 1 << 16  # au-delà, le message est chiffré dans le pool de processus
+LATENCY_WINDOW = 10000  # nombre de latences conservées pour les percentiles
+
+
+def _warm(engine):
+    engines.get_engine(engine)  # charge le moteur dans le processus
+
+
+def _process_one(key_array, operation_mode, payload, encrypting, engine):
+    result = process_many([(key_array, operation_mode, payload)], encrypting, engine)[0]
+    if isinstance(result, ValueError):
+        raise result
+    return result
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _read_exactly(file, size):
+    try:
+        data = file.read(size)
+    except OSError:  # connexion réinitialisée
+        return None
+    return data if len(data) == size else None
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        self.server.gost_daemon.serve_connection(self.request)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class GostDaemon:
+    """
+    Service de chiffrement local. address est le chemin d'une socket Unix (str) ou un tuple (hôte, port)
+    (port 0 : port libre, l'adresse réelle est dans self.address).
+    """
+
+    def __init__(self, address, workers=None, engine="table", max_items=DEFAULT_MAX_ITEMS,
+                 max_delay=DEFAULT_MAX_DELAY, large_payload_size=DEFAULT_LARGE_PAYLOAD_SIZE, cache_size=256,
+                 max_pending_requests=DEFAULT_MAX_PENDING_REQUESTS, max_pending_bytes=DEFAULT_MAX_PENDING_BYTES):
+        """
+        :param address: chemin de la socket Unix ou tuple (hôte, port)
+        :param workers: nombre de processus pour les gros messages (nombre de cœurs si None, aucun si 0)
+        :param engine: nom du moteur utilisé
+        :param max_items: nombre de messages déclenchant le traitement d'un lot
+        :param max_delay: attente maximale (secondes) d'un petit message avant traitement
+        :param large_payload_size: taille à partir de laquelle un message est traité dans le pool de processus
+        :param cache_size: nombre de contextes de clés conservés
+        :param max_pending_requests: nombre maximal de requêtes en cours par connexion
+        :param max_pending_bytes: taille maximale des messages en cours par connexion
+        """
+        self.engine = engine
+        self.large_payload_size = large_payload_size
+        self.max_pending_requests = max_pending_requests
+        self.max_pending_bytes = max_pending_bytes
+        self.cache = CipherCache(cache_size)
+        self.queue = BatchQueue(max_items=max_items, max_delay=max_delay, engine=engine)
+        workers = os.cpu_count() if workers is None else workers
+        self.executor = None
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            wait([self.executor.submit(_warm, engine) for _ in range(workers)])  # processus démarrés à l'avance
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._connections_closed = threading.Condition(self._lock)
+        self._thread = None
+        if isinstance(address, str):
+            if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+                os.remove(address)  # socket laissée par un service précédent
+            # la socket est créée directement en 0600 : seul l'utilisateur du service peut s'y connecter
+            umask = os.umask(0o177)
+            try:
+                self._server = _UnixServer(address, _Handler)
+            finally:
+                os.umask(umask)
+        else:
+            self._server = _TCPServer(address, _Handler)
+        self._server.gost_daemon = self
+        self.address = self._server.server_address
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """
+        Cette fonction lance le service dans un thread.
+        :return: le service.
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name="gost-daemon", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """
+        Cette fonction arrête le service : plus aucune connexion n'est acceptée, la lecture des connexions
+        ouvertes est interrompue et leurs réponses en cours sont envoyées, puis la file de regroupement et le
+        pool de processus sont arrêtés.
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+        with self._connections_closed:
+            for connection in self._connections:
+                try:
+                    connection.shutdown(socket.SHUT_RD)  # la lecture en cours se termine
+                except OSError:
+                    pass
+            self._connections_closed.wait_for(lambda: not self._connections)
+        self.queue.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def stats(self):
+        """
+        :return: dictionnaire contenant le nombre de requêtes, d'erreurs, la profondeur de file (requêtes en
+        cours et messages en attente de regroupement), les percentiles de latence en millisecondes, le nombre
+        de lots traités et les statistiques du cache de clés.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests, errors, in_flight = self.requests, self.errors, self.in_flight
+        return {"requests": requests, "errors": errors, "in_flight": in_flight, "queue_depth": len(self.queue),
+                "batches": self.queue.batches,
+                "latency_p50_ms": _percentile(latencies, 0.50) * 1e3,
+                "latency_p90_ms": _percentile(latencies, 0.90) * 1e3,
+                "latency_p99_ms": _percentile(latencies, 0.99) * 1e3,
+                "cache": self.cache.stats()}
+
+    def _dispatch(self, operation, mode_code, simple_key, key, payload):
+        if operation == OP_STATS:
+            future = Future()
+            future.set_result(json.dumps(self.stats()).encode())
+            return future
+        if operation not in (OP_ENCRYPT, OP_DECRYPT):
+            raise ValueError("opération inconnue : {}".format(operation))
+        if mode_code >= len(STREAM_MODES):
+            raise ValueError("mode d'opération inconnu : {}".format(mode_code))
+        operation_mode = STREAM_MODES[mode_code]
+        key_array = self.cache.get(int.from_bytes(key, "big"), bool(simple_key)).key_array
+        encrypting = operation == OP_ENCRYPT
+        if self.executor is not None and len(payload) >= self.large_payload_size:
+            return self.executor.submit(_process_one, key_array, operation_mode, payload, encrypting, self.engine)
+        if encrypting:
+            return self.queue.encrypt(key_array, operation_mode, payload)
+        return self.queue.decrypt(key_array, operation_mode, payload)
+
+    def _respond(self, connection, write_lock, request_id, start, future):
+        try:
+            status, data = STATUS_OK, future.result()
+        except Exception as error:
+            status, data = STATUS_ERROR, str(error).encode()
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += status == STATUS_ERROR
+            self._latencies.append(time.perf_counter() - start)
+        try:
+            with write_lock:
+                connection.sendall(_RESPONSE.pack(request_id, status, len(data)) + data)
+        except OSError:
+            pass  # le client est parti
+
+    def serve_connection(self, connection):
+        """
+        Cette fonction traite les requêtes d'une connexion jusqu'à sa fermeture par le client.
+        :param connection: socket connectée
+        """
+        write_lock = threading.Lock()
+        done = threading.Condition()
+        outstanding = [0, 0]  # requêtes et octets dont la réponse n'est pas encore envoyée
+
+        def respond(request_id, start, size, future):
+            self._respond(connection, write_lock, request_id, start, future)
+            with done:
+                outstanding[0] -= 1
+                outstanding[1] -= size
+                done.notify_all()
+
+        with self._lock:
+            self._connections.add(connection)
+        reader = connection.makefile("rb")
+        try:
+            while True:
+                with done:  # contre-pression : la lecture attend que des réponses soient envoyées
+                    done.wait_for(lambda: outstanding[0] < self.max_pending_requests
+                                  and outstanding[1] < self.max_pending_bytes)
+                header = _read_exactly(reader, _REQUEST.size)
+                if header is None:
+                    break
+                request_id, operation, mode_code, simple_key, key, length = _REQUEST.unpack(header)
+                start = time.perf_counter()
+                with self._lock:
+                    self.requests += 1
+                    self.in_flight += 1
+                if length > MAX_PAYLOAD_SIZE:  # la suite du flux ne peut pas être resynchronisée
+                    future = Future()
+                    future.set_exception(ValueError("message trop grand : {} octets".format(length)))
+                    self._respond(connection, write_lock, request_id, start, future)
+                    break
+                payload = _read_exactly(reader, length)
+                if payload is None:
+                    with self._lock:
+                        self.in_flight -= 1
+                    break
+                try:
+                    future = self._dispatch(operation, mode_code, simple_key, key, payload)
+                except Exception as error:  # file fermée, pool de processus cassé, ... : réponse d'erreur
+                    future = Future()
+                    future.set_exception(error)
+                with done:
+                    outstanding[0] += 1
+                    outstanding[1] += length
+                future.add_done_callback(lambda future, request_id=request_id, start=start, size=length: respond(
+                    request_id, start, size, future))
+            with done:  # les réponses en cours sont envoyées avant la fermeture
+                done.wait_for(lambda: outstanding[0] == 0)
+        finally:
+            reader.close()
+            with self._connections_closed:
+                self._connections.discard(connection)
+                self._connections_closed.notify_all()
+
+
+class GostClient:
+    """
+    Client du service de chiffrement local. La connexion est conservée entre les requêtes.
+    """
+
+    def __init__(self, address, key, simple_key=True, timeout=None):
+        """
+        :param address: chemin de la socket Unix ou tuple (hôte, port) du service
+        :param key: Clé globale de 256 bits (schéma simple) ou de 128 bits (schéma avancé)
+        :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+        :param timeout: délai maximal (secondes) des opérations sur la socket
+        """
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(address)
+        self._reader = self._socket.makefile("rb")
+        self._key = key.to_bytes(32, "big")
+        self._simple_key = simple_key
+        self._next_id = 0
+
+    def _frame(self, operation, operation_mode, payload):
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        mode_code = STREAM_MODES.index(operation_mode) if operation_mode is not None else 0
+        return self._next_id, _REQUEST.pack(self._next_id, operation, mode_code, self._simple_key, self._key,
+                                            len(payload)) + payload
+
+    def _receive(self):
+        header = _read_exactly(self._reader, _RESPONSE.size)
+        if header is None:
+            raise ConnectionError("connexion fermée par le service")
+        request_id, status, length = _RESPONSE.unpack(header)
+        data = _read_exactly(self._reader, length)
+        if data is None:
+            raise ConnectionError("connexion fermée par le service")
+        return request_id, status, data
+
+    def _pipeline(self, operation, operation_mode, payloads):
+        """
+        Cette fonction envoie toutes les requêtes sans attendre les réponses (depuis un thread, pour ne pas
+        bloquer si le service répond avant la fin de l'envoi) puis rassemble les réponses.
+        """
+        frames = [self._frame(operation, operation_mode, payload) for payload in payloads]
+        sender = threading.Thread(target=self._socket.sendall, args=(b"".join(frame for _, frame in frames),))
+        sender.start()
+        responses = dict()
+        try:
+            while len(responses) < len(frames):
+                request_id, status, data = self._receive()
+                responses[request_id] = (status, data)
+        finally:
+            sender.join()
+        results = list()
+        for request_id, _ in frames:
+            status, data = responses[request_id]
+            if status != STATUS_OK:
+                raise ValueError(data.decode())
+            results.append(data)
+        return results
+
+    def encrypt(self, operation_mode, payload):
+        """
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param payload: message à chiffrer (bytes)
+        :return: le message chiffré.
+        """
+        return self._pipeline(OP_ENCRYPT, operation_mode, [payload])[0]
+
+    def decrypt(self, operation_mode, payload):
+        """
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param payload: message chiffré (bytes)
+        :return: le message déchiffré (ValueError si le service le refuse).
+        """
+        return self._pipeline(OP_DECRYPT, operation_mode, [payload])[0]
+
+    def encrypt_many(self, operation_mode, payloads):
+        """
+        Cette fonction envoie tous les messages à la suite : le service peut les chiffrer en un seul lot.
+        :param operation_mode: string spécifiant le mode d'opération
+        :param payloads: liste de messages à chiffrer
+        :return: la liste des messages chiffrés.
+        """
+        return self._pipeline(OP_ENCRYPT, operation_mode, payloads)
+
+    def decrypt_many(self, operation_mode, payloads):
+        """
+        :param operation_mode: string spécifiant le mode d'opération
+        :param payloads: liste de messages chiffrés
+        :return: la liste des messages déchiffrés.
+        """
+        return self._pipeline(OP_DECRYPT, operation_mode, payloads)
+
+    def stats(self):
+        """
+        :return: les statistiques du service (voir GostDaemon.stats).
+        """
+        return json.loads(self._pipeline(OP_STATS, None, [b""])[0])
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,102 @@
+import os
+import stat
+import tempfile
+import threading
+import unittest
+
+from gost_batching import decrypt_many
+from gost_daemon import *
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostDaemon(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.daemon = GostDaemon(os.path.join(cls.directory.name, "gost.sock"), workers=1, max_delay=0.01,
+                                large_payload_size=4096).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.daemon.close()
+        assert not os.path.exists(cls.daemon.address)
+        cls.directory.cleanup()
+
+    def test_round_trip(self):
+        with GostClient(self.daemon.address, key) as client:
+            for mode in STREAM_MODES:
+                for size in (0, 5, 64, 10000):  # 10000 octets : traité dans le pool de processus
+                    data = os.urandom(size)
+                    encrypted = client.encrypt(mode, data)
+                    assert client.decrypt(mode, encrypted) == data
+                    assert decrypt_many([(gost_key_generator(key), mode, encrypted)]) == [data]
+
+    def test_batching(self):
+        payloads = [os.urandom(32) for _ in range(200)]
+        with GostClient(self.daemon.address, key) as client:
+            batches = client.stats()["batches"]
+            encrypted = client.encrypt_many("CTR", payloads)
+            assert client.stats()["batches"] - batches < 20
+            assert client.decrypt_many("CTR", encrypted) == payloads
+
+    def test_concurrent_clients(self):
+        errors = list()
+
+        def run(index):
+            try:
+                with GostClient(self.daemon.address, key ^ index) as client:
+                    for _ in range(10):
+                        data = os.urandom(40)
+                        assert client.decrypt("CBC", client.encrypt("CBC", data)) == data
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        stats = self.daemon.stats()
+        assert stats["cache"]["size"] >= 4
+        assert stats["latency_p50_ms"] <= stats["latency_p99_ms"]
+        assert stats["in_flight"] == 0
+
+    def test_errors(self):
+        with GostClient(self.daemon.address, key) as client:
+            with self.assertRaises(ValueError):
+                client.decrypt("CBC", bytes(12))
+            data = os.urandom(8)
+            assert client.decrypt("OFB", client.encrypt("OFB", data)) == data  # la connexion reste utilisable
+        assert self.daemon.stats()["errors"] >= 1
+
+    def test_socket_permissions(self):
+        assert stat.S_IMODE(os.stat(self.daemon.address).st_mode) == 0o600
+
+    def test_tcp(self):
+        with GostDaemon(("127.0.0.1", 0), workers=0).start() as daemon:
+            with GostClient(daemon.address, key, simple_key=False) as client:
+                assert client.decrypt("ECB", client.encrypt("ECB", b"tcp")) == b"tcp"
+                assert client.stats()["requests"] == 3
+
+    def test_pending_limit(self):
+        payloads = [os.urandom(100) for _ in range(50)]
+        with GostDaemon(("127.0.0.1", 0), workers=0, max_pending_requests=2, max_pending_bytes=250).start() as daemon:
+            with GostClient(daemon.address, key) as client:
+                assert client.decrypt_many("CFB", client.encrypt_many("CFB", payloads)) == payloads
+
+    def test_close_with_open_connection(self):
+        daemon = GostDaemon(("127.0.0.1", 0), workers=1, large_payload_size=16).start()
+        client = GostClient(daemon.address, key, timeout=10)
+        try:
+            daemon.executor.shutdown()  # pool inutilisable : la requête reçoit une erreur, sans bloquer le client
+            with self.assertRaises(ValueError):
+                client.encrypt("CTR", bytes(100))
+            daemon.close()  # la connexion encore ouverte ne bloque pas l'arrêt
+            with self.assertRaises((ConnectionError, OSError)):
+                client.encrypt("CTR", b"x")
+        finally:
+            client.close()
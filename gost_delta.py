@@ -0,0 +1,161 @@
+"""
+Ce fichier comprend le rechiffrement différentiel de gros fichiers qui changent peu d'une exécution
+à l'autre. Le texte clair est découpé en morceaux de taille fixe, chacun chiffré en CTR avec son
+propre nonce. Le fichier chiffré a la forme :
+
+    en-tête | morceaux chiffrés (même taille que le texte clair) | table (nonce, empreinte) par morceau
+
+Le CTR préservant la taille, le morceau i est toujours à la position HEADER + i * chunk_size : à
+l'exécution suivante, seuls les morceaux dont l'empreinte a changé sont rechiffrés et réécrits sur
+place, puis la table et l'en-tête sont mis à jour. Un morceau réécrit reçoit un nouveau nonce : le
+même flux de clé n'est jamais réutilisé pour deux contenus différents.
+
+Les empreintes sont des HMAC-SHA256 dont la clé est dérivée de la clé de chiffrement, pour ne pas
+révéler l'empreinte du texte clair ; elles sont vérifiées au déchiffrement.
+La mise à jour sur place n'est pas atomique : une exécution interrompue doit être relancée.
+"""
+import hashlib
+import hmac
+import os
+import struct
+from array import array
+
+import engines
+from gost_container import DEFAULT_CHUNK_SIZE
+from gost_feistel_function import S_BOX_RFC
+from key_generator import rdm_IV_generator
+from utilities import bytes_to_blocks, blocks_to_bytes, PADDING_ZERO
+
+FILE_MAGIC = b"GOSTDLT1"
+
+"""
+En-tête : signature, taille des morceaux, taille du texte clair et nombre de morceaux.
+"""
+_HEADER = struct.Struct(">8sIQQ")
+_ENTRY = struct.Struct(">Q32s")
+
+
+def _hash_key(key_array):
+    return hashlib.sha256(b"gost-delta" + array("I", key_array).tobytes()).digest()
+
+
+def chunk_digest(data, hash_key):
+    """
+    :return: l'empreinte (HMAC-SHA256) d'un morceau de texte clair.
+    """
+    return hmac.new(hash_key, data, hashlib.sha256).digest()
+
+
+def _ctr_chunk(data, nonce, key_array, engine, s_box):
+    blocks = bytes_to_blocks(data, PADDING_ZERO)
+    result = engines.get_engine(engine).ctr_blocks(blocks, nonce, key_array, s_box)
+    return bytes(blocks_to_bytes(result)[:len(data)])
+
+
+def read_index(file):
+    """
+    Cette fonction lit l'en-tête et la table d'un fichier chiffré par encrypt_file_delta.
+    :param file: objet fichier binaire permettant seek
+    :return: tuple (taille des morceaux, taille du texte clair, liste de (nonce, empreinte) par morceau).
+    """
+    file.seek(0)
+    data = file.read(_HEADER.size)
+    if len(data) != _HEADER.size:
+        raise ValueError("fichier différentiel GOST tronqué (en-tête incomplet)")
+    magic, chunk_size, plaintext_length, chunk_count = _HEADER.unpack(data)
+    if magic != FILE_MAGIC:
+        raise ValueError("le fichier n'est pas un fichier différentiel GOST")
+    if chunk_size <= 0 or chunk_count != -(-plaintext_length // chunk_size):
+        raise ValueError("en-tête de fichier différentiel invalide")
+    file.seek(_HEADER.size + plaintext_length)
+    table = file.read(chunk_count * _ENTRY.size)
+    if len(table) != chunk_count * _ENTRY.size:
+        raise ValueError("fichier différentiel GOST tronqué (table incomplète)")
+    return chunk_size, plaintext_length, [_ENTRY.unpack_from(table, i * _ENTRY.size) for i in range(chunk_count)]
+
+
+def _previous_entries(output_filename, chunk_size):
+    """
+    :return: la table du fichier chiffré existant, ou une liste vide s'il n'est pas réutilisable.
+    """
+    try:
+        with open(output_filename, "rb") as file:
+            previous_chunk_size, _, entries = read_index(file)
+    except (OSError, ValueError):
+        return list()
+    return entries if previous_chunk_size == chunk_size else list()
+
+
+def encrypt_file_delta(input_filename, output_filename, key_array, chunk_size=DEFAULT_CHUNK_SIZE, engine="table",
+                       s_box=S_BOX_RFC):
+    """
+    Cette fonction chiffre un fichier par morceaux. Si output_filename a déjà été produit avec la même
+    clé et la même taille de morceaux, seuls les morceaux modifiés sont rechiffrés et réécrits sur place.
+    :param input_filename: Nom du fichier à chiffrer
+    :param output_filename: Nom du fichier chiffré (mis à jour s'il existe)
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param chunk_size: taille des morceaux de texte clair
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: dictionnaire {"chunks", "rewritten"} : nombre total de morceaux et nombre de morceaux réécrits.
+    """
+    if chunk_size <= 0 or chunk_size % 8 != 0:
+        raise ValueError("chunk_size doit être un multiple positif de 8")
+    previous = _previous_entries(output_filename, chunk_size)
+    hash_key = _hash_key(key_array)
+    entries = list()
+    rewritten = 0
+    length = 0
+    with open(input_filename, "rb") as source, \
+            open(output_filename, "r+b" if os.path.exists(output_filename) else "w+b") as destination:
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            index = len(entries)
+            digest = chunk_digest(data, hash_key)
+            if index < len(previous) and hmac.compare_digest(previous[index][1], digest):
+                entries.append(previous[index])  # morceau inchangé, ni lu ni réécrit dans la sortie
+            else:
+                nonce = rdm_IV_generator()
+                destination.seek(_HEADER.size + length)
+                destination.write(_ctr_chunk(data, nonce, key_array, engine, s_box))
+                entries.append((nonce, digest))
+                rewritten += 1
+            length += len(data)
+            if len(data) < chunk_size:
+                break
+        destination.seek(_HEADER.size + length)
+        destination.write(b"".join(_ENTRY.pack(nonce, digest) for nonce, digest in entries))
+        destination.truncate()
+        destination.seek(0)
+        destination.write(_HEADER.pack(FILE_MAGIC, chunk_size, length, len(entries)))
+    return {"chunks": len(entries), "rewritten": rewritten}
+
+
+def decrypt_file_delta(input_filename, output_filename, key_array, engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction déchiffre un fichier produit par encrypt_file_delta et vérifie l'empreinte de chaque
+    morceau. En cas d'empreinte invalide, le fichier déchiffré est supprimé et une ValueError est levée.
+    :param input_filename: le nom du fichier chiffré.
+    :param output_filename: le nom du fichier déchiffré
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    """
+    hash_key = _hash_key(key_array)
+    with open(input_filename, "rb") as source:
+        chunk_size, plaintext_length, entries = read_index(source)
+        try:
+            with open(output_filename, "wb") as destination:
+                source.seek(_HEADER.size)
+                for index, (nonce, digest) in enumerate(entries):
+                    data = source.read(min(chunk_size, plaintext_length - index * chunk_size))
+                    plain = _ctr_chunk(data, nonce, key_array, engine, s_box)
+                    if not hmac.compare_digest(chunk_digest(plain, hash_key), digest):
+                        raise ValueError("empreinte invalide pour le morceau {} : le fichier a été modifié".format(
+                            index))
+                    destination.write(plain)
+        except ValueError:
+            os.remove(output_filename)
+            raise
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from gost_delta import *
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.directory = tempfile.TemporaryDirectory()
+        self.plain_name = os.path.join(self.directory.name, "plain.bin")
+        self.cypher_name = os.path.join(self.directory.name, "cypher.bin")
+        self.result_name = os.path.join(self.directory.name, "result.bin")
+        self.data = bytearray(os.urandom(10000))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _encrypt(self, chunk_size=1024):
+        with open(self.plain_name, "wb") as file:
+            file.write(self.data)
+        summary = encrypt_file_delta(self.plain_name, self.cypher_name, self.keys, chunk_size)
+        decrypt_file_delta(self.cypher_name, self.result_name, self.keys)
+        with open(self.result_name, "rb") as file:
+            assert file.read() == self.data
+        return summary
+
+    def _nonces(self):
+        with open(self.cypher_name, "rb") as file:
+            return [nonce for nonce, digest in read_index(file)[2]]
+
+    def test_incremental(self):
+        assert self._encrypt() == {"chunks": 10, "rewritten": 10}
+        assert self._encrypt() == {"chunks": 10, "rewritten": 0}
+        nonces = self._nonces()
+        self.data[5000:5010] = b"0123456789"
+        assert self._encrypt() == {"chunks": 10, "rewritten": 1}
+        new_nonces = self._nonces()
+        assert new_nonces[4] != nonces[4]  # nouveau flux de clé pour le morceau modifié
+        assert new_nonces[:4] + new_nonces[5:] == nonces[:4] + nonces[5:]
+
+    def test_grow_and_shrink(self):
+        self._encrypt()
+        self.data += os.urandom(1500)
+        assert self._encrypt() == {"chunks": 12, "rewritten": 3}
+        del self.data[3000:]
+        assert self._encrypt() == {"chunks": 3, "rewritten": 1}
+        assert os.path.getsize(self.cypher_name) == 28 + 3000 + 3 * 40
+        self.data = bytearray()
+        assert self._encrypt() == {"chunks": 0, "rewritten": 0}
+
+    def test_chunk_size_change(self):
+        self._encrypt()
+        assert self._encrypt(chunk_size=512)["rewritten"] == 20
+
+    def test_tampering(self):
+        self._encrypt()
+        with open(self.cypher_name, "r+b") as file:
+            file.seek(2000)
+            byte = file.read(1)
+            file.seek(2000)
+            file.write(bytes([byte[0] ^ 1]))
+        with self.assertRaises(ValueError):
+            decrypt_file_delta(self.cypher_name, self.result_name, self.keys)
+        assert not os.path.exists(self.result_name)
@@ -65,3 +65,54 @@ def gost_feistel_function(key, data, s_box=S_BOX_RFC):
     apply_sb = apply_sbox(apply_mod, s_box)
     apply_shift = shift_left(apply_sb, 32, 11)
     return apply_shift
+
+
+"""
+Cache des tables compilées, indexé par le contenu du jeu de S-box.
+"""
+_SBOX_TABLES_CACHE = {}
+
+
+def compile_sbox_tables(s_box=S_BOX_RFC):
+    """
+    Cette fonction précalcule quatre tables de 256 entrées (une par octet du mot de 32 bits)
+    dans lesquelles la substitution par les S-box et la rotation de 11 bits vers la gauche
+    sont déjà appliquées. Un round se résume alors à quatre lectures de table et trois OU.
+    Les tables sont mises en cache pour chaque jeu de S-box.
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: tuple de 4 listes de 256 entiers de 32 bits. La table i traite l'octet de poids i
+        (table 0 = octet de poids faible).
+    """
+    cache_key = tuple(tuple(row) for row in s_box)
+    tables = _SBOX_TABLES_CACHE.get(cache_key)
+    if tables is not None:
+        return tables
+
+    tables = []
+    for byte_index in range(4):
+        shift_value = 8 * byte_index
+        high_sbox = s_box[7 - (2 * byte_index + 1)]  # S-box du quartet de poids fort de l'octet
+        low_sbox = s_box[7 - 2 * byte_index]  # S-box du quartet de poids faible de l'octet
+        table = list()
+        for byte in range(256):
+            substituted = (high_sbox[byte >> 4] << 4 | low_sbox[byte & 0xF]) << shift_value
+            table.append(shift_left(substituted, 32, 11))  # on intègre la rotation de 11 bits
+        tables.append(table)
+
+    tables = tuple(tables)
+    _SBOX_TABLES_CACHE[cache_key] = tables
+    return tables
+
+
+def gost_feistel_function_table(key, data, tables):
+    """
+    Cette fonction est équivalente à gost_feistel_function mais utilise les tables
+    précalculées par compile_sbox_tables.
+    :param key: La clé de 32 bits locale au round.
+    :param data: Les 32 bits de données sur lesquels appliquer la fonction de Feistel
+    :param tables: Les 4 tables retournées par compile_sbox_tables
+    :return: Les 32 bits transformés suivant la fonction de Feistel
+    """
+    apply_mod = (data + key) & 0xFFFFFFFF
+    return (tables[0][apply_mod & 0xFF] | tables[1][apply_mod >> 8 & 0xFF] |
+            tables[2][apply_mod >> 16 & 0xFF] | tables[3][apply_mod >> 24])
@@ -46,3 +46,17 @@ class TestSBOX(unittest.TestCase):
             expected >>= 4
             assert expected == data_out
             data_ind = (data_ind + 1) % 16
+
+    def test_feistel_function_table_RFC(self):
+        tables = compile_sbox_tables(S_BOX_RFC)
+        for data in (0, 1, 0xFFFFFFFF, 0x12345678, 0xDEADBEEF, 0x0F0F0F0F):
+            for key in (0, 0xFFFFFFFF, 0xA5A5A5A5):
+                assert gost_feistel_function(key, data) == gost_feistel_function_table(key, data, tables)
+
+    def test_feistel_function_table_BANK(self):
+        tables = compile_sbox_tables(S_BOX_BANK)
+        for data in range(0, 2 ** 32, 0x01010101 * 3):
+            assert gost_feistel_function(0x1234, data, S_BOX_BANK) == gost_feistel_function_table(0x1234, data, tables)
+
+    def test_compile_sbox_tables_cache(self):
+        assert compile_sbox_tables(S_BOX_RFC) is compile_sbox_tables([list(row) for row in S_BOX_RFC])
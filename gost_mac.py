@@ -0,0 +1,109 @@
+"""
+Ce fichier comprend le code d'authentification GOST (imitovstavka) : chaque bloc de texte clair est
+XORé avec l'état courant puis transformé par 16 rounds du GOST (clés K1..K8 deux fois, soit les 16
+premières clés de rounds), sans swap final particulier. Le code retenu est formé des 32 bits de poids
+faible de l'état final.
+
+Le calcul se fait sur le texte clair au fil du chiffrement : aucune seconde lecture n'est nécessaire.
+Le dernier bloc partiel est complété par des zéros, puis un bloc contenant la taille du texte clair
+(en octets) est ajouté pour que deux messages ne différant que par des zéros finaux aient des codes
+différents.
+"""
+import hmac
+
+from gost_feistel_function import S_BOX_RFC, compile_sbox_tables
+from utilities import bytes_to_blocks
+
+MAC_ROUNDS = 16
+
+"""
+Taille du code d'authentification (en octets).
+"""
+MAC_SIZE = 4
+
+
+def imito_rounds(block, key_array, tables):
+    """
+    Cette fonction applique les 16 rounds réduits du GOST (avec swap à chaque round) sur un bloc de 64 bits.
+    :param block: bloc de 64 bits à transformer
+    :param key_array: liste ordonnée des clés locales (seules les 16 premières sont utilisées)
+    :param tables: tables précalculées (compile_sbox_tables)
+    :return: Le bloc de 64 bits transformé.
+    """
+    t0, t1, t2, t3 = tables
+    right = block & 0xFFFFFFFF
+    left = block >> 32
+    for i in range(MAC_ROUNDS):
+        x = (right + key_array[i]) & 0xFFFFFFFF
+        left, right = right, left ^ (t0[x & 0xFF] | t1[x >> 8 & 0xFF] | t2[x >> 16 & 0xFF] | t3[x >> 24])
+    return left << 32 | right
+
+
+class GostMAC:
+    """
+    Calcul incrémental de l'imitovstavka : update() reçoit le texte clair par morceaux quelconques.
+    """
+
+    def __init__(self, key_array, s_box=S_BOX_RFC):
+        """
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        """
+        self.key_array = key_array
+        self.tables = compile_sbox_tables(s_box)
+        self.state = 0
+        self.length = 0
+        self._buffer = b""
+
+    def update_blocks(self, blocks):
+        """
+        :param blocks: blocs de 64 bits de texte clair (liste, array('Q') ou memoryview de format 'Q')
+        """
+        if self._buffer:
+            raise ValueError("update_blocks nécessite des données alignées sur 8 octets")
+        state, key_array, tables = self.state, self.key_array, self.tables
+        for block in blocks:
+            state = imito_rounds(state ^ block, key_array, tables)
+        self.state = state
+        self.length += 8 * len(blocks)
+
+    def update(self, data):
+        """
+        :param data: octets de texte clair
+        """
+        data = self._buffer + bytes(data)
+        full = len(data) - len(data) % 8
+        self._buffer = b""
+        self.update_blocks(bytes_to_blocks(memoryview(data)[:full]))
+        self._buffer = data[full:]  # le reste est traité par digest()
+
+    def digest(self):
+        """
+        :return: le code d'authentification (MAC_SIZE octets). L'état n'est pas modifié.
+        """
+        state, length = self.state, self.length
+        if self._buffer:
+            state = imito_rounds(state ^ int.from_bytes(self._buffer.ljust(8, b"\x00"), "big"), self.key_array,
+                                 self.tables)
+            length += len(self._buffer)
+        state = imito_rounds(state ^ length, self.key_array, self.tables)
+        return (state & (1 << 8 * MAC_SIZE) - 1).to_bytes(MAC_SIZE, "big")
+
+    def verify(self, tag):
+        """
+        :param tag: code d'authentification reçu
+        :return: True si le code correspond aux données reçues (comparaison en temps constant).
+        """
+        return hmac.compare_digest(self.digest(), bytes(tag))
+
+
+def mac(data, key_array, s_box=S_BOX_RFC):
+    """
+    :param data: octets de texte clair
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: le code d'authentification de data.
+    """
+    authenticator = GostMAC(key_array, s_box)
+    authenticator.update(data)
+    return authenticator.digest()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import gost
+from gost_feistel_function import compile_sbox_tables
+from gost_mac import *
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostMAC(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+
+    def test_imito_rounds_reference(self):
+        block = 0x0123456789ABCDEF
+        expected = block
+        for i in range(16):
+            expected = gost.feistel(expected, self.keys[i], swap=True)
+        assert imito_rounds(block, self.keys, compile_sbox_tables()) == expected
+
+    def test_incremental(self):
+        data = os.urandom(1000)
+        authenticator = GostMAC(self.keys)
+        for i in range(0, len(data), 13):
+            authenticator.update(data[i:i + 13])
+        assert authenticator.digest() == mac(data, self.keys)
+        assert authenticator.verify(mac(data, self.keys))
+        assert len(authenticator.digest()) == MAC_SIZE
+
+    def test_trailing_zeros(self):
+        assert mac(b"abc", self.keys) != mac(b"abc\x00", self.keys)
+        assert mac(b"abc", self.keys) != mac(b"abd", self.keys)
+
+    def test_encrypt_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain_name = os.path.join(directory, "plain.txt")
+            cypher_name = os.path.join(directory, "cypher.bin")
+            result_name = os.path.join(directory, "result.txt")
+            with open(plain_name, "w") as file:
+                file.write("Message authentifié " * 20)
+            for mode in ("ECB", "CBC", "CTR"):
+                keys = gost.encrypt_file(plain_name, cypher_name, mode, mac=True)
+                gost.decrypt_file(cypher_name, result_name, keys, mode, mac=True)
+                with open(plain_name) as expected, open(result_name) as result:
+                    assert expected.read() == result.read().rstrip("\x00")
+
+                with open(cypher_name, "r+b") as file:
+                    file.seek(20)
+                    byte = file.read(1)
+                    file.seek(20)
+                    file.write(bytes([byte[0] ^ 1]))
+                with self.assertRaises(ValueError):
+                    gost.decrypt_file(cypher_name, result_name, keys, mode, mac=True)
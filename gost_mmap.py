@@ -0,0 +1,146 @@
+"""
+Ce fichier comprend le chiffrement de fichiers par projection en mémoire (mmap) : le fichier d'entrée
+est projeté en lecture seule et le fichier de sortie est créé à sa taille finale puis projeté en
+écriture. Les blocs sont lus et écrits par tranches directement dans les projections ; aucune copie
+du fichier entier n'est faite et le cache de pages du système gère la résidence en mémoire.
+
+Le format est celui de gost_stream (vecteur initial en tête hors ECB, remplissage PKCS#7 pour ECB et
+CBC, dernier bloc partiel tronqué pour CTR, CFB et OFB) : les fichiers sont interchangeables avec
+encrypt_file_stream et decrypt_file_stream (sans code d'authentification).
+"""
+from gost import decrypt_block, generate_key_array
+from gost_feistel_function import S_BOX_RFC, compile_sbox_tables
+from gost_stream import StreamEncryptor, StreamDecryptor, KEYSTREAM_MODES
+from key_generator import rdm_IV_generator
+from utilities import bytes_to_blocks, blocks_to_bytes_into, map_file, create_mapped_file, close_mapping, \
+    pad_pkcs7, unpad_pkcs7
+
+"""
+Nombre de blocs traités par tranche (1 Mio).
+"""
+DEFAULT_SLICE_BLOCKS = 1 << 17
+
+
+def _header_size(operation_mode):
+    return 0 if operation_mode == "ECB" else 8
+
+
+def encrypted_size(plain_size, operation_mode):
+    """
+    :param plain_size: taille du texte clair (en octets)
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :return: la taille du fichier chiffré.
+    """
+    if operation_mode in KEYSTREAM_MODES:
+        return plain_size + 8
+    return _header_size(operation_mode) + (plain_size // 8 + 1) * 8
+
+
+def _process(cipher, source, source_offset, destination, destination_offset, n_blocks, slice_blocks):
+    """
+    Cette fonction transforme n_blocks blocs de la projection source vers la projection destination,
+    par tranches de slice_blocks blocs.
+    """
+    for start in range(0, n_blocks, slice_blocks):
+        count = min(slice_blocks, n_blocks - start)
+        offset = 8 * start
+        with memoryview(source) as view:
+            blocks = bytes_to_blocks(view[source_offset + offset:source_offset + offset + 8 * count])
+        blocks_to_bytes_into(cipher.process_blocks(blocks), destination, destination_offset + offset)
+
+
+def encrypt_file_mmap(input_filename, output_filename, operation_mode="CTR", simple_key=True, key_array=None,
+                      slice_blocks=DEFAULT_SLICE_BLOCKS, engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction chiffre un fichier par projection en mémoire.
+    :param input_filename: Nom du fichier à chiffrer
+    :param output_filename: Nom du fichier chiffré
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+    :param key_array: liste des 32 clés de rounds à utiliser (générée aléatoirement si None)
+    :param slice_blocks: nombre de blocs traités par tranche
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: La clé utilisée pour le chiffrement.
+    """
+    if key_array is None:
+        key_array = generate_key_array(simple_key)
+    source = map_file(input_filename)
+    try:
+        plain_size = len(source)
+        n_blocks = plain_size // 8
+        header_size = _header_size(operation_mode)
+        destination = create_mapped_file(output_filename, encrypted_size(plain_size, operation_mode))
+        try:
+            with StreamEncryptor(key_array, operation_mode, engine, s_box, iv=rdm_IV_generator()) as encryptor:
+                if header_size:
+                    destination[:8] = encryptor.iv.to_bytes(8, "big")
+                _process(encryptor, source, 0, destination, header_size, n_blocks, slice_blocks)
+                tail = bytes(source[8 * n_blocks:])
+                if operation_mode in KEYSTREAM_MODES:
+                    destination[header_size + 8 * n_blocks:] = encryptor.process_tail(tail)
+                else:
+                    last = encryptor.process_blocks(bytes_to_blocks(pad_pkcs7(tail)))
+                    blocks_to_bytes_into(last, destination, header_size + 8 * n_blocks)
+        finally:
+            close_mapping(destination)
+    finally:
+        close_mapping(source)
+    return key_array
+
+
+def _padding_length(source, key_array, operation_mode, s_box):
+    """
+    Cette fonction déchiffre le dernier bloc (ECB et CBC) pour connaître la taille du remplissage,
+    et donc la taille finale du fichier déchiffré, avant de créer celui-ci.
+    """
+    header_size = _header_size(operation_mode)
+    if len(source) < header_size + 8 or (len(source) - header_size) % 8:
+        raise ValueError("la taille du texte chiffré n'est pas un multiple de 8 octets")
+    last = decrypt_block(int.from_bytes(source[-8:], "big"), key_array, compile_sbox_tables(s_box))
+    if operation_mode == "CBC":
+        last ^= int.from_bytes(source[-16:-8], "big")
+    block = last.to_bytes(8, "big")
+    return 8 - len(unpad_pkcs7(block))
+
+
+def decrypt_file_mmap(input_filename, output_filename, key, operation_mode="CTR", slice_blocks=DEFAULT_SLICE_BLOCKS,
+                      engine="table", s_box=S_BOX_RFC):
+    """
+    Cette fonction déchiffre par projection en mémoire un fichier chiffré par encrypt_file_mmap
+    ou gost_stream.encrypt_file_stream.
+    :param input_filename: le nom du fichier chiffré.
+    :param output_filename: le nom du fichier déchiffré
+    :param key: La liste des 32 clés de rounds utilisée pour chiffrer le fichier.
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param slice_blocks: nombre de blocs traités par tranche
+    :param engine: nom du moteur utilisé
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    """
+    source = map_file(input_filename)
+    try:
+        header_size = _header_size(operation_mode)
+        if len(source) < header_size:
+            raise ValueError("le texte chiffré ne contient pas de vecteur initial")
+        iv = int.from_bytes(source[:8], "big") if header_size else None
+        data_size = len(source) - header_size
+        if operation_mode in KEYSTREAM_MODES:
+            plain_size = data_size
+            n_blocks = data_size // 8
+        else:
+            plain_size = data_size - _padding_length(source, key, operation_mode, s_box)
+            n_blocks = data_size // 8 - 1  # le dernier bloc est traité à part
+        destination = create_mapped_file(output_filename, plain_size)
+        try:
+            with StreamDecryptor(key, operation_mode, engine, s_box, iv=iv) as decryptor:
+                _process(decryptor, source, header_size, destination, 0, n_blocks, slice_blocks)
+                end = header_size + 8 * n_blocks
+                if operation_mode in KEYSTREAM_MODES:
+                    destination[8 * n_blocks:] = decryptor.process_tail(bytes(source[end:]))
+                else:
+                    last = decryptor.process_blocks(bytes_to_blocks(source[end:end + 8]))
+                    destination[8 * n_blocks:] = last[0].to_bytes(8, "big")[:plain_size - 8 * n_blocks]
+        finally:
+            close_mapping(destination)
+    finally:
+        close_mapping(source)
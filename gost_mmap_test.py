@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from gost_mmap import *
+from gost_stream import STREAM_MODES, encrypt_file_stream, decrypt_file_stream
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestGostMmap(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.directory = tempfile.TemporaryDirectory()
+        self.plain_name = self._path("plain.bin")
+        self.cypher_name = self._path("cypher.bin")
+        self.result_name = self._path("result.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def _write(self, data):
+        with open(self.plain_name, "wb") as file:
+            file.write(data)
+
+    def _read(self, name):
+        with open(name, "rb") as file:
+            return file.read()
+
+    def test_round_trip(self):
+        for size in (0, 5, 8, 1000, 4099):
+            data = os.urandom(size)
+            self._write(data)
+            for mode in STREAM_MODES:
+                keys = encrypt_file_mmap(self.plain_name, self.cypher_name, mode, slice_blocks=64)
+                assert os.path.getsize(self.cypher_name) == encrypted_size(size, mode)
+                decrypt_file_mmap(self.cypher_name, self.result_name, keys, mode, slice_blocks=100)
+                assert self._read(self.result_name) == data
+
+    def test_stream_compatible(self):
+        data = os.urandom(3001)
+        self._write(data)
+        for mode in STREAM_MODES:
+            keys = encrypt_file_mmap(self.plain_name, self.cypher_name, mode)
+            decrypt_file_stream(self.cypher_name, self.result_name, keys, mode, chunk_size=256)
+            assert self._read(self.result_name) == data
+            encrypt_file_stream(self.plain_name, self.cypher_name, mode, key_array=self.keys, chunk_size=256)
+            decrypt_file_mmap(self.cypher_name, self.result_name, self.keys, mode, slice_blocks=50)
+            assert self._read(self.result_name) == data
+
+    def test_bad_size(self):
+        with open(self.cypher_name, "wb") as file:
+            file.write(b"\x00" * 13)
+        with self.assertRaises(ValueError):
+            decrypt_file_mmap(self.cypher_name, self.result_name, self.keys, "CBC")
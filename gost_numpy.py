@@ -0,0 +1,153 @@
+"""
+Ce fichier comprend un moteur GOST vectorisé avec NumPy. Les 32 rounds sont appliqués
+simultanément sur un tableau de blocs de 64 bits (uint64) : addition modulo 2^32,
+substitution par lecture dans les tables de S-box (compile_sbox_tables) et XOR.
+Les résultats sont identiques à ceux de gost.encrypt et gost.decrypt.
+"""
+import numpy as np
+
+from gost_feistel_function import S_BOX_RFC, compile_sbox_tables
+
+"""
+Nombre de blocs traités par passe, pour limiter la taille des tableaux intermédiaires.
+"""
+CHUNK_BLOCKS = 1 << 18
+
+_NP_TABLES_CACHE = {}
+
+
+def _np_tables(s_box):
+    """
+    Cette fonction convertit les tables de compile_sbox_tables en tableaux uint32 (mises en cache).
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: tuple de 4 tableaux uint32 de 256 entrées.
+    """
+    tables = compile_sbox_tables(s_box)
+    np_tables = _NP_TABLES_CACHE.get(id(tables))
+    if np_tables is None:
+        np_tables = tuple(np.array(table, dtype=np.uint32) for table in tables)
+        _NP_TABLES_CACHE[id(tables)] = np_tables
+    return np_tables
+
+
+def to_blocks_array(data):
+    """
+    Cette fonction convertit des blocs en tableau uint64.
+    :param data: tableau NumPy, liste d'entiers de 64 bits ou buffer d'octets (bytes, bytearray, memoryview)
+        dont la taille est un multiple de 8. Les octets sont interprétés en big-endian.
+    :return: tableau NumPy uint64 à une dimension.
+    """
+    if isinstance(data, np.ndarray):
+        return data.astype(np.uint64, copy=False).reshape(-1)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        if len(data) % 8 != 0:
+            raise ValueError("la taille du buffer doit être un multiple de 8 octets")
+        return np.frombuffer(data, dtype=">u8").astype(np.uint64)
+    return np.array(data, dtype=np.uint64).reshape(-1)
+
+
+def blocks_array_to_bytes(blocks):
+    """
+    Cette fonction convertit un tableau de blocs de 64 bits en octets big-endian.
+    :param blocks: tableau NumPy uint64
+    :return: les octets correspondants (bytes).
+    """
+    return np.asarray(blocks, dtype=np.uint64).astype(">u8").tobytes()
+
+
+def _as_input_kind(result, data):
+    """
+    Cette fonction retourne le résultat sous la même forme que l'entrée (liste si l'entrée est une liste).
+    """
+    if isinstance(data, list):
+        return result.tolist()
+    return result
+
+
+def _apply_rounds(blocks, round_keys, np_tables):
+    """
+    Cette fonction applique les 32 rounds du GOST sur un tableau de blocs.
+    :param blocks: tableau uint64
+    :param round_keys: liste des 32 clés locales dans l'ordre d'application des rounds
+    :param np_tables: tables retournées par _np_tables
+    :return: tableau uint64 des blocs transformés.
+    """
+    t0, t1, t2, t3 = np_tables
+    out = np.empty_like(blocks)
+    for start in range(0, len(blocks), CHUNK_BLOCKS):
+        chunk = blocks[start:start + CHUNK_BLOCKS]
+        right = (chunk & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        left = (chunk >> np.uint64(32)).astype(np.uint32)
+        for i in range(32):
+            x = right + np.uint32(round_keys[i])  # addition modulo 2^32 (débordement des uint32)
+            f = t0[x & 0xFF]
+            f |= t1[(x >> 8) & 0xFF]
+            f |= t2[(x >> 16) & 0xFF]
+            f |= t3[x >> 24]
+            f ^= left
+            if i < 31:
+                left, right = right, f
+            else:  # le dernier round se fait sans swap
+                left = f
+        out[start:start + CHUNK_BLOCKS] = (left.astype(np.uint64) << np.uint64(32)) | right.astype(np.uint64)
+    return out
+
+
+def encrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    """
+    Cette fonction chiffre indépendamment chaque bloc (équivalent de gost.encryptECB).
+    :param blocks: blocs à chiffrer (voir to_blocks_array)
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: les blocs chiffrés (liste si l'entrée est une liste, tableau uint64 sinon).
+    """
+    result = _apply_rounds(to_blocks_array(blocks), key_array, _np_tables(s_box))
+    return _as_input_kind(result, blocks)
+
+
+def decrypt_blocks(blocks, key_array, s_box=S_BOX_RFC):
+    """
+    Cette fonction déchiffre indépendamment chaque bloc (équivalent de gost.decryptECB).
+    :param blocks: blocs à déchiffrer (voir to_blocks_array)
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: les blocs déchiffrés (liste si l'entrée est une liste, tableau uint64 sinon).
+    """
+    result = _apply_rounds(to_blocks_array(blocks), key_array[::-1], _np_tables(s_box))
+    return _as_input_kind(result, blocks)
+
+
+def ctr_blocks(blocks, iv, key_array, s_box=S_BOX_RFC, start=0):
+    """
+    Cette fonction applique le flux de clé CTR aux blocs donnés. Les compteurs (iv ^ ct) sont
+    générés de manière vectorisée à partir de la position start.
+    :param blocks: blocs à chiffrer ou déchiffrer, sans le vecteur d'initialisation
+    :param iv: vecteur d'initialisation de 64 bits
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :param start: valeur du compteur pour le premier bloc
+    :return: les blocs transformés (liste si l'entrée est une liste, tableau uint64 sinon).
+    """
+    data = to_blocks_array(blocks)
+    counters = np.arange(start, start + len(data), dtype=np.uint64) ^ np.uint64(iv)
+    result = data ^ _apply_rounds(counters, key_array, _np_tables(s_box))
+    return _as_input_kind(result, blocks)
+
+
+def cbc_decrypt_blocks(blocks, iv, key_array, s_box=S_BOX_RFC):
+    """
+    Cette fonction déchiffre des blocs CBC en une seule passe vectorisée : chaque bloc
+    déchiffré est XORé avec le bloc chiffré précédent.
+    :param blocks: blocs chiffrés, sans le vecteur d'initialisation
+    :param iv: vecteur d'initialisation (ou dernier bloc chiffré précédent) de 64 bits
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :return: les blocs déchiffrés (liste si l'entrée est une liste, tableau uint64 sinon).
+    """
+    data = to_blocks_array(blocks)
+    previous = np.empty_like(data)
+    if len(data):
+        previous[0] = iv
+        previous[1:] = data[:-1]
+    result = _apply_rounds(data, key_array[::-1], _np_tables(s_box)) ^ previous
+    return _as_input_kind(result, blocks)
@@ -0,0 +1,58 @@
+import unittest
+from random import getrandbits
+
+from gost import encrypt, decrypt, encrypt_block
+from gost_feistel_function import S_BOX_BANK, compile_sbox_tables
+from key_generator import gost_key_generator
+from utilities import _64bits_block_to_bytearray
+
+try:
+    import numpy as np
+    import gost_numpy
+except ImportError:
+    np = None
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+@unittest.skipUnless(np is not None, "NumPy n'est pas installé")
+class TestGostNumpy(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.blocks = [getrandbits(64) for _ in range(50)] + [0, 2 ** 64 - 1]
+
+    def test_ecb_list(self):
+        assert gost_numpy.encrypt_blocks(self.blocks, self.keys) == encrypt(self.blocks, self.keys)
+        assert gost_numpy.decrypt_blocks(encrypt(self.blocks, self.keys), self.keys) == self.blocks
+
+    def test_ecb_bytes(self):
+        data = bytes(_64bits_block_to_bytearray(self.blocks))
+        result = gost_numpy.encrypt_blocks(data, self.keys)
+        assert isinstance(result, np.ndarray)
+        expected = bytes(_64bits_block_to_bytearray(encrypt(self.blocks, self.keys)))
+        assert gost_numpy.blocks_array_to_bytes(result) == expected
+
+    def test_ctr(self):
+        cypher = encrypt(self.blocks, self.keys, "CTR")
+        assert gost_numpy.ctr_blocks(cypher[1:], cypher[0], self.keys) == decrypt(cypher, self.keys, "CTR")
+
+    def test_cbc_decrypt(self):
+        cypher = encrypt(self.blocks, self.keys, "CBC")
+        assert gost_numpy.cbc_decrypt_blocks(cypher[1:], cypher[0], self.keys) == self.blocks
+
+    def test_sbox_bank(self):
+        tables = compile_sbox_tables(S_BOX_BANK)
+        expected = [encrypt_block(block, self.keys, tables) for block in self.blocks]
+        assert gost_numpy.encrypt_blocks(self.blocks, self.keys, S_BOX_BANK) == expected
+
+    def test_chunks(self):
+        blocks = np.arange(1000, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        chunk_blocks = gost_numpy.CHUNK_BLOCKS
+        gost_numpy.CHUNK_BLOCKS = 64
+        try:
+            chunked = gost_numpy.encrypt_blocks(blocks, self.keys)
+        finally:
+            gost_numpy.CHUNK_BLOCKS = chunk_blocks
+        assert (chunked == gost_numpy.encrypt_blocks(blocks, self.keys)).all()
+        assert chunked.tolist() == encrypt(blocks.tolist(), self.keys)
@@ -0,0 +1,172 @@
+"""
+Ce fichier comprend un moteur de chiffrement parallèle basé sur un ProcessPoolExecutor persistant.
+Les modes parallélisables (ECB, CTR, déchiffrements CBC et CFB) sont découpés en grands morceaux
+contigus. Les blocs sont partagés avec les processus via multiprocessing.shared_memory
+(aucune liste d'entiers n'est sérialisée) et chaque processus réécrit son morceau en place,
+ce qui garantit l'ordre des résultats.
+"""
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import engines
+from gost_feistel_function import S_BOX_RFC
+from key_generator import rdm_IV_generator
+
+"""
+Nombre de blocs en dessous duquel le traitement reste dans le processus courant.
+"""
+DEFAULT_THRESHOLD_BLOCKS = 1 << 14
+
+"""
+Taille minimale d'un morceau envoyé à un processus (en blocs).
+"""
+MIN_CHUNK_BLOCKS = 1 << 12
+
+
+def _process_chunk(shm_name, start, count, operation, key_array, s_box, engine_name, iv, previous):
+    """
+    Cette fonction est exécutée dans un processus du pool : elle transforme en place les blocs
+    [start, start + count[ de la mémoire partagée.
+    :param shm_name: nom du segment de mémoire partagée
+    :param start: indice du premier bloc du morceau
+    :param count: nombre de blocs du morceau
+    :param operation: "encrypt", "decrypt", "ctr", "cbc_decrypt" ou "cfb_decrypt"
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param s_box: s_box utilisée sous la forme de liste de liste
+    :param engine_name: nom du moteur utilisé dans le processus
+    :param iv: vecteur d'initialisation (CTR)
+    :param previous: bloc chiffré précédant le morceau (déchiffrements CBC et CFB)
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # les vues sont libérées même en cas d'erreur, sinon shm.close() lève BufferError
+        with shm.buf.cast("Q") as view, view[start:start + count] as chunk:
+            blocks = chunk.tolist()
+            engine = engines.get_engine(engine_name)
+            if operation == "encrypt":
+                result = engine.encrypt_blocks(blocks, key_array, s_box)
+            elif operation == "decrypt":
+                result = engine.decrypt_blocks(blocks, key_array, s_box)
+            elif operation == "ctr":
+                result = engine.ctr_blocks(blocks, iv, key_array, s_box, start)
+            elif operation == "cfb_decrypt":
+                gamma = engine.encrypt_blocks([previous] + blocks[:-1], key_array, s_box)
+                result = [block ^ g for block, g in zip(blocks, gamma)]
+            else:
+                decrypted_blocks = engine.decrypt_blocks(blocks, key_array, s_box)
+                result = [block ^ prev for block, prev in zip(decrypted_blocks, [previous] + blocks[:-1])]
+            chunk[:] = array("Q", result)
+    finally:
+        shm.close()
+
+
+class ParallelEngine:
+    """
+    Moteur de chiffrement parallèle réutilisable. Le pool de processus est créé au premier
+    usage et conservé jusqu'à l'appel de close().
+    """
+
+    def __init__(self, workers=None, threshold=DEFAULT_THRESHOLD_BLOCKS, engine="table"):
+        """
+        :param workers: nombre de processus (par défaut, le nombre de cœurs)
+        :param threshold: nombre de blocs en dessous duquel on reste dans le processus courant
+        :param engine: nom du moteur (voir engines.py) utilisé dans chaque processus
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.engine = engine
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        """
+        Cette fonction arrête le pool de processus.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _use_pool(self, n_blocks):
+        return self.workers > 1 and n_blocks >= self.threshold
+
+    def _run(self, blocks, operation, key_array, s_box, iv=0):
+        """
+        Cette fonction découpe les blocs en morceaux contigus, les fait traiter par le pool
+        et retourne les résultats dans l'ordre.
+        """
+        n_blocks = len(blocks)
+        if n_blocks == 0:  # un segment de mémoire partagée ne peut pas être vide
+            return []
+        chunk_blocks = max(MIN_CHUNK_BLOCKS, -(-n_blocks // (self.workers * 4)))
+        shm = shared_memory.SharedMemory(create=True, size=n_blocks * 8)
+        try:
+            with shm.buf.cast("Q") as view:
+                view[:] = array("Q", blocks)
+                futures = []
+                for start in range(0, n_blocks, chunk_blocks):
+                    count = min(chunk_blocks, n_blocks - start)
+                    previous = iv if start == 0 else blocks[start - 1]
+                    futures.append(self._get_executor().submit(_process_chunk, shm.name, start, count, operation,
+                                                               key_array, s_box, self.engine, iv, previous))
+                for future in futures:
+                    future.result()
+                result = view.tolist()
+        finally:
+            try:
+                shm.close()
+            finally:
+                shm.unlink()  # le segment est toujours supprimé
+        return result
+
+    def encrypt(self, blocks, key_array, operation_mode="ECB", s_box=S_BOX_RFC):
+        """
+        Cette fonction chiffre une liste de blocs de 64 bits. Le résultat a la même forme que
+        celui de gost.encrypt. Les chiffrements CBC, CFB et OFB, séquentiels par nature, restent dans le processus courant.
+        :param blocks: Liste de blocs à chiffrer.
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        :return: la liste de blocs chiffrés.
+        """
+        if operation_mode in ("CBC", "CFB", "OFB") or not self._use_pool(len(blocks)):
+            return engines.encrypt(blocks, key_array, operation_mode, self.engine, s_box)
+        if operation_mode == "ECB":
+            return self._run(blocks, "encrypt", key_array, s_box)
+        elif operation_mode == "CTR":
+            iv = rdm_IV_generator()
+            return [iv] + self._run(blocks, "ctr", key_array, s_box, iv)
+        raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
+
+    def decrypt(self, blocks, key_array, operation_mode="ECB", s_box=S_BOX_RFC):
+        """
+        Cette fonction dé-chiffre une liste de blocs de 64 bits. Le résultat a la même forme que
+        celui de gost.decrypt. Le flux de clé OFB, séquentiel par nature, est calculé dans le processus courant.
+        :param blocks: Liste de blocs à déchiffrer (vecteur initial en première position hors ECB).
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        :return: la liste de blocs déchiffrés.
+        """
+        if operation_mode == "OFB" or not self._use_pool(len(blocks)):
+            return engines.decrypt(blocks, key_array, operation_mode, self.engine, s_box)
+        if operation_mode == "ECB":
+            return self._run(blocks, "decrypt", key_array, s_box)
+        elif operation_mode == "CBC":
+            return self._run(blocks[1:], "cbc_decrypt", key_array, s_box, blocks[0])
+        elif operation_mode == "CTR":
+            return self._run(blocks[1:], "ctr", key_array, s_box, blocks[0])
+        elif operation_mode == "CFB":
+            return self._run(blocks[1:], "cfb_decrypt", key_array, s_box, blocks[0])
+        raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
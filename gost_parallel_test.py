@@ -0,0 +1,77 @@
+import unittest
+from random import getrandbits
+
+from gost import encrypt, decrypt
+from gost_feistel_function import S_BOX_BANK
+from gost_parallel import ParallelEngine
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class TestParallelEngine(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = ParallelEngine(workers=2, threshold=16)
+        cls.keys = gost_key_generator(key)
+        cls.blocks = [getrandbits(64) for _ in range(5000)]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.close()
+
+    def test_ecb(self):
+        cypher = self.engine.encrypt(self.blocks, self.keys)
+        assert cypher == encrypt(self.blocks, self.keys, tables=None)
+        assert self.engine.decrypt(cypher, self.keys) == self.blocks
+
+    def test_ctr(self):
+        cypher = self.engine.encrypt(self.blocks, self.keys, "CTR")
+        assert decrypt(cypher, self.keys, "CTR") == self.blocks
+        cypher = encrypt(self.blocks, self.keys, "CTR")
+        assert self.engine.decrypt(cypher, self.keys, "CTR") == self.blocks
+
+    def test_cbc(self):
+        cypher = self.engine.encrypt(self.blocks, self.keys, "CBC")
+        assert self.engine.decrypt(cypher, self.keys, "CBC") == self.blocks
+
+    def test_below_threshold(self):
+        engine = ParallelEngine(workers=2, threshold=10 ** 6)
+        cypher = engine.encrypt(self.blocks[:10], self.keys, "CTR")
+        assert engine.decrypt(cypher, self.keys, "CTR") == self.blocks[:10]
+        assert engine._executor is None
+
+    def test_cfb(self):
+        cypher = self.engine.encrypt(self.blocks, self.keys, "CFB")
+        assert decrypt(cypher, self.keys, "CFB") == self.blocks
+        assert self.engine.decrypt(cypher, self.keys, "CFB") == self.blocks  # plusieurs morceaux
+
+    def test_ofb(self):
+        cypher = encrypt(self.blocks, self.keys, "OFB")
+        assert self.engine.decrypt(cypher, self.keys, "OFB") == self.blocks
+
+    def test_empty(self):
+        engine = ParallelEngine(workers=2, threshold=0)
+        try:
+            assert engine.encrypt([], self.keys) == []
+            for mode in ("CBC", "CTR", "CFB"):
+                assert engine.decrypt([7], self.keys, mode) == []
+        finally:
+            engine.close()
+
+    def test_worker_error(self):
+        # l'exception du processus est transmise telle quelle (et non un BufferError)
+        engine = ParallelEngine(workers=2, threshold=16, engine="reference")
+        try:
+            with self.assertRaises(ValueError):
+                engine.encrypt(self.blocks, self.keys, "ECB", S_BOX_BANK)
+        finally:
+            engine.close()
+
+    def test_reference_engine(self):
+        engine = ParallelEngine(workers=2, threshold=16, engine="reference")
+        try:
+            assert engine.encrypt(self.blocks[:64], self.keys) == encrypt(self.blocks[:64], self.keys)
+        finally:
+            engine.close()
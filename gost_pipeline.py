@@ -0,0 +1,204 @@
+"""
+Ce fichier comprend un pipeline en trois étapes pour le chiffrement de fichiers en flux :
+
+    lecture (thread) -> file bornée -> chiffrement -> file bornée -> écriture (thread)
+
+Le thread de lecture lit les morceaux suivants pendant que le chiffrement traite le morceau courant,
+et le thread d'écriture écrit les morceaux déjà chiffrés dans l'ordre. Le débit approche ainsi celui
+de l'étape la plus lente au lieu de la somme des étapes. Le chiffrement se fait dans le thread
+appelant, ou dans un exécuteur (pool de processus par exemple) pour ne pas disputer le GIL aux
+threads d'entrées/sorties.
+
+Chaque attente sur une file est comptée par étape (stalls) avec sa durée (stall_seconds) :
+- "read" : la lecture attend que le chiffrement libère de la place (chiffrement plus lent) ;
+- "cipher_input" : le chiffrement attend des données (lecture plus lente) ;
+- "cipher_output" : le chiffrement attend que l'écriture libère de la place (écriture plus lente) ;
+- "write" : l'écriture attend des morceaux chiffrés.
+"""
+import queue
+import threading
+import time
+
+from gost_stream import DEFAULT_CHUNK_SIZE
+from instrumentation import NULL_METRICS, count_blocks
+
+"""
+Nombre de morceaux en attente par défaut dans chaque file.
+"""
+DEFAULT_QUEUE_DEPTH = 4
+
+STAGES = ("read", "cipher_input", "cipher_output", "write")
+
+_POLL_SECONDS = 0.05
+
+
+class _Aborted(Exception):
+    """
+    Levée dans une étape lorsqu'une autre étape a échoué.
+    """
+
+
+def _update(cipher, data):
+    return cipher, cipher.update(data)
+
+
+def _finalize(cipher):
+    return cipher, cipher.finalize()
+
+
+class _Run:
+    """
+    État d'une exécution du pipeline (arrêt, erreurs et compteurs d'attente) : chaque appel à
+    Pipeline.run a le sien, plusieurs exécutions peuvent donc partager un même Pipeline.
+    """
+
+    def __init__(self):
+        self.stalls = dict.fromkeys(STAGES, 0)
+        self.stall_seconds = dict.fromkeys(STAGES, 0.0)
+        self.stop = threading.Event()
+        self.errors = list()
+
+    def _wait(self, operation, full_or_empty, stage):
+        """
+        Cette fonction exécute operation (put ou get d'une file) en comptant les attentes de l'étape.
+        L'attente est interrompue si une autre étape a échoué.
+        """
+        try:
+            return operation(block=False)
+        except full_or_empty:
+            pass
+        self.stalls[stage] += 1
+        start = time.perf_counter()
+        try:
+            while True:
+                if self.stop.is_set():
+                    raise _Aborted()
+                try:
+                    return operation(timeout=_POLL_SECONDS)
+                except full_or_empty:
+                    continue
+        finally:
+            self.stall_seconds[stage] += time.perf_counter() - start
+
+    def put(self, target_queue, item, stage):
+        self._wait(lambda **kwargs: target_queue.put(item, **kwargs), queue.Full, stage)
+
+    def get(self, source_queue, stage):
+        return self._wait(source_queue.get, queue.Empty, stage)
+
+    def fail(self, error):
+        self.errors.append(error)
+        self.stop.set()
+
+    def read(self, source, read_queue, chunk_size, metrics):
+        try:
+            while True:
+                with metrics.stage("read") as stage:
+                    chunk = source.read(chunk_size)
+                    stage.bytes = len(chunk)
+                self.put(read_queue, chunk or None, "read")
+                if not chunk:
+                    return
+        except _Aborted:
+            pass
+        except BaseException as error:
+            self.fail(error)
+
+    def write(self, destination, write_queue, metrics):
+        try:
+            while True:
+                output = self.get(write_queue, "write")
+                if output is None:
+                    return
+                with metrics.stage("write", len(output)):
+                    destination.write(output)
+        except _Aborted:
+            pass
+        except BaseException as error:
+            self.fail(error)
+
+
+class Pipeline:
+    """
+    Pipeline lecture -> chiffrement -> écriture réutilisable. Les compteurs d'attente de la
+    dernière exécution terminée sont disponibles dans stalls et stall_seconds.
+    """
+
+    def __init__(self, read_depth=DEFAULT_QUEUE_DEPTH, write_depth=DEFAULT_QUEUE_DEPTH, executor=None):
+        """
+        :param read_depth: nombre maximal de morceaux lus en avance
+        :param write_depth: nombre maximal de morceaux chiffrés en attente d'écriture
+        :param executor: exécuteur du chiffrement (dans le thread appelant si None)
+        """
+        if read_depth < 1 or write_depth < 1:
+            raise ValueError("la profondeur des files doit être au moins 1")
+        self.read_depth = read_depth
+        self.write_depth = write_depth
+        self.executor = executor
+        self.stalls = dict.fromkeys(STAGES, 0)
+        self.stall_seconds = dict.fromkeys(STAGES, 0.0)
+
+    def _call(self, function, cipher, *args):
+        if self.executor is None:
+            return function(cipher, *args)
+        return self.executor.submit(function, cipher, *args).result()
+
+    def run(self, source, destination, cipher, chunk_size=DEFAULT_CHUNK_SIZE, metrics=None):
+        """
+        Cette fonction chiffre (ou déchiffre) source dans destination avec le chiffreur en flux donné.
+        Avec Metrics(track_memory=True), le pic mémoire est mesuré une seule fois pour toute l'exécution
+        (étape "pipeline") : les étapes des threads ne mesurent que durées et octets.
+        :param source: objet fichier binaire à lire
+        :param destination: objet fichier binaire où écrire le résultat
+        :param cipher: gost_stream.StreamEncryptor ou StreamDecryptor
+        :param chunk_size: taille des morceaux lus (multiple de 8)
+        :param metrics: instrumentation.Metrics recevant les mesures de chaque étape et les compteurs
+            d'attente "stalls_<étape>" (désactivé si None)
+        :return: le chiffreur dans son état final (une copie si un exécuteur de processus est utilisé).
+        """
+        if chunk_size <= 0 or chunk_size % 8 != 0:
+            raise ValueError("chunk_size doit être un multiple positif de 8")
+        metrics = metrics or NULL_METRICS
+        with metrics.stage("pipeline"):  # tracemalloc démarré et arrêté dans le thread appelant uniquement
+            run, cipher = self._run(source, destination, cipher, chunk_size, metrics, metrics.timing_only())
+        for stage in STAGES:
+            metrics.count("stalls_" + stage, run.stalls[stage])
+        self.stalls, self.stall_seconds = run.stalls, run.stall_seconds
+        return cipher
+
+    def _run(self, source, destination, cipher, chunk_size, metrics, stage_metrics):
+        run = _Run()
+        read_queue = queue.Queue(self.read_depth)
+        write_queue = queue.Queue(self.write_depth)
+        threads = [threading.Thread(target=run.read, args=(source, read_queue, chunk_size, stage_metrics)),
+                   threading.Thread(target=run.write, args=(destination, write_queue, stage_metrics))]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                chunk = run.get(read_queue, "cipher_input")
+                if chunk is None:
+                    break
+                processed_blocks = cipher.processed_blocks
+                with stage_metrics.stage("cipher", len(chunk)):
+                    cipher, output = self._call(_update, cipher, chunk)
+                count_blocks(metrics, cipher.processed_blocks - processed_blocks)
+                run.put(write_queue, output, "cipher_output")
+            processed_blocks = cipher.processed_blocks
+            with stage_metrics.stage("cipher"):
+                cipher, output = self._call(_finalize, cipher)
+            count_blocks(metrics, cipher.processed_blocks - processed_blocks)
+            run.put(write_queue, output, "cipher_output")
+            run.put(write_queue, None, "cipher_output")
+        except _Aborted:
+            pass
+        except BaseException:
+            run.stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+            cipher.close()
+        if run.errors:
+            raise run.errors[0]
+        return run, cipher
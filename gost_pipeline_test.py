@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from gost_pipeline import *
+from gost_stream import StreamEncryptor, StreamDecryptor, STREAM_MODES, encrypt_file_stream, decrypt_file_stream
+from instrumentation import Metrics
+from key_generator import gost_key_generator
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+class FailingWriter(io.BytesIO):
+
+    def write(self, data):
+        raise OSError("disque plein")
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+        self.data = os.urandom(5000)
+
+    def _run(self, pipeline, cipher, data, chunk_size=256, metrics=None):
+        destination = io.BytesIO()
+        pipeline.run(io.BytesIO(data), destination, cipher, chunk_size, metrics)
+        return destination.getvalue()
+
+    def test_same_output_as_stream(self):
+        pipeline = Pipeline(read_depth=1, write_depth=1)
+        for mode in STREAM_MODES:
+            reference = StreamEncryptor(self.keys, mode, iv=0x0123456789ABCDEF)
+            expected = reference.update(self.data) + reference.finalize()
+            cypher = self._run(pipeline, StreamEncryptor(self.keys, mode, iv=0x0123456789ABCDEF), self.data)
+            assert cypher == expected
+            assert self._run(pipeline, StreamDecryptor(self.keys, mode), cypher, 64) == self.data
+
+    def test_stall_counters(self):
+        metrics = Metrics()
+        pipeline = Pipeline(read_depth=1, write_depth=1)
+        self._run(pipeline, StreamEncryptor(self.keys, "CTR"), self.data, 64, metrics)
+        assert set(pipeline.stalls) == set(STAGES)
+        assert sum(pipeline.stalls.values()) > 0
+        assert metrics.counters["blocks"] == 625
+        assert metrics.stages["read"]["bytes"] == 5000
+        assert sum(metrics.counters["stalls_" + stage] for stage in STAGES) == sum(pipeline.stalls.values())
+
+    def test_concurrent_runs(self):
+        pipeline = Pipeline(read_depth=1, write_depth=1)
+        data = [os.urandom(20000) for _ in range(4)]
+        results = [None] * len(data)
+
+        def run(index):
+            cypher = self._run(pipeline, StreamEncryptor(self.keys, "CBC"), data[index], 64)
+            results[index] = self._run(pipeline, StreamDecryptor(self.keys, "CBC"), cypher, 64)
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(len(data))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == data
+
+    def test_track_memory(self):
+        metrics = Metrics(track_memory=True)
+        self._run(Pipeline(), StreamEncryptor(self.keys, "CTR"), self.data, 64, metrics)
+        assert metrics.stages["pipeline"]["peak_memory"] > 0
+        assert metrics.stages["read"]["peak_memory"] is None  # pas de tracemalloc dans les threads
+        assert not tracemalloc.is_tracing()
+
+    def test_writer_error(self):
+        pipeline = Pipeline(read_depth=1, write_depth=1)
+        with self.assertRaises(OSError):
+            pipeline.run(io.BytesIO(self.data), FailingWriter(), StreamEncryptor(self.keys, "OFB"), 64)
+
+    def test_cipher_error(self):
+        with self.assertRaises(ValueError):
+            self._run(Pipeline(), StreamDecryptor(self.keys, "CBC"), b"\x00" * 20)
+
+    def test_process_executor(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            pipeline = Pipeline(executor=executor)
+            cypher = self._run(pipeline, StreamEncryptor(self.keys, "CBC"), self.data, 1024)
+        assert self._run(Pipeline(), StreamDecryptor(self.keys, "CBC"), cypher) == self.data
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain_name = os.path.join(directory, "plain.bin")
+            cypher_name = os.path.join(directory, "cypher.bin")
+            result_name = os.path.join(directory, "result.bin")
+            with open(plain_name, "wb") as file:
+                file.write(self.data)
+            pipeline = Pipeline(read_depth=2, write_depth=2)
+            keys = encrypt_file_stream(plain_name, cypher_name, "CBC", chunk_size=512, pipeline=pipeline)
+            decrypt_file_stream(cypher_name, result_name, keys, "CBC", chunk_size=512, pipeline=pipeline, mac=False)
+            with open(result_name, "rb") as file:
+                assert file.read() == self.data
+
+    def test_bad_depth(self):
+        with self.assertRaises(ValueError):
+            Pipeline(read_depth=0)
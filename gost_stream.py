@@ -0,0 +1,495 @@
+"""
+Ce fichier comprend le chiffrement et le déchiffrement GOST en flux : les données sont traitées
+par morceaux de taille fixe et l'état de chaînage (bloc chiffré précédent en CBC, compteur en CTR)
+est conservé d'un morceau à l'autre. La mémoire utilisée est ainsi bornée par la taille des
+morceaux, quelle que soit la taille du fichier.
+
+Les fichiers sont traités comme des octets bruts. Seule la disposition des blocs est celle de
+encrypt_file (vecteur initial de 64 bits en tête hors ECB) : le remplissage diffère (PKCS#7 ici pour
+ECB et CBC, zéros pour encrypt_file), les deux formats de fichier ne sont donc pas interchangeables.
+Les modes CTR, CFB et OFB ne nécessitent pas de remplissage : le dernier bloc partiel est XORé
+avec un flux de clé tronqué, la taille du texte chiffré est donc celle du texte clair (plus le
+vecteur initial). En OFB, le flux de clé ne dépend pas des données : il est calculé à l'avance par
+un thread producteur (OFBKeystream) pendant les lectures et écritures, le chiffrement se réduisant
+alors à un XOR.
+
+Avec mac=True, le code d'authentification du texte clair (gost_mac) est calculé pendant le chiffrement
+et écrit en fin de flux ; le déchiffrement le vérifie dans finalize() et lève une ValueError s'il ne
+correspond pas.
+"""
+import os
+import queue
+import threading
+
+import engines
+from gost import apply_rounds, generate_key_array, ofb_keystream
+from gost_feistel_function import S_BOX_RFC, compile_sbox_tables
+from gost_mac import GostMAC, MAC_SIZE
+from instrumentation import NULL_METRICS, count_blocks
+from key_generator import rdm_IV_generator
+from utilities import bytes_to_blocks, blocks_to_bytes, PADDING_PKCS7
+
+"""
+Taille par défaut des morceaux lus dans les fichiers (en octets, multiple de 8).
+"""
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+STREAM_MODES = ("ECB", "CBC", "CTR", "CFB", "OFB")
+
+"""
+Modes sans remplissage, où le dernier bloc partiel est XORé avec un flux de clé tronqué.
+"""
+KEYSTREAM_MODES = ("CTR", "CFB", "OFB")
+
+"""
+Taille des morceaux de flux de clé OFB produits à l'avance (en blocs) et nombre de morceaux en attente.
+"""
+OFB_CHUNK_BLOCKS = 1 << 12
+OFB_QUEUE_DEPTH = 4
+
+
+def _produce_keystream(keystream_queue, stop, gamma, key_array, tables, chunk_blocks):
+    count = min(64, chunk_blocks)  # petits morceaux au départ, pour les flux courts
+    while not stop.is_set():
+        keystream = ofb_keystream(gamma, key_array, count, tables)
+        gamma = keystream[-1]
+        count = min(2 * count, chunk_blocks)
+        while not stop.is_set():
+            try:
+                keystream_queue.put(keystream, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+class OFBKeystream:
+    """
+    Producteur du flux de clé OFB : un thread calcule les blocs de flux de clé à l'avance
+    dans une file bornée, take() les consomme dans l'ordre.
+    """
+
+    def __init__(self, iv, key_array, tables, chunk_blocks=OFB_CHUNK_BLOCKS, depth=OFB_QUEUE_DEPTH):
+        """
+        :param iv: vecteur initial de 64 bits
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param tables: tables précalculées (compile_sbox_tables)
+        :param chunk_blocks: nombre maximal de blocs calculés à chaque étape du producteur
+        :param depth: nombre maximal de morceaux calculés d'avance
+        """
+        self._queue = queue.Queue(depth)
+        self._stop = threading.Event()
+        self._pending = ()
+        self._offset = 0
+        self.gamma = iv  # dernier bloc de flux de clé consommé
+        threading.Thread(target=_produce_keystream, daemon=True,
+                         args=(self._queue, self._stop, iv, key_array, tables, chunk_blocks)).start()
+
+    def take(self, count):
+        """
+        :param count: nombre de blocs de flux de clé
+        :return: la liste des count blocs suivants du flux de clé.
+        """
+        keystream = list()
+        while len(keystream) < count:
+            if self._offset == len(self._pending):
+                self._pending = self._queue.get()
+                self._offset = 0
+            n = min(count - len(keystream), len(self._pending) - self._offset)
+            keystream.extend(self._pending[self._offset:self._offset + n])
+            self._offset += n
+        if keystream:
+            self.gamma = keystream[-1]
+        return keystream
+
+    def close(self):
+        """
+        Cette fonction arrête le thread producteur.
+        """
+        self._stop.set()
+
+    def __del__(self):
+        self.close()
+
+
+class _StreamCipher:
+    """
+    Base commune aux chiffreurs et déchiffreurs en flux.
+    """
+
+    def __init__(self, key_array, operation_mode="ECB", engine="table", s_box=S_BOX_RFC, mac=False):
+        if operation_mode not in STREAM_MODES:
+            raise ValueError("mode d'opération inconnu : {}".format(operation_mode))
+        self.key_array = key_array
+        self.operation_mode = operation_mode
+        self.engine = engines.get_engine(engine)
+        self.s_box = s_box
+        self.tables = compile_sbox_tables(s_box)
+        self.iv = None
+        self.counter = 0  # compteur CTR du prochain bloc
+        self.previous = None  # dernier bloc chiffré (CBC et CFB)
+        self.keystream = None  # producteur du flux de clé (OFB), démarré au premier usage
+        self.gamma = None  # position du flux de clé OFB lorsque le producteur n'est pas démarré
+        self.processed_blocks = 0  # blocs de données traités (vecteur initial exclu)
+        self.finalized = False
+        self.mac = GostMAC(key_array, s_box) if mac else None
+        self._buffer = b""
+
+    def _check_open(self):
+        if self.finalized:
+            raise ValueError("le flux a déjà été finalisé")
+
+    def close(self):
+        """
+        Cette fonction arrête le producteur du flux de clé OFB. Elle est appelée par finalize() et
+        doit l'être si le flux est abandonné avant sa fin.
+        """
+        if self.keystream is not None:
+            self.keystream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.keystream is not None:  # le thread producteur n'est pas transmis, seule sa position l'est
+            state["gamma"] = self.keystream.gamma
+            state["keystream"] = None
+        return state
+
+    def _take_keystream(self, count):
+        if self.keystream is None:  # le producteur n'est démarré qu'au premier usage (y compris après pickle)
+            self.keystream = OFBKeystream(self.gamma, self.key_array, self.tables)
+        return self.keystream.take(count)
+
+    def _ctr(self, blocks):
+        result = self.engine.ctr_blocks(blocks, self.iv, self.key_array, self.s_box, self.counter)
+        self.counter += len(blocks)
+        return list(result)
+
+    def _ofb(self, blocks):
+        return [block ^ gamma for block, gamma in zip(blocks, self._take_keystream(len(blocks)))]
+
+    def _start(self, iv):
+        """
+        Cette fonction initialise l'état de chaînage à partir du vecteur initial.
+        """
+        self.iv = self.previous = self.gamma = iv
+
+    def process_tail(self, tail):
+        """
+        Cette fonction XOR le dernier bloc partiel avec le début du flux de clé (CTR, CFB et OFB).
+        :param tail: moins de 8 octets
+        :return: les octets transformés.
+        """
+        self.processed_blocks += bool(tail)
+        if not tail:
+            gamma = 0
+        elif self.operation_mode == "CTR":
+            gamma = apply_rounds(self.iv ^ self.counter, self.key_array, self.tables)
+            self.counter += 1
+        elif self.operation_mode == "CFB":
+            gamma = apply_rounds(self.previous, self.key_array, self.tables)
+        else:
+            gamma = self._take_keystream(1)[0]
+        self.close()
+        return bytes(a ^ b for a, b in zip(tail, gamma.to_bytes(8, "big")))
+
+
+class StreamEncryptor(_StreamCipher):
+    """
+    Chiffreur en flux : update() retourne les octets chiffrés disponibles, finalize() les derniers.
+    """
+
+    def __init__(self, key_array, operation_mode="ECB", engine="table", s_box=S_BOX_RFC, iv=None, mac=False):
+        """
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param engine: nom du moteur (voir engines.py) utilisé pour ECB et CTR
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        :param iv: vecteur d'initialisation de 64 bits (aléatoire si None)
+        :param mac: écrit le code d'authentification du texte clair en fin de flux
+        """
+        super().__init__(key_array, operation_mode, engine, s_box, mac)
+        self._header = b""
+        if operation_mode != "ECB":
+            self._start(rdm_IV_generator() if iv is None else iv)
+            self._header = self.iv.to_bytes(8, "big")  # le vecteur initial est écrit en tête
+
+    def process_blocks(self, blocks):
+        """
+        Cette fonction chiffre des blocs alignés en conservant l'état de chaînage, sans en-tête,
+        remplissage ni code d'authentification (utilisée par update() et par gost_mmap).
+        :param blocks: blocs de 64 bits à chiffrer
+        :return: la liste des blocs chiffrés.
+        """
+        self.processed_blocks += len(blocks)
+        if self.operation_mode == "ECB":
+            return list(self.engine.encrypt_blocks(blocks, self.key_array, self.s_box))
+        elif self.operation_mode == "CBC":
+            encrypted_blocks = list()
+            previous = self.previous
+            for block in blocks:
+                previous = apply_rounds(previous ^ block, self.key_array, self.tables)
+                encrypted_blocks.append(previous)
+            self.previous = previous
+            return encrypted_blocks
+        elif self.operation_mode == "CFB":
+            encrypted_blocks = list()
+            previous = self.previous
+            for block in blocks:
+                previous = block ^ apply_rounds(previous, self.key_array, self.tables)
+                encrypted_blocks.append(previous)
+            self.previous = previous
+            return encrypted_blocks
+        elif self.operation_mode == "OFB":
+            return self._ofb(blocks)
+        return self._ctr(blocks)
+
+    def update(self, data):
+        """
+        :param data: octets à chiffrer
+        :return: les octets chiffrés disponibles (multiple de 8 octets, vecteur initial inclus au premier appel).
+        """
+        self._check_open()
+        if self.mac is not None:
+            self.mac.update(data)
+        data = self._buffer + bytes(data)
+        full = len(data) - len(data) % 8
+        self._buffer = data[full:]
+        output = self._header
+        self._header = b""
+        if full:
+            output += blocks_to_bytes(self.process_blocks(bytes_to_blocks(memoryview(data)[:full])))
+        return output
+
+    def finalize(self):
+        """
+        :return: les derniers octets chiffrés (bloc de remplissage en ECB/CBC, bloc partiel en CTR),
+            suivis du code d'authentification si mac=True.
+        """
+        self._check_open()
+        self.finalized = True
+        output = self._header
+        if self.operation_mode in KEYSTREAM_MODES:
+            output += self.process_tail(self._buffer)
+        else:
+            output += blocks_to_bytes(self.process_blocks(bytes_to_blocks(self._buffer, PADDING_PKCS7)))
+        if self.mac is not None:
+            output += self.mac.digest()
+        return output
+
+
+class StreamDecryptor(_StreamCipher):
+    """
+    Déchiffreur en flux : update() retourne les octets déchiffrés disponibles, finalize() les derniers.
+    En ECB et CBC, le dernier bloc est conservé jusqu'à finalize() pour retirer le remplissage.
+    """
+
+    def __init__(self, key_array, operation_mode="ECB", engine="table", s_box=S_BOX_RFC, mac=False, iv=None):
+        """
+        :param key_array: liste ordonnée des 32 clés locales pour chaque round
+        :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+        :param engine: nom du moteur (voir engines.py) utilisé pour le traitement par lots
+        :param s_box: s_box utilisée sous la forme de liste de liste
+        :param mac: vérifie le code d'authentification écrit en fin de flux par StreamEncryptor
+        :param iv: vecteur initial déjà lu par l'appelant (le flux ne commence alors pas par le vecteur)
+        """
+        super().__init__(key_array, operation_mode, engine, s_box, mac)
+        if iv is not None and operation_mode != "ECB":
+            self._start(iv)
+        self._reserved = MAC_SIZE if mac else 0  # octets de fin conservés pour le code d'authentification
+
+    def process_blocks(self, blocks):
+        """
+        Cette fonction déchiffre des blocs alignés en conservant l'état de chaînage, sans en-tête,
+        remplissage ni code d'authentification (utilisée par update() et par gost_mmap).
+        :param blocks: blocs de 64 bits à déchiffrer
+        :return: la liste des blocs déchiffrés.
+        """
+        self.processed_blocks += len(blocks)
+        if self.operation_mode == "ECB":
+            return list(self.engine.decrypt_blocks(blocks, self.key_array, self.s_box))
+        elif self.operation_mode == "CBC":
+            decrypted_blocks = self.engine.decrypt_blocks(blocks, self.key_array, self.s_box)
+            previous_blocks = [self.previous]
+            previous_blocks.extend(blocks[:-1])
+            result = [block ^ previous for block, previous in zip(decrypted_blocks, previous_blocks)]
+            self.previous = blocks[-1]
+            return result
+        elif self.operation_mode == "CFB":  # ne dépend que des blocs chiffrés : traitement par lots
+            previous_blocks = [self.previous]
+            previous_blocks.extend(blocks[:-1])
+            gamma = self.engine.encrypt_blocks(previous_blocks, self.key_array, self.s_box)
+            self.previous = blocks[-1]
+            return [block ^ g for block, g in zip(blocks, gamma)]
+        elif self.operation_mode == "OFB":
+            return self._ofb(blocks)
+        return self._ctr(blocks)
+
+    def update(self, data):
+        """
+        :param data: octets chiffrés
+        :return: les octets déchiffrés disponibles.
+        """
+        self._check_open()
+        data = self._buffer + bytes(data)
+        if self.operation_mode != "ECB" and self.iv is None:
+            if len(data) < 8:
+                self._buffer = data
+                return b""
+            self._start(int.from_bytes(data[:8], "big"))  # on lit le vecteur initial
+            data = data[8:]
+        available = len(data) - self._reserved
+        if self.operation_mode in KEYSTREAM_MODES:
+            full = max(0, available // 8 * 8)
+        else:  # on garde toujours le dernier bloc pour le remplissage
+            full = max(0, (available - 1) // 8 * 8)
+        self._buffer = data[full:]
+        if not full:
+            return b""
+        output = blocks_to_bytes(self.process_blocks(bytes_to_blocks(memoryview(data)[:full])))
+        if self.mac is not None:
+            self.mac.update(output)
+        return output
+
+    def finalize(self):
+        """
+        :return: les derniers octets déchiffrés, sans remplissage.
+        """
+        self._check_open()
+        self.finalized = True
+        if self.operation_mode != "ECB" and self.iv is None:
+            raise ValueError("le texte chiffré ne contient pas de vecteur initial")
+        if len(self._buffer) < self._reserved:
+            raise ValueError("le texte chiffré ne contient pas de code d'authentification")
+        data = self._buffer[:len(self._buffer) - self._reserved]
+        tag = self._buffer[len(data):]
+        if self.operation_mode in KEYSTREAM_MODES:
+            output = self.process_tail(data)
+        elif len(data) != 8:
+            raise ValueError("la taille du texte chiffré n'est pas un multiple de 8 octets")
+        else:
+            output = bytes(blocks_to_bytes(self.process_blocks(bytes_to_blocks(data)), PADDING_PKCS7))
+        if self.mac is not None:
+            self.mac.update(output)
+            if not self.mac.verify(tag):
+                raise ValueError("code d'authentification invalide : les données ont été modifiées")
+        return output
+
+
+def encrypt_stream(source, destination, key_array, operation_mode="ECB", chunk_size=DEFAULT_CHUNK_SIZE,
+                   engine="table", metrics=None, mac=False, pipeline=None):
+    """
+    Cette fonction chiffre un flux binaire (objet fichier) par morceaux.
+    :param source: objet fichier binaire à lire
+    :param destination: objet fichier binaire où écrire le résultat
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param chunk_size: taille des morceaux lus
+    :param engine: nom du moteur utilisé
+    :param metrics: instrumentation.Metrics recevant les mesures de chaque étape (désactivé si None)
+    :param mac: écrit le code d'authentification du texte clair en fin de flux
+    :param pipeline: gost_pipeline.Pipeline recouvrant lectures, chiffrement et écritures (boucle simple si None)
+    """
+    encryptor = StreamEncryptor(key_array, operation_mode, engine, mac=mac)
+    _run(source, destination, encryptor, chunk_size, metrics, pipeline)
+
+
+def decrypt_stream(source, destination, key_array, operation_mode="ECB", chunk_size=DEFAULT_CHUNK_SIZE,
+                   engine="table", metrics=None, mac=False, pipeline=None):
+    """
+    Cette fonction déchiffre un flux binaire (objet fichier) par morceaux.
+    :param source: objet fichier binaire à lire
+    :param destination: objet fichier binaire où écrire le résultat
+    :param key_array: liste ordonnée des 32 clés locales pour chaque round
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param chunk_size: taille des morceaux lus
+    :param engine: nom du moteur utilisé
+    :param metrics: instrumentation.Metrics recevant les mesures de chaque étape (désactivé si None)
+    :param mac: vérifie le code d'authentification en fin de flux (ValueError s'il est invalide)
+    :param pipeline: gost_pipeline.Pipeline recouvrant lectures, chiffrement et écritures (boucle simple si None)
+    """
+    decryptor = StreamDecryptor(key_array, operation_mode, engine, mac=mac)
+    _run(source, destination, decryptor, chunk_size, metrics, pipeline)
+
+
+def _run(source, destination, cipher, chunk_size, metrics, pipeline):
+    if pipeline is None:
+        _pump(source, destination, cipher, chunk_size, metrics)
+    else:
+        pipeline.run(source, destination, cipher, chunk_size, metrics)
+
+
+def _pump(source, destination, cipher, chunk_size, metrics=None):
+    with cipher:  # le producteur du flux de clé OFB est arrêté même en cas d'erreur
+        if chunk_size <= 0 or chunk_size % 8 != 0:
+            raise ValueError("chunk_size doit être un multiple positif de 8")
+        metrics = metrics or NULL_METRICS
+        while True:
+            with metrics.stage("read") as stage:
+                chunk = source.read(chunk_size)
+                stage.bytes = len(chunk)
+            if not chunk:
+                break
+            processed_blocks = cipher.processed_blocks
+            with metrics.stage("cipher", len(chunk)):
+                output = cipher.update(chunk)
+            count_blocks(metrics, cipher.processed_blocks - processed_blocks)
+            with metrics.stage("write", len(output)):
+                destination.write(output)
+        processed_blocks = cipher.processed_blocks
+        with metrics.stage("cipher"):
+            output = cipher.finalize()
+        count_blocks(metrics, cipher.processed_blocks - processed_blocks)
+        with metrics.stage("write", len(output)):
+            destination.write(output)
+
+
+def encrypt_file_stream(input_filename, output_filename, operation_mode="ECB", simple_key=True, key_array=None,
+                        chunk_size=DEFAULT_CHUNK_SIZE, engine="table", metrics=None, mac=False, pipeline=None):
+    """
+    Cette fonction chiffre un fichier en flux, avec une mémoire bornée par chunk_size.
+    :param input_filename: Nom du fichier à chiffrer
+    :param output_filename: Nom du fichier chiffré
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+    :param key_array: liste des 32 clés de rounds à utiliser (générée aléatoirement si None)
+    :param chunk_size: taille des morceaux lus
+    :param engine: nom du moteur utilisé
+    :param metrics: instrumentation.Metrics recevant les mesures de chaque étape (désactivé si None)
+    :param mac: écrit le code d'authentification du texte clair en fin de fichier
+    :param pipeline: gost_pipeline.Pipeline recouvrant lectures, chiffrement et écritures (boucle simple si None)
+    :return: La clé utilisée pour le chiffrement.
+    """
+    if key_array is None:
+        key_array = generate_key_array(simple_key)
+    with open(input_filename, "rb") as source, open(output_filename, "wb") as destination:
+        encrypt_stream(source, destination, key_array, operation_mode, chunk_size, engine, metrics, mac, pipeline)
+    return key_array
+
+
+def decrypt_file_stream(input_filename, output_filename, key, operation_mode="ECB", chunk_size=DEFAULT_CHUNK_SIZE,
+                        engine="table", metrics=None, mac=False, pipeline=None):
+    """
+    Cette fonction déchiffre en flux un fichier chiffré par encrypt_file_stream.
+    :param input_filename: le nom du fichier chiffré.
+    :param output_filename: le nom du fichier déchiffré
+    :param key: La liste des 32 clés de rounds utilisée pour chiffrer le fichier.
+    :param operation_mode: string spécifiant le mode d'opération ("ECB", "CBC", "CTR", "CFB" ou "OFB")
+    :param chunk_size: taille des morceaux lus
+    :param engine: nom du moteur utilisé
+    :param metrics: instrumentation.Metrics recevant les mesures de chaque étape (désactivé si None)
+    :param mac: vérifie le code d'authentification ; s'il est invalide, le fichier déchiffré est supprimé
+        et une ValueError est levée
+    :param pipeline: gost_pipeline.Pipeline recouvrant lectures, chiffrement et écritures (boucle simple si None)
+    """
+    try:
+        with open(input_filename, "rb") as source, open(output_filename, "wb") as destination:
+            decrypt_stream(source, destination, key, operation_mode, chunk_size, engine, metrics, mac, pipeline)
+    except ValueError:
+        if mac:
+            os.remove(output_filename)
+        raise
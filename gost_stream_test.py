@@ -0,0 +1,120 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from gost import decrypt
+from gost_stream import *
+from key_generator import gost_key_generator
+from utilities import bytearray_to_64bits_block, _64bits_block_to_bytearray
+
+key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
+
+
+def run_cipher(cipher, data, step):
+    output = b""
+    for i in range(0, len(data), step):
+        output += cipher.update(data[i:i + step])
+    return output + cipher.finalize()
+
+
+class TestGostStream(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = gost_key_generator(key)
+
+    def test_round_trip_all_modes(self):
+        for mode in STREAM_MODES:
+            for size in (0, 1, 7, 8, 9, 63, 64, 1000):
+                data = os.urandom(size)
+                for step in (1, 5, 8, 64):
+                    cypher = run_cipher(StreamEncryptor(self.keys, mode), data, step)
+                    assert run_cipher(StreamDecryptor(self.keys, mode), cypher, 3 * step) == data
+
+    def test_ctr_length_preserving(self):
+        cypher = run_cipher(StreamEncryptor(self.keys, "CTR"), b"abcdefghijk", 4)
+        assert len(cypher) == 8 + 11
+
+    def test_compatible_with_gost(self):
+        data = os.urandom(80)
+        for mode in ("CBC", "CTR"):
+            cypher = run_cipher(StreamEncryptor(self.keys, mode, iv=0x0123456789ABCDEF), data, 16)
+            blocks = decrypt(bytearray_to_64bits_block(cypher), self.keys, mode)
+            plain = bytes(_64bits_block_to_bytearray(blocks))
+            assert plain[:80] == data
+
+    def test_bad_padding(self):
+        cypher = run_cipher(StreamEncryptor(self.keys, "ECB"), b"data", 8)
+        with self.assertRaises(ValueError):
+            run_cipher(StreamDecryptor(gost_key_generator(key + 1), "ECB"), cypher, 8)
+
+    def test_truncated_cyphertext(self):
+        with self.assertRaises(ValueError):
+            run_cipher(StreamDecryptor(self.keys, "CBC"), b"1234567890", 8)
+
+    def test_file_round_trip(self):
+        data = os.urandom(5000)
+        with tempfile.TemporaryDirectory() as directory:
+            plain_name = os.path.join(directory, "plain.bin")
+            cypher_name = os.path.join(directory, "cypher.bin")
+            result_name = os.path.join(directory, "result.bin")
+            with open(plain_name, "wb") as file:
+                file.write(data)
+            for mode in STREAM_MODES:
+                keys = encrypt_file_stream(plain_name, cypher_name, mode, chunk_size=256)
+                decrypt_file_stream(cypher_name, result_name, keys, mode, chunk_size=128)
+                with open(result_name, "rb") as file:
+                    assert file.read() == data
+
+    def test_chunk_size(self):
+        with self.assertRaises(ValueError):
+            encrypt_stream(None, None, self.keys, chunk_size=10)
+
+    def test_mac_round_trip(self):
+        for mode in STREAM_MODES:
+            for size in (0, 5, 8, 100):
+                data = os.urandom(size)
+                for step in (1, 8, 64):
+                    cypher = run_cipher(StreamEncryptor(self.keys, mode, mac=True), data, step)
+                    assert run_cipher(StreamDecryptor(self.keys, mode, mac=True), cypher, step) == data
+
+    def test_mac_rejects_tampering(self):
+        for mode in STREAM_MODES:
+            cypher = bytearray(run_cipher(StreamEncryptor(self.keys, mode, mac=True), os.urandom(100), 16))
+            cypher[12] ^= 1
+            with self.assertRaises(ValueError):
+                run_cipher(StreamDecryptor(self.keys, mode, mac=True), bytes(cypher), 16)
+
+    def test_mac_file_removed_on_failure(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain_name = os.path.join(directory, "plain.bin")
+            cypher_name = os.path.join(directory, "cypher.bin")
+            result_name = os.path.join(directory, "result.bin")
+            with open(plain_name, "wb") as file:
+                file.write(os.urandom(3000))
+            keys = encrypt_file_stream(plain_name, cypher_name, "CTR", chunk_size=256, mac=True)
+            decrypt_file_stream(cypher_name, result_name, keys, "CTR", chunk_size=256, mac=True)
+            with open(cypher_name, "r+b") as file:
+                file.seek(1000)
+                byte = file.read(1)
+                file.seek(1000)
+                file.write(bytes([byte[0] ^ 1]))
+            with self.assertRaises(ValueError):
+                decrypt_file_stream(cypher_name, result_name, keys, "CTR", chunk_size=256, mac=True)
+            assert not os.path.exists(result_name)
+
+    def test_ofb_pickle(self):
+        data = os.urandom(100)
+        encryptor = StreamEncryptor(self.keys, "OFB")
+        output = encryptor.update(data[:40])
+        encryptor = pickle.loads(pickle.dumps(encryptor))
+        assert encryptor.keystream is None  # aucun producteur démarré avant le premier usage
+        output += encryptor.update(data[40:]) + encryptor.finalize()
+        assert run_cipher(StreamDecryptor(self.keys, "OFB"), output, 16) == data
+
+    def test_close(self):
+        with StreamEncryptor(self.keys, "OFB") as encryptor:
+            encryptor.update(bytes(20))
+        assert encryptor.keystream._stop.is_set()
+        with self.assertRaises(ValueError):
+            encrypt_stream(None, None, self.keys, "OFB", chunk_size=10)
@@ -1,5 +1,7 @@
 import unittest
+from array import array
 from gost import *
+from gost_feistel_function import compile_sbox_tables
 from key_generator import *
 
 key = 65652878985187006891393172765452250063435691895418812924645842034576172192371
@@ -77,3 +79,88 @@ class TestGOST(unittest.TestCase):
         cypher = encrypt([plain_text], keys, "CTR")
         plain_text2 = decrypt(cypher, keys, "CTR")
         assert plain_text2[0] == plain_text
+
+    def test_encrypt_decrypt_block_tables(self):
+        keys = gost_key_generator(key)
+        tables = compile_sbox_tables()
+        for plain_text in (0, 0xe18624e8f674b145, 0x123456ABCD132536, 2 ** 64 - 1):
+            cypher = encrypt_block(plain_text, keys, tables)
+            assert cypher == encrypt_block(plain_text, keys)
+            assert decrypt_block(cypher, keys, tables) == plain_text
+
+    def test_feistel_tables(self):
+        keys = gost_key_generator(key)
+        tables = compile_sbox_tables()
+        block = 0xC0B7A8D05F3A829C
+        for key_round in keys:
+            assert feistel(block, key_round, tables=tables) == feistel(block, key_round)
+            assert feistel(block, key_round, False, tables) == feistel(block, key_round, False)
+            block = feistel(block, key_round)
+
+    def test_des_cbc_encrypt_decrypt_tables(self):
+        plain_text = [0x123456ABCD132536, 0xe18624e8f674b145]
+        keys = gost_key_generator(key)
+        tables = compile_sbox_tables()
+        cypher = encrypt(plain_text, keys, "CBC", tables)
+        assert decrypt(cypher, keys, "CBC") == plain_text
+
+    def test_array_containers(self):
+        keys = gost_key_generator(key)
+        blocks = array("Q", [0x123456ABCD132536, 0xe18624e8f674b145])
+        for mode in ("ECB", "CBC", "CTR"):
+            cypher = encrypt(blocks, keys, mode)
+            assert isinstance(cypher, array)
+            assert decrypt(cypher, keys, mode) == blocks
+            assert decrypt(cypher.tolist(), keys, mode) == blocks.tolist()
+        assert encrypt(memoryview(blocks), keys) == encrypt(blocks, keys)
+
+    def test_encrypt_into(self):
+        keys = gost_key_generator(key)
+        tables = compile_sbox_tables()
+        src = array("Q", [0xe18624e8f674b145, 0x123456ABCD132536])
+        buffer = bytearray(8 * 3)
+        dst = memoryview(buffer).cast("Q")
+        assert encrypt_into(src, dst, keys, "CBC", tables, iv=7) == 3
+        assert dst[0] == 7
+        plain = array("Q", bytes(16))
+        assert decrypt_into(dst, plain, keys, "CBC", tables) == 2
+        assert plain == src
+        ecb = array("Q", bytes(8))
+        encrypt_into(src[:1], ecb, keys)
+        assert ecb[0] == 5391480007939838273
+
+    def test_encrypt_into_small_buffer(self):
+        keys = gost_key_generator(key)
+        with self.assertRaises(ValueError):
+            encrypt_into([1, 2], array("Q", bytes(16)), keys, "CTR")
+
+    def test_unknown_mode(self):
+        keys = gost_key_generator(key)
+        for function in (encrypt, decrypt):
+            with self.assertRaises(ValueError):
+                function([1, 2], keys, "XYZ")
+
+    def test_cfb_ofb_known_answer(self):
+        keys = gost_key_generator(key)
+        plain_text = [0xe18624e8f674b145, 0x123456ABCD132536]
+        for mode, expected in (("CFB", [0x0123456789ABCDEF, 0x8508F294BDC72D8B, 0x8F1A412F9FA97B9A]),
+                               ("OFB", [0x0123456789ABCDEF, 0x8508F294BDC72D8B, 0x48F8C41E37FFF3C7])):
+            cypher = array("Q", bytes(24))
+            assert encrypt_into(plain_text, cypher, keys, mode, iv=0x0123456789ABCDEF) == 3
+            assert cypher.tolist() == expected
+            plain = array("Q", bytes(16))
+            assert decrypt_into(cypher, plain, keys, mode, compile_sbox_tables()) == 2
+            assert plain.tolist() == plain_text
+
+    def test_cfb_ofb_encrypt_decrypt(self):
+        keys = gost_key_generator(key)
+        tables = compile_sbox_tables()
+        plain_text = [0x123456ABCD132536, 0xe18624e8f674b145, 0, 2 ** 64 - 1]
+        for mode in ("CFB", "OFB"):
+            cypher = encrypt(plain_text, keys, mode)
+            assert len(cypher) == len(plain_text) + 1
+            assert decrypt(cypher, keys, mode) == plain_text
+            assert decrypt(cypher, keys, mode, tables) == plain_text
+            cypher = encrypt(array("Q", plain_text), keys, mode, tables)
+            assert isinstance(cypher, array)
+            assert decrypt(cypher, keys, mode) == array("Q", plain_text)
@@ -0,0 +1,221 @@
+"""
+Ce fichier comprend la couche d'instrumentation optionnelle du chiffrement de fichiers :
+durée, octets traités et pic mémoire par étape, compteurs de blocs et de rounds, export
+JSON ou texte Prometheus, et exécution sous cProfile.
+
+Lorsque l'instrumentation est désactivée, NULL_METRICS est utilisé : ses méthodes ne font rien
+et ne coûtent qu'un appel de fonction par étape.
+"""
+import json
+import time
+
+
+class _Stage:
+    """
+    Mesure d'une exécution d'étape, utilisée comme gestionnaire de contexte par Metrics.stage.
+    L'attribut bytes peut être renseigné pendant l'étape.
+    """
+
+    def __init__(self, metrics, name, n_bytes):
+        self.metrics = metrics
+        self.name = name
+        self.bytes = n_bytes
+        self._start = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        if self.metrics.track_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._start
+        peak_memory = None
+        if self.metrics.track_memory:
+            import tracemalloc
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+        self.metrics._record(self.name, seconds, self.bytes, peak_memory)
+
+
+class _NullStage:
+    """
+    Étape sans mesure utilisée par NULL_METRICS.
+    """
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Metrics:
+    """
+    Collecte des mesures par étape (calls, seconds, bytes, peak_memory) et de compteurs (blocks, rounds, ...).
+    """
+    enabled = True
+
+    def __init__(self, track_memory=False, callback=None):
+        """
+        :param track_memory: mesure le pic mémoire de chaque étape avec tracemalloc (coûteux)
+        :param callback: fonction appelée à la fin de chaque étape avec (nom, mesures de l'exécution)
+        """
+        self.track_memory = track_memory
+        self.callback = callback
+        self.stages = dict()
+        self.counters = dict()
+
+    def stage(self, name, n_bytes=0):
+        """
+        :param name: nom de l'étape ("load", "to_blocks", "cipher", "to_bytes", "save", ...)
+        :param n_bytes: nombre d'octets traités (modifiable via l'attribut bytes de l'objet retourné)
+        :return: gestionnaire de contexte mesurant l'étape.
+        """
+        return _Stage(self, name, n_bytes)
+
+    def count(self, name, value=1):
+        """
+        :param name: nom du compteur ("blocks", "rounds", ...)
+        :param value: valeur à ajouter
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def timing_only(self):
+        """
+        :return: une vue qui enregistre durées et octets dans ces mesures sans utiliser tracemalloc, pour les
+        étapes exécutées dans plusieurs threads à la fois (le pic mémoire est alors mesuré par l'appelant).
+        """
+        return _TimingMetrics(self)
+
+    def _record(self, name, seconds, n_bytes, peak_memory):
+        stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "bytes": 0, "peak_memory": None})
+        stage["calls"] += 1
+        stage["seconds"] += seconds
+        stage["bytes"] += n_bytes
+        if peak_memory is not None:
+            stage["peak_memory"] = max(stage["peak_memory"] or 0, peak_memory)
+        if self.callback is not None:
+            self.callback(name, {"seconds": seconds, "bytes": n_bytes, "peak_memory": peak_memory})
+
+    def snapshot(self):
+        """
+        :return: dictionnaire {"stages": ..., "counters": ...} des mesures collectées.
+        """
+        return {"stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "counters": dict(self.counters)}
+
+    def to_json(self):
+        """
+        :return: les mesures au format JSON.
+        """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="gost"):
+        """
+        :param prefix: préfixe des noms de métriques
+        :return: les mesures au format texte Prometheus.
+        """
+        lines = list()
+        for metric, unit in (("seconds", "seconds_total"), ("bytes", "bytes_total"), ("calls", "calls_total"),
+                             ("peak_memory", "peak_memory_bytes")):
+            name = "{}_stage_{}".format(prefix, unit)
+            lines.append("# TYPE {} {}".format(name, "gauge" if metric == "peak_memory" else "counter"))
+            for stage_name, stage in self.stages.items():
+                if stage[metric] is not None:
+                    lines.append('{}{{stage="{}"}} {}'.format(name, stage_name, stage[metric]))
+        for counter, value in self.counters.items():
+            name = "{}_{}_total".format(prefix, counter)
+            lines.append("# TYPE {} counter".format(name))
+            lines.append("{} {}".format(name, value))
+        return "\n".join(lines) + "\n"
+
+    def dump(self, filename, output_format="json"):
+        """
+        Cette fonction écrit les mesures dans un fichier local.
+        :param filename: nom du fichier
+        :param output_format: "json" ou "prometheus"
+        """
+        if output_format == "json":
+            content = self.to_json()
+        elif output_format == "prometheus":
+            content = self.to_prometheus()
+        else:
+            raise ValueError("format inconnu : {}".format(output_format))
+        with open(filename, "w") as file:
+            file.write(content)
+
+
+class _TimingMetrics:
+    """
+    Vue de Metrics sans mesure mémoire, retournée par Metrics.timing_only.
+    """
+    enabled = True
+    track_memory = False
+
+    def __init__(self, metrics):
+        self._metrics = metrics
+
+    def stage(self, name, n_bytes=0):
+        return _Stage(self, name, n_bytes)
+
+    def count(self, name, value=1):
+        self._metrics.count(name, value)
+
+    def _record(self, name, seconds, n_bytes, peak_memory):
+        self._metrics._record(name, seconds, n_bytes, peak_memory)
+
+
+class _NullMetrics:
+    """
+    Instrumentation désactivée : aucune mesure n'est collectée.
+    """
+    enabled = False
+
+    def stage(self, name, n_bytes=0):
+        return _NULL_STAGE
+
+    def count(self, name, value=1):
+        pass
+
+    def timing_only(self):
+        return self
+
+
+NULL_METRICS = _NullMetrics()
+
+
+def count_blocks(metrics, n_blocks):
+    """
+    Cette fonction incrémente les compteurs de blocs et de rounds (32 rounds par bloc).
+    """
+    metrics.count("blocks", n_blocks)
+    metrics.count("rounds", 32 * n_blocks)
+
+
+def profile(function, *args, output=None, sort="cumulative", **kwargs):
+    """
+    Cette fonction exécute function sous cProfile.
+    :param function: fonction à profiler, appelée avec args et kwargs
+    :param output: fichier où écrire les statistiques brutes (lisible par pstats), optionnel
+    :param sort: critère de tri des statistiques retournées
+    :return: tuple (résultat de function, objet pstats.Stats).
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args, **kwargs)
+    if output is not None:
+        profiler.dump_stats(output)
+    return result, pstats.Stats(profiler).sort_stats(sort)
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+import gost
+import gost_stream
+from instrumentation import *
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.plain_name = os.path.join(self.directory.name, "plain.txt")
+        self.cypher_name = os.path.join(self.directory.name, "cypher.bin")
+        with open(self.plain_name, "w", encoding="UTF-8") as file:
+            file.write("texte à chiffrer " * 10)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_encrypt_file_stages(self):
+        events = list()
+        metrics = Metrics(track_memory=True, callback=lambda name, stage: events.append(name))
+        gost.encrypt_file(self.plain_name, self.cypher_name, "CBC", metrics=metrics)
+        snapshot = metrics.snapshot()
+        assert list(snapshot["stages"]) == ["load", "to_blocks", "cipher", "to_bytes", "save"]
+        assert events == ["load", "to_blocks", "cipher", "to_bytes", "save"]
+        assert snapshot["stages"]["load"]["bytes"] == 180
+        assert snapshot["stages"]["cipher"]["peak_memory"] > 0
+        assert snapshot["counters"] == {"blocks": 23, "rounds": 736}  # 180 octets, sans le vecteur initial
+
+    def test_stream_stages(self):
+        metrics = Metrics()
+        keys = gost_stream.encrypt_file_stream(self.plain_name, self.cypher_name, "CTR", chunk_size=64,
+                                               metrics=metrics)
+        assert metrics.stages["read"]["bytes"] == 180
+        assert metrics.stages["write"]["bytes"] == 188
+        assert metrics.counters["blocks"] == 23
+        metrics = Metrics()
+        gost_stream.decrypt_file_stream(self.cypher_name, self.plain_name + ".out", keys, "CTR", chunk_size=64,
+                                        metrics=metrics)
+        assert metrics.counters["blocks"] == 23
+        assert metrics.stages["cipher"]["peak_memory"] is None
+
+    def test_dump(self):
+        metrics = Metrics()
+        with metrics.stage("cipher", 16):
+            pass
+        count_blocks(metrics, 2)
+        json_name = os.path.join(self.directory.name, "metrics.json")
+        metrics.dump(json_name)
+        with open(json_name) as file:
+            assert json.load(file)["counters"]["rounds"] == 64
+        prometheus = metrics.to_prometheus()
+        assert 'gost_stage_bytes_total{stage="cipher"} 16' in prometheus
+        assert "gost_blocks_total 2" in prometheus
+
+    def test_null_metrics(self):
+        with NULL_METRICS.stage("load") as stage:
+            stage.bytes = 10
+        count_blocks(NULL_METRICS, 10)
+
+    def test_profile(self):
+        result, stats = profile(gost.encrypt_file, self.plain_name, self.cypher_name)
+        assert len(result) == 32
+        assert stats.total_calls > 0
@@ -30,6 +30,39 @@ D_BOX_TABLE = [14, 17, 11, 24, 1, 5, 3, 28,
                51, 45, 33, 48, 44, 49, 39, 56,
                34, 53, 46, 42, 50, 36, 29, 32]
 
+"""
+Décalage appliqué aux deux moitiés de 28 bits à chaque round du schéma avancé.
+"""
+ADVANCED_SHIFTS = (1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1)
+
+_ADVANCED_ROUND_PERMUTATIONS = None
+
+
+def advanced_round_permutations():
+    """
+    Cette fonction retourne (en les compilant au premier appel) 16 permutations compilées qui
+    donnent directement la clé locale de 32 bits de chaque round à partir d'une sous-clé de 64 bits.
+    Chaque permutation compose le retrait des bits de parité, les rotations cumulées des deux moitiés
+    de 28 bits jusqu'à ce round, la D-box et la sélection des 32 bits de poids faible.
+    :return: liste de 16 permutations compilées (voir permutation.compile_permutation).
+    """
+    global _ADVANCED_ROUND_PERMUTATIONS
+    if _ADVANCED_ROUND_PERMUTATIONS is None:
+        round_permutations = list()
+        total_shift = 0
+        for shift in ADVANCED_SHIFTS:
+            total_shift += shift
+            composite = list()
+            for position in D_BOX_TABLE[16:]:  # les 32 bits de poids faible de la clé de 48 bits
+                if position <= 28:  # moitié gauche, rotation de total_shift bits
+                    position = (position - 1 + total_shift) % 28 + 1
+                else:  # moitié droite
+                    position = (position - 29 + total_shift) % 28 + 29
+                composite.append(PARITY_DROP_TABLE[position - 1])
+            round_permutations.append(compile_permutation(composite, 64))
+        _ADVANCED_ROUND_PERMUTATIONS = round_permutations
+    return _ADVANCED_ROUND_PERMUTATIONS
+
 
 def rdm_key_generator():
     """
@@ -99,29 +132,9 @@ def gost_advanced_subkey_generator(key_lr):
     Cette fonction renvoie une liste des 16 clés nécessaires pour chacun des rounds du GOST avancé
     à partir d'une sous-clé de 64 bits gauche ou droite (voir énoncé).
     Les clés doivent être ordonnées (premier élément = clé pour round 1, etc.)
+    Les permutations et rotations de chaque round sont précompilées (voir advanced_round_permutations).
     :param key_lr: Clé de 64 bits issue d'une clé globale de 128 bits
     :return: Liste ordonnée de 16 clés locales.
     """
-    key_list = list()
-    mask = 2 ** 32 - 1
-
-    key = permutation(key_lr, PARITY_DROP_TABLE, 64)  # on enleve les 8 bits de parité (56 bits)
-
-    k28_l = key >> 28
-    k28_r = key & 2 ** 28 - 1
-
-    for i in range(1, 17):  # on génère les 16 clés locales
-        if i in (1, 2, 9, 16):  # on fait un shift gauche de 1 bit pour chaque round 1, 2, 9 et 16
-            k28_l = shift_left(k28_l, 28, 1)
-            k28_r = shift_left(k28_r, 28, 1)
-
-        else:  # on applique un shift de 2 bits pour le reste
-            k28_l = shift_left(k28_l, 28, 2)
-            k28_r = shift_left(k28_r, 28, 2)
-
-        new_k56 = (k28_l << 28) | k28_r  # On reconstruit la clé après shift
-        new_k48 = permutation(new_k56, D_BOX_TABLE, 56)  # On applique la permutation D-box
-        final_key = new_k48 & mask  # on recupére les premier 32bits
-        key_list.append(final_key)  # On ajoute la clé locale à la liste des clés de rounds
-
-    return key_list
+    return [apply_compiled_permutation(key_lr, round_permutation)
+            for round_permutation in advanced_round_permutations()]
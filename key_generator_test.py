@@ -75,3 +75,16 @@ class Test_key_generator(unittest.TestCase):
         assert keys[27] == int(0x8BC717D0)
         assert keys[29] == int(0xC5D9A36D)
         assert keys[31] == int(0x5D75C66D)
+
+    def test_gost_advanced_subkey_generator_random(self):
+        for _ in range(20):
+            key_lr = getrandbits(64)
+            expected = list()
+            key = permutation(key_lr, PARITY_DROP_TABLE, 64)
+            k28_l = key >> 28
+            k28_r = key & 2 ** 28 - 1
+            for shift in ADVANCED_SHIFTS:
+                k28_l = shift_left(k28_l, 28, shift)
+                k28_r = shift_left(k28_r, 28, shift)
+                expected.append(permutation((k28_l << 28) | k28_r, D_BOX_TABLE, 56) & 2 ** 32 - 1)
+            assert gost_advanced_subkey_generator(key_lr) == expected
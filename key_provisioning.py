@@ -0,0 +1,136 @@
+"""
+Ce fichier comprend la génération en masse de listes de clés de rounds : N clés sont tirées
+d'un CSPRNG (os.urandom) en un seul appel, et les N listes de 32 clés de rounds sont stockées
+de manière compacte dans un array('I') (32 entiers de 32 bits par clé), exportable vers un
+fichier binaire et vers une matrice NumPy (N, 32) de uint32.
+"""
+import os
+import struct
+import sys
+from array import array
+
+from key_generator import gost_key_generator, gost_advanced_key_generator
+
+"""
+En-tête des fichiers de clés : signature, schéma (1 = simple, 0 = avancé) et nombre de clés.
+"""
+FILE_MAGIC = b"GOSTKS1\x00"
+_HEADER = struct.Struct(">8sBQ")
+
+assert array("I").itemsize == 4
+
+
+def _to_big_endian(words):
+    if sys.byteorder == "little":
+        words = array("I", words)
+        words.byteswap()
+    return words
+
+
+class KeyScheduleBatch:
+    """
+    Lot de N listes de 32 clés de rounds stockées dans un seul array('I').
+    """
+
+    def __init__(self, schedules, simple_key=True):
+        """
+        :param schedules: array('I') de 32 * N clés de rounds (dans l'ordre des rounds, clé après clé)
+        :param simple_key: schéma de génération utilisé (True = simple, False = avancé)
+        """
+        if len(schedules) % 32 != 0:
+            raise ValueError("le nombre de clés de rounds doit être un multiple de 32")
+        self.schedules = schedules
+        self.simple_key = simple_key
+
+    def __len__(self):
+        return len(self.schedules) // 32
+
+    def __getitem__(self, index):
+        """
+        :param index: indice de la clé
+        :return: liste ordonnée des 32 clés locales (utilisable comme key_array).
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("indice de clé hors limites")
+        return self.schedules[32 * index:32 * (index + 1)].tolist()
+
+    def to_numpy(self):
+        """
+        :return: matrice NumPy (N, 32) de uint32 partageant la mémoire du lot.
+        """
+        import numpy as np
+        return np.frombuffer(self.schedules, dtype=np.uint32).reshape(-1, 32)
+
+    def save(self, filename):
+        """
+        Cette fonction écrit le lot dans un fichier binaire (en-tête puis clés en big-endian).
+        :param filename: nom du fichier
+        """
+        with open(filename, "wb") as file:
+            file.write(_HEADER.pack(FILE_MAGIC, int(self.simple_key), len(self)))
+            file.write(_to_big_endian(self.schedules).tobytes())
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Cette fonction lit un lot écrit par save.
+        :param filename: nom du fichier
+        :return: le KeyScheduleBatch correspondant.
+        """
+        with open(filename, "rb") as file:
+            header = file.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError("le fichier de clés est tronqué")
+            magic, simple_key, count = _HEADER.unpack(header)
+            if magic != FILE_MAGIC:
+                raise ValueError("le fichier n'est pas un fichier de clés GOST")
+            data = file.read()
+        if len(data) != 32 * 4 * count:
+            raise ValueError("le fichier de clés est tronqué")
+        schedules = array("I")
+        schedules.frombytes(data)
+        return cls(_to_big_endian(schedules), bool(simple_key))
+
+
+def generate_key_schedules(count, simple_key=True):
+    """
+    Cette fonction génère count clés aléatoires en un seul tirage CSPRNG et leurs listes de clés de rounds.
+    Les listes obtenues sont identiques à celles de gost_key_generator (clés de 256 bits) ou
+    gost_advanced_key_generator (clés de 128 bits) appliqués aux mêmes clés.
+    :param count: nombre de clés à générer
+    :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+    :return: un KeyScheduleBatch.
+    """
+    schedules = array("I")
+    if simple_key:
+        words = array("I")
+        words.frombytes(os.urandom(32 * count))  # chaque clé de 256 bits = 8 mots de 32 bits (poids fort en tête)
+        words = _to_big_endian(words)
+        for start in range(0, 8 * count, 8):
+            key_words = words[start:start + 8]
+            round_keys = key_words[::-1]  # les 32 bits de poids faible sont utilisés pour le round 1
+            schedules += round_keys
+            schedules += round_keys
+            schedules += round_keys
+            schedules += key_words
+    else:
+        raw = os.urandom(16 * count)
+        for start in range(0, 16 * count, 16):
+            schedules.extend(gost_advanced_key_generator(int.from_bytes(raw[start:start + 16], "big")))
+    return KeyScheduleBatch(schedules, simple_key)
+
+
+def schedules_from_keys(keys, simple_key=True):
+    """
+    Cette fonction construit un lot à partir de clés existantes.
+    :param keys: liste de clés globales (256 bits pour le schéma simple, 128 bits pour le schéma avancé)
+    :param simple_key: utilise la clé de base du GOST si True, sinon utilise le schéma avancé
+    :return: un KeyScheduleBatch.
+    """
+    generator = gost_key_generator if simple_key else gost_advanced_key_generator
+    schedules = array("I")
+    for key in keys:
+        schedules.extend(generator(key))
+    return KeyScheduleBatch(schedules, simple_key)
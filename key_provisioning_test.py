@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from gost import encrypt, decrypt
+from key_generator import gost_key_generator, gost_advanced_key_generator
+from key_provisioning import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestKeyProvisioning(unittest.TestCase):
+
+    def test_simple_schedules(self):
+        batch = generate_key_schedules(100)
+        assert len(batch) == 100
+        assert len(batch.schedules) == 3200
+        for index in (0, 57, -1):
+            key_array = batch[index]
+            words = key_array[:8]
+            key = sum(word << (32 * i) for i, word in enumerate(words))
+            assert key_array == gost_key_generator(key)
+
+    def test_advanced_schedules(self):
+        batch = generate_key_schedules(5, simple_key=False)
+        cypher = encrypt([1, 2, 3], batch[4], "CBC")
+        assert decrypt(cypher, batch[4], "CBC") == [1, 2, 3]
+        keys = [0xAABB09182736CCDDAABB09182736CCDD, 1]
+        assert schedules_from_keys(keys, False)[0] == gost_advanced_key_generator(keys[0])
+
+    def test_save_load(self):
+        batch = generate_key_schedules(10)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "keys.bin")
+            batch.save(filename)
+            assert os.path.getsize(filename) == 17 + 10 * 128
+            loaded = KeyScheduleBatch.load(filename)
+        assert loaded.schedules == batch.schedules
+        assert loaded.simple_key
+
+    def test_bad_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "keys.bin")
+            with open(filename, "wb") as file:
+                file.write(b"x" * 40)
+            with self.assertRaises(ValueError):
+                KeyScheduleBatch.load(filename)
+            with open(filename, "wb") as file:
+                file.write(FILE_MAGIC)
+            with self.assertRaises(ValueError):
+                KeyScheduleBatch.load(filename)
+
+    def test_index(self):
+        with self.assertRaises(IndexError):
+            generate_key_schedules(2)[2]
+
+    @unittest.skipUnless(np is not None, "NumPy n'est pas installé")
+    def test_to_numpy(self):
+        batch = generate_key_schedules(3)
+        matrix = batch.to_numpy()
+        assert matrix.shape == (3, 32)
+        assert matrix[1].tolist() == batch[1]
@@ -45,3 +45,54 @@ def shift_left(data, input_size, n_bit):
     shift_r = (data << n_bit) & mask1
     final_result = shift_r | shift_l
     return final_result
+
+
+"""
+Cache des permutations compilées, indexé par (table d'indices, taille de l'entrée).
+"""
+_COMPILED_PERMUTATIONS = {}
+
+
+def compile_permutation(new_position, input_size):
+    """
+    Cette fonction compile une table de permutation en tables indexées par octet : pour chaque
+    octet de l'entrée, une table de 256 entrées donne la contribution de cet octet au résultat.
+    La permutation se résume alors à un OU de ceil(input_size / 8) lectures de table.
+    Les formes compilées sont mises en cache.
+    :param new_position: Liste de nouveaux indices (1 = premier élément)
+    :param input_size: Nombre de bits du block initial.
+    :return: tuple de paires (décalage, table de 256 entiers), à utiliser avec apply_compiled_permutation.
+    """
+    cache_key = (tuple(new_position), input_size)
+    compiled = _COMPILED_PERMUTATIONS.get(cache_key)
+    if compiled is not None:
+        return compiled
+
+    compiled = list()
+    for shift in range(0, input_size, 8):
+        # contribution de chacun des 8 bits de l'octet, puis de toutes leurs combinaisons
+        bit_values = [permutation(1 << (shift + bit), new_position, input_size) for bit in range(8)]
+        table = [0] * 256
+        for value in range(1, 256):
+            lowest_bit = (value & -value).bit_length() - 1
+            table[value] = table[value & (value - 1)] | bit_values[lowest_bit]
+        compiled.append((shift, table))
+
+    compiled = tuple(compiled)
+    _COMPILED_PERMUTATIONS[cache_key] = compiled
+    return compiled
+
+
+def apply_compiled_permutation(block, compiled):
+    """
+    Cette fonction applique une permutation compilée par compile_permutation.
+    Le résultat est identique à celui de permutation(block, new_position, input_size).
+    :param block: Block de bits à permuter (sous forme d'entier).
+    :param compiled: permutation compilée
+    :return: un block de bits permuté (sous forme d'entier).
+    """
+    permuted_block = 0
+    for shift, table in compiled:
+        permuted_block |= table[(block >> shift) & 0xFF]
+    return permuted_block
+
@@ -1,5 +1,7 @@
 import unittest
-from permutation import permutation, shift_left
+from random import getrandbits, shuffle
+
+from permutation import permutation, shift_left, compile_permutation, apply_compiled_permutation
 
 INIT_PERM_TEST = [1, 5, 9, 8, 2, 3, 7, 4, 6]
 FINAL_PERM_TEST = [1, 5, 6, 8, 2, 9, 7, 4, 3]
@@ -77,3 +79,20 @@ class TestPermutation(unittest.TestCase):
         final = shift_left(init, 32, 12)
         expected = 0x45678123
         assert expected == final
+
+    def test_compiled_permutation_from_book(self):
+        compiled = compile_permutation(INIT_PERM_TEST, 9)
+        for init in range(2 ** 9):
+            assert apply_compiled_permutation(init, compiled) == permutation(init, INIT_PERM_TEST, 9)
+
+    def test_compiled_permutation_random(self):
+        new_position = list(range(1, 57))
+        shuffle(new_position)
+        compiled = compile_permutation(new_position, 56)
+        assert len(compiled) == 7
+        for _ in range(100):
+            init = getrandbits(56)
+            assert apply_compiled_permutation(init, compiled) == permutation(init, new_position, 56)
+
+    def test_compiled_permutation_cache(self):
+        assert compile_permutation([2, 1], 2) is compile_permutation((2, 1), 2)
@@ -1,3 +1,15 @@
+import mmap
+import os
+import sys
+from array import array
+
+# Padding schemes for the final partial block
+PADDING_NONE = "none"  # the data must be a multiple of 8 bytes
+PADDING_ZERO = "zero"  # the last block is completed by 0 bytes
+PADDING_PKCS7 = "pkcs7"  # 1 to 8 bytes equal to the padding length are always appended
+
+assert array("Q").itemsize == 8
+
 def bytearray_to_64bits_block(byte_array):
     # Block de 64 bits | 8 bytes
     block_array = []
@@ -32,6 +44,64 @@ def _64bits_block_to_bytearray(blocks):
     return bytearray(byte_array)
 
 
+def pad_pkcs7(data, block_size=8):
+    # Always append between 1 and block_size bytes, each equal to the number of bytes added
+    pad_len = block_size - len(data) % block_size
+    return bytes(data) + bytes([pad_len]) * pad_len
+
+
+def unpad_pkcs7(data, block_size=8):
+    if not data or len(data) % block_size != 0:
+        raise ValueError("invalid padded data length")
+    pad_len = data[-1]
+    if not 1 <= pad_len <= block_size or data[-pad_len:] != bytes([pad_len]) * pad_len:
+        raise ValueError("invalid padding")
+    return data[:-pad_len]
+
+
+def pad_bytes(data, padding=PADDING_NONE):
+    remainder = len(data) % 8
+    if padding == PADDING_PKCS7:
+        return pad_pkcs7(data)
+    elif padding == PADDING_ZERO:
+        return bytes(data) + bytes(8 - remainder) if remainder else data
+    elif padding == PADDING_NONE:
+        if remainder:
+            raise ValueError("data length is not a multiple of 8 bytes")
+        return data
+    raise ValueError("unknown padding scheme: {}".format(padding))
+
+
+def bytes_to_blocks(data, padding=PADDING_NONE):
+    # Big-endian 64 bits blocks read straight from the buffer (no per-byte Python loop)
+    blocks = array("Q")
+    blocks.frombytes(memoryview(pad_bytes(data, padding)).cast("B"))
+    if sys.byteorder == "little":
+        blocks.byteswap()
+    return blocks
+
+
+def blocks_to_bytes_into(blocks, out, offset=0):
+    # Write the blocks in big-endian into a preallocated buffer, returns the number of bytes written
+    if not isinstance(blocks, array) or blocks.typecode != "Q":
+        blocks = array("Q", blocks)
+    elif sys.byteorder == "little":
+        blocks = array("Q", blocks)  # copy before swapping, the caller keeps its blocks
+    if sys.byteorder == "little":
+        blocks.byteswap()
+    size = len(blocks) * 8
+    memoryview(out).cast("B")[offset:offset + size] = memoryview(blocks).cast("B")
+    return size
+
+
+def blocks_to_bytes(blocks, padding=PADDING_NONE):
+    byte_array = bytearray(len(blocks) * 8)
+    blocks_to_bytes_into(blocks, byte_array)
+    if padding == PADDING_PKCS7:
+        return bytearray(unpad_pkcs7(byte_array))
+    return byte_array
+
+
 def save_to_bin(filename, byte_array):
     file = open(filename, "wb")
     file.write(byte_array)
@@ -45,6 +115,29 @@ def load_from_bin(filename):
     return byte
 
 
+def map_file(filename):
+    # Read-only mapping of the whole file, the OS page cache handles residency.
+    # mmap refuses empty files: an empty bytes object stands for them.
+    with open(filename, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def create_mapped_file(filename, size):
+    # Writable mapping of a new file preallocated to its final size
+    with open(filename, "w+b") as file:
+        file.truncate(size)
+        if size == 0:
+            return bytearray()
+        return mmap.mmap(file.fileno(), size)
+
+
+def close_mapping(mapping):
+    if isinstance(mapping, mmap.mmap):
+        mapping.close()
+
+
 def load_txt_file(name):
     file = open(name, encoding="UTF-8")
     return file.read()
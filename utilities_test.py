@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from utilities import *
+from utilities import _64bits_block_to_bytearray
+
+
+class TestBlockConversion(unittest.TestCase):
+
+    def test_bytes_to_blocks(self):
+        data = os.urandom(64)
+        assert list(bytes_to_blocks(data)) == bytearray_to_64bits_block(data)
+        assert list(bytes_to_blocks(memoryview(data))) == bytearray_to_64bits_block(data)
+
+    def test_blocks_to_bytes(self):
+        blocks = bytearray_to_64bits_block(os.urandom(64))
+        assert blocks_to_bytes(blocks) == _64bits_block_to_bytearray(blocks)
+        assert blocks_to_bytes(bytes_to_blocks(bytes(blocks_to_bytes(blocks)))) == blocks_to_bytes(blocks)
+
+    def test_blocks_to_bytes_into(self):
+        blocks = bytes_to_blocks(b"ABCDEFGH12345678")
+        out = bytearray(20)
+        assert blocks_to_bytes_into(blocks, out, 2) == 16
+        assert out == b"\x00\x00ABCDEFGH12345678\x00\x00"
+        assert blocks_to_bytes(blocks) == b"ABCDEFGH12345678"  # les blocs ne sont pas modifiés
+
+    def test_padding_none(self):
+        with self.assertRaises(ValueError):
+            bytes_to_blocks(b"abc")
+
+    def test_padding_zero(self):
+        assert list(bytes_to_blocks(b"\x01", PADDING_ZERO)) == [0x0100000000000000]
+        assert list(bytes_to_blocks(b"\x00", PADDING_ZERO)) == [0]
+        assert len(bytes_to_blocks(b"12345678", PADDING_ZERO)) == 1
+
+    def test_padding_pkcs7(self):
+        for size in range(0, 20):
+            data = os.urandom(size)
+            blocks = bytes_to_blocks(data, PADDING_PKCS7)
+            assert len(blocks) == size // 8 + 1
+            assert blocks_to_bytes(blocks, PADDING_PKCS7) == data
+
+    def test_bad_pkcs7(self):
+        with self.assertRaises(ValueError):
+            unpad_pkcs7(b"12345670")
+        with self.assertRaises(ValueError):
+            unpad_pkcs7(b"1234567\x09")
+
+    def test_mapped_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "mapped.bin")
+            mapping = create_mapped_file(filename, 16)
+            blocks_to_bytes_into([1, 2], mapping)
+            close_mapping(mapping)
+            mapping = map_file(filename)
+            assert list(bytes_to_blocks(mapping[:])) == [1, 2]
+            close_mapping(mapping)
+            close_mapping(create_mapped_file(filename, 0))
+            assert map_file(filename) == b""